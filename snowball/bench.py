@@ -0,0 +1,154 @@
+"""
+bench.py
+
+Timings of `snowball bench`: wall-clock seconds per pipeline stage, per-model execution times from dbt's
+run_results.json, and the comparison of a run against a stored baseline.
+
+A result file holds one entry per data scale, keyed "<customers>x<months>":
+
+    {"created": ..., "machine": {...}, "scales": {"1000x36": {"customers": 1000, "months": 36, "rows": 31000,
+     "stages": {"synth": 0.4, "copy": 0.1, ...}, "models": {"monthly_revenue": {"status": "success",
+     "execution_time": 0.21}, ...}}}}
+"""
+import json
+import os
+import platform
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# A stage or model regresses when it is this much slower than the baseline ...
+DEFAULT_TOLERANCE = 0.25
+# ... and at least this many seconds slower, so sub-second noise on small scales does not fail a run
+DEFAULT_MIN_SECONDS = 0.5
+
+
+def parse_scale(scale):
+    """
+    Parse a "<customers>x<months>" scale, e.g. 10000x60; customers also take a k / m suffix (10kx60).
+
+    Returns:
+        tuple: (customers, months)
+    """
+    try:
+        customers, months = scale.lower().split("x")
+        multiplier = {"k": 1_000, "m": 1_000_000}.get(customers[-1], 1)
+        customers = int(float(customers.rstrip("km")) * multiplier)
+        months = int(months)
+    except (ValueError, IndexError):
+        raise ValueError(f"Invalid scale '{scale}', expected <customers>x<months> such as 10000x60")
+    if customers < 1 or months < 1:
+        raise ValueError(f"Invalid scale '{scale}', customers and months must be at least 1")
+    return customers, months
+
+
+class StageTimer:
+    """Wall-clock seconds per named stage, summed when a stage runs more than once"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(self.stages.get(name, 0.0) + time.perf_counter() - start, 3)
+
+
+def parse_run_results(run_results_path):
+    """
+    Per-model status and execution time of a dbt run.
+
+    Returns:
+        dict: model name -> {"status": str, "execution_time": float}
+    """
+    with open(run_results_path, "r", encoding="utf-8") as file:
+        run_results = json.load(file)
+
+    models = {}
+    for result in run_results.get("results", []):
+        if not result["unique_id"].startswith("model."):
+            continue
+        models[result["unique_id"].split(".")[-1]] = {
+            "status": result["status"],
+            "execution_time": round(result.get("execution_time") or 0.0, 3),
+        }
+    return models
+
+
+def new_results():
+    """Empty result document, stamped with the machine it was measured on"""
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scales": {},
+    }
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def write_results(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+
+
+def compare_results(current, baseline, tolerance=DEFAULT_TOLERANCE, min_seconds=DEFAULT_MIN_SECONDS):
+    """
+    Stages and models of the scales in both documents that got slower than the baseline allows.
+
+    Returns:
+        list: {"scale", "kind" (stage / model), "name", "baseline", "current", "ratio"} dicts, slowest ratio first
+    """
+    regressions = []
+    for scale, measured in current["scales"].items():
+        reference = baseline.get("scales", {}).get(scale)
+        if not reference:
+            continue
+        pairs = [("stage", name, seconds, reference.get("stages", {}).get(name))
+                 for name, seconds in measured.get("stages", {}).items()]
+        pairs += [("model", name, timing["execution_time"],
+                   reference.get("models", {}).get(name, {}).get("execution_time"))
+                  for name, timing in measured.get("models", {}).items()]
+
+        for kind, name, seconds, reference_seconds in pairs:
+            if reference_seconds is None:
+                continue
+            if seconds > reference_seconds * (1 + tolerance) and seconds - reference_seconds >= min_seconds:
+                regressions.append({
+                    "scale": scale,
+                    "kind": kind,
+                    "name": name,
+                    "baseline": reference_seconds,
+                    "current": seconds,
+                    "ratio": round(seconds / reference_seconds, 2) if reference_seconds else None,
+                })
+    return sorted(regressions, key=lambda r: -(r["ratio"] or float("inf")))
+
+
+def format_report(results, regressions=None):
+    """Plain-text summary of a result document: stage and slowest model timings per scale, then any regressions"""
+    lines = []
+    for scale, measured in results["scales"].items():
+        lines.append(f"{scale}: {measured.get('rows', 0):,} revenue rows")
+        stages = measured.get("stages", {})
+        lines.append("  stages  " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stages.items()))
+        models = sorted(measured.get("models", {}).items(), key=lambda item: -item[1]["execution_time"])
+        lines.append("  models  " + ", ".join(f"{name} {timing['execution_time']:.2f}s" for name, timing in models[:5]))
+
+    if regressions is not None:
+        if not regressions:
+            lines.append("No regressions against the baseline")
+        for regression in regressions:
+            lines.append(f"⚠️ {regression['scale']} {regression['kind']} {regression['name']}: "
+                         f"{regression['baseline']:.2f}s -> {regression['current']:.2f}s")
+    return "\n".join(lines)
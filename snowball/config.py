@@ -5,6 +5,7 @@ config.py
     You can define constants such as project paths, environment settings, update mapping csv, platform / adapter
     and other parameters that are reused across the project.
 """
+import csv
 import yaml
 from pathlib import Path
 
@@ -14,12 +15,44 @@ project_dir  = str(Path.home() / "Downloads/snowball_dbt")
 mapping_file = str(Path.home() / "Downloads/column_mapping.csv")
 output_dir   = str(Path.home() / "Downloads")
 
+# === Code generation === #
+# "bootstrap" creates schema-only stubs of the introspected relations before compiling the SQL and Spark
+# versions; "full" runs every model on the empty snowball_revenue placeholder instead.
+introspection_mode = "bootstrap"
+# "offline" hands the local column_mapping.csv to dbt as a var so column lists resolve without querying
+# the warehouse; "warehouse" reads them from the seeded column_mapping table and the introspected relations.
+column_resolution = "offline"
+
+
+def _target_db_vars(target_profile: dict) -> dict:
+    """Key connection info of one profiles.yml output"""
+    platform_type = target_profile.get("type", "").lower()
+
+    if platform_type == "sqlserver":
+        db_name = target_profile.get("database", "")
+    elif platform_type == "databricks":
+        db_name = target_profile.get("catalog", "")
+    elif platform_type == "duckdb":
+        # dbt-duckdb names the database after the file, or "memory" when there is none
+        path = target_profile.get("path", ":memory:")
+        db_name = "memory" if path == ":memory:" else Path(path).stem
+    else:
+        db_name = target_profile.get("database", target_profile.get("dbname", ""))
+
+    return {
+        "platform": platform_type,
+        "database": db_name,
+        "schema": target_profile.get("schema", ""),
+        "type": platform_type,
+        "threads": target_profile.get("threads", 1)
+    }
+
 
 def load_dbt_profile(profile_name: str = "Snowball_dbt", target: str = "dev") -> dict:
     """
     Load DBT profile credentials from the profiles.yml file in Downloads.
 
-    Supports Databricks, SQL Server, Fabric, Snowflake, and Redshift adapters.
+    Supports Databricks, SQL Server, Fabric, Snowflake, Redshift, and DuckDB adapters.
     Returns a simplified dictionary with key connection info.
     """
     profiles_path = Path(dbt_profiles_dir)
@@ -40,25 +73,55 @@ def load_dbt_profile(profile_name: str = "Snowball_dbt", target: str = "dev") ->
         if not target_profile:
             raise ValueError(f"Target '{target}' not found under profile '{profile_name}'")
 
-        platform_type = target_profile.get("type", "").lower()
-
-        if platform_type == "sqlserver":
-            db_name = target_profile.get("database", "")
-        elif platform_type == "databricks":
-            db_name = target_profile.get("catalog", "")
-        else:
-            db_name = target_profile.get("database", target_profile.get("dbname", ""))
-
-        db_vars = {
-            "platform": platform_type,
-            "database": db_name,
-            "schema": target_profile.get("schema", ""),
-            "type": platform_type,
-            "threads": target_profile.get("threads", 1)
-        }
+        db_vars = _target_db_vars(target_profile)
 
         # print(f"Loaded DB profile successfully as: {db_vars}") 
         return db_vars
 
     except Exception as e:
         raise Exception(f"Error loading DBT profile from {profiles_path}: {e}")
+
+
+def load_profile_targets(profile_name: str = "Snowball_dbt") -> dict:
+    """
+    Load every target (output) of a profile in profiles.yml, for compiling one package per platform.
+
+    Returns a dictionary of target name to the same connection info load_dbt_profile returns.
+    """
+    profiles_path = Path(dbt_profiles_dir)
+
+    if not profiles_path.exists():
+        raise FileNotFoundError(f"profiles.yml not found at: {profiles_path}")
+
+    with open(profiles_path, "r") as file:
+        profiles = yaml.safe_load(file) or {}
+
+    profile = profiles.get(profile_name)
+    if not profile:
+        raise ValueError(f"Profile '{profile_name}' not found in profiles.yml")
+
+    return {target: _target_db_vars(target_profile or {})
+            for target, target_profile in (profile.get("outputs") or {}).items()}
+
+
+def load_column_mapping(mapping_path: str = mapping_file) -> list:
+    """
+    Load column_mapping.csv as [source_column, mapped_column, dimension] rows for the column_mapping dbt var.
+
+    Empty and 'null' dimensions become None, the same way dbt seed loads them.
+    """
+    csv_path = Path(mapping_path)
+
+    if not csv_path.exists():
+        raise FileNotFoundError(f"column_mapping.csv not found at: {csv_path}")
+
+    rows = []
+    with open(csv_path, "r", newline="", encoding="utf-8-sig") as file:
+        for record in csv.DictReader(file):
+            dimension = (record.get("dimension") or "").strip()
+            rows.append([
+                record["source_column"].strip(),
+                record["mapped_column"].strip(),
+                None if dimension.lower() in ("", "null") else dimension
+            ])
+    return rows
@@ -0,0 +1,85 @@
+"""
+dbt_session.py
+
+One dbtRunner shared by every dbt step of a Snowball run.
+
+The project is parsed once with ``dbt parse`` and the resulting manifest is handed to the later seed,
+run-operation, run and compile invocations, so none of them parses the project again. The manifest is
+re-parsed only when the vars, target or paths passed to dbt or the column_mapping seed change, and dropped after dbt deps.
+"""
+import os
+import hashlib
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from dbt.cli.main import dbtRunner
+
+# Commands that load the manifest and therefore accept the parsed one
+MANIFEST_COMMANDS = ("seed", "run", "compile", "run-operation", "build")
+# Options of a command that also shape the parse
+PARSE_OPTIONS = ("--project-dir", "--profiles-dir", "--vars", "--target", "--target-path", "--log-path")
+
+
+def _option_value(args, option):
+    """Value of the last occurrence of an option in dbt CLI args"""
+    value = None
+    for index, arg in enumerate(args[:-1]):
+        if arg == option:
+            value = args[index + 1]
+    return value
+
+
+class DbtSession:
+    def __init__(self, project_dir):
+        self.runner = dbtRunner()
+        self.seed_path = os.path.join(project_dir, "seeds", "column_mapping.csv")
+        self._manifest_key = None
+
+    def _seed_hash(self):
+        if not os.path.exists(self.seed_path):
+            return ""
+        with open(self.seed_path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+    def invalidate(self):
+        """Drop the parsed manifest, the next command parses the project again"""
+        self.runner.manifest = None
+        self._manifest_key = None
+
+    def _ensure_manifest(self, args):
+        key = tuple(_option_value(args, option) for option in PARSE_OPTIONS) + (self._seed_hash(),)
+        if self.runner.manifest is not None and key == self._manifest_key:
+            return
+
+        self.invalidate()
+        parse_args = ["parse"]
+        for option in PARSE_OPTIONS:
+            value = _option_value(args, option)
+            if value is not None:
+                parse_args += [option, value]
+
+        self.runner.callbacks = []
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            result = self.runner.invoke(parse_args)
+        # On a failed parse the command parses by itself and reports the error through its own progress bar
+        if result.success:
+            self.runner.manifest = result.result
+            self._manifest_key = key
+
+    def invoke(self, args, progress=None):
+        """Invoke dbt on the shared runner, reusing the parsed manifest where the command takes one."""
+        command = args[0]
+        if command in MANIFEST_COMMANDS:
+            self._ensure_manifest(args)
+
+        # deps and debug ignore the manifest, so it is kept for the commands that follow them
+        self.runner.callbacks = [progress] if progress is not None else []
+        try:
+            with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+                result = self.runner.invoke(args)
+        finally:
+            self.runner.callbacks = []
+
+        if command == "deps":
+            # Newly installed packages add macros the parsed manifest does not know
+            self.invalidate()
+        return result
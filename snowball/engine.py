@@ -0,0 +1,796 @@
+"""
+engine.py
+
+NumPy reference implementation of the Snowball models, from a local revenue extract to rpt_revenue_bridge, with no
+warehouse or dbt run.
+
+Every model is computed with array operations over rows sorted by key and month: groups are factorized to integer ids,
+the month scaffold of monthly_revenue is built with repeat / arange offsets, the 12-month ARR window is a difference
+of cumulative sums, and the period lags and previous / next non-zero months are index shifts within each key.
+
+The results match the dbt models with dimension_mode 'narrow' (customer_key, product_key and other_key carry the
+dimensions, joined to the dim_* tables) and hash_key_type 'md5', on any platform. The YTD start ARR is read from
+the pair's own history, which equals the default ytd_lag_method as long as each customer / product pair has a single
+revenue key.
+
+Extracts larger than memory go through run_partitioned, which streams them into customer partitions and computes
+one partition at a time.
+"""
+import csv
+import hashlib
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from datetime import date, datetime
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.parquet
+except ImportError:
+    # Parquet extracts and output are optional: CSV needs the standard library only, pyarrow only reads it faster
+    pyarrow = None
+
+PERIODS = ("lm", "l3m", "ltm", "ytd")
+# LAG offsets of period_revenue, the monthly / quarterly / yearly vars
+LAG_MONTHS = {"lm": 1, "l3m": 3, "ltm": 12}
+RECURRING_TYPES = ("1", "Recurring")
+# Out-of-core runs: estimated revenue rows per partition, and the most partition files open at once
+PARTITION_ROWS = 200_000
+MAX_PARTITIONS = 256
+# Text fields holding any of these are quoted in CSV output
+_CSV_SPECIAL = re.compile(r'[,"\r\n]')
+
+
+############  Input ##############
+
+def _month_number(value):
+    """Months since year 0 of a DD-MM-YYYY text, an ISO date / timestamp or a date, the formats get_month reads"""
+    if isinstance(value, (date, datetime)):
+        return value.year * 12 + value.month - 1
+    text = str(value).strip()
+    try:
+        parsed = datetime.strptime(text, "%d-%m-%Y")
+    except ValueError:
+        parsed = datetime.fromisoformat(text[:10])
+    return parsed.year * 12 + parsed.month - 1
+
+
+def _read_csv(revenue_path, needed, chunk_rows=200_000):
+    """
+    Dictionary-encode the needed columns of a CSV, chunk_rows records at a time so only the codes are kept.
+
+    Returns:
+        tuple: (source column -> (int64 codes, object array of the distinct values, None for empty text),
+        names of the needed columns missing from the header)
+    """
+    with open(revenue_path, "r", newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        positions = {name: header.index(name) for name in needed if name in header}
+        indexes = {name: {} for name in positions}
+        codes = {name: [] for name in positions}
+        while True:
+            records = list(itertools.islice(reader, chunk_rows))
+            if not records:
+                break
+            for name, position in positions.items():
+                values = [record[position] for record in records]
+                index = indexes[name]
+                for value in dict.fromkeys(values):
+                    index.setdefault(value, len(index))
+                codes[name].append(np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values)))
+
+    encoded = {}
+    for name, index in indexes.items():
+        values = np.array([None if value == "" else value for value in index], dtype=object)
+        encoded[name] = (np.concatenate(codes[name]) if codes[name] else np.zeros(0, dtype=np.int64), values)
+    return encoded, [name for name in needed if name not in positions]
+
+
+def _encode_arrow(column):
+    """Dictionary-encode a pyarrow column: (int64 codes, object array of the distinct values, None for NULL)"""
+    encoded = column.combine_chunks().dictionary_encode()
+    categories, indices = encoded.dictionary.to_pylist(), encoded.indices
+    if indices.null_count:
+        categories.append(None)
+        indices = indices.fill_null(len(categories) - 1)
+    return indices.to_numpy().astype(np.int64), np.array(categories, dtype=object)
+
+
+def read_revenue(revenue_path, mapping_rows):
+    """
+    Read a CSV or Parquet revenue extract as its mapped columns, the way revenue.sql selects them.
+
+    Dimension columns are dictionary-encoded as (codes, distinct values) pairs. Empty CSV fields are NULL, as DuckDB
+    and the warehouse loaders read them.
+
+    Returns:
+        dict: mapped column name -> (codes, values) for the dimensions, an int64 month number array for month and a
+        float64 array for revenue
+    """
+    needed = list(dict.fromkeys(source_column for source_column, _, _ in mapping_rows))
+    if revenue_path.lower().endswith(".parquet"):
+        if pyarrow is None:
+            raise ImportError("Parquet extracts need pyarrow: pip install pyarrow, or use a .csv extract")
+        present = set(pyarrow.parquet.read_schema(revenue_path).names)
+        table = pyarrow.parquet.read_table(revenue_path, columns=[name for name in needed if name in present])
+        missing = [name for name in needed if name not in table.column_names]
+        encoded = {name: _encode_arrow(table.column(name)) for name in table.column_names}
+    elif pyarrow is not None:
+        # Every column as text, empty fields as NULL, so values parse exactly as on the standard library path
+        with open(revenue_path, "r", newline="", encoding="utf-8-sig") as file:
+            header = next(csv.reader(file))
+        present = [name for name in needed if name in header]
+        table = pyarrow.csv.read_csv(revenue_path, convert_options=pyarrow.csv.ConvertOptions(
+            column_types={name: pyarrow.string() for name in header}, include_columns=present,
+            strings_can_be_null=True, null_values=[""]))
+        missing = [name for name in needed if name not in present]
+        encoded = {name: _encode_arrow(table.column(name)) for name in present}
+    else:
+        encoded, missing = _read_csv(revenue_path, needed)
+    if missing:
+        raise ValueError(f"Column(s) {', '.join(missing)} of column_mapping not in {revenue_path}")
+
+    columns = {}
+    for source_column, mapped_column, _ in mapping_rows:
+        codes, categories = encoded[source_column]
+        if mapped_column == "month":
+            if any(value is None for value in categories):
+                raise ValueError(f"Column '{source_column}' has empty months")
+            months = np.array([_month_number(value) for value in categories], dtype=np.int64)
+            columns[mapped_column] = months[codes]
+        elif mapped_column == "revenue":
+            amounts = np.array([np.nan if value is None else float(value) for value in categories], dtype=np.float64)
+            columns[mapped_column] = amounts[codes]
+        else:
+            columns[mapped_column] = (codes, categories)
+    return columns
+
+
+############  Grouping helpers ##############
+
+def _group(*codes):
+    """
+    Group rows on several integer code arrays.
+
+    Returns:
+        tuple: (group id of each row, row index of each group's first row), ids numbered in code order
+    """
+    combined = np.zeros(len(codes[0]), dtype=np.int64)
+    radix = 1
+    for code in codes:
+        cardinality = int(code.max(initial=0)) + 1
+        if radix * cardinality >= 2 ** 62:
+            # Renumber the combination so far before the next column would overflow int64
+            _, combined = np.unique(combined, return_inverse=True)
+            combined = combined.reshape(-1)
+            radix = int(combined.max(initial=0)) + 1
+        combined = combined * cardinality + code
+        radix *= cardinality
+    _, first, ids = np.unique(combined, return_index=True, return_inverse=True)
+    return ids.reshape(-1), first
+
+
+def _group_sum(ids, values, size):
+    return np.bincount(ids, weights=values, minlength=size)
+
+
+def _group_min(ids, values, size, initial):
+    result = np.full(size, initial, dtype=values.dtype)
+    np.minimum.at(result, ids, values)
+    return result
+
+
+def _group_max(ids, values, size, initial):
+    result = np.full(size, initial, dtype=values.dtype)
+    np.maximum.at(result, ids, values)
+    return result
+
+
+def _hash_keys(columns, rows):
+    """MD5 of the concatenated, NULL-as-empty text of (codes, values) columns at rows, as generate_hash_key builds *_key"""
+    texts = [np.array(["" if value is None else str(value) for value in categories], dtype=object)[codes[rows]]
+             for codes, categories in columns]
+    keys = ["".join(parts) for parts in zip(*texts)] if texts else [""] * len(rows)
+    return np.array([hashlib.md5(text.encode("utf-8")).hexdigest() for text in keys], dtype=object)
+
+
+def _shift(values, group_position, offset, fill=0.0):
+    """LAG(values, offset) within each group of consecutive rows; offset may be an array"""
+    offset = np.broadcast_to(offset, values.shape)
+    has_lag = group_position >= offset
+    source = np.where(has_lag, np.arange(len(values)) - offset, 0)
+    return np.where(has_lag, values[source], fill)
+
+
+def _previous_match(group_ids, months, match):
+    """Latest month of an earlier row of the same group where match holds, NaN when none (rows sorted by group, month)"""
+    span = int(months.max(initial=0)) + 2
+    encoded = group_ids * span + np.where(match, months + 1, 0)
+    running = np.maximum.accumulate(encoded) if len(encoded) else encoded
+    previous = np.concatenate(([-1], running[:-1]))
+    same_group = previous >= group_ids * span
+    value = previous - group_ids * span - 1
+    return np.where(same_group & (value >= 0), value, np.nan)
+
+
+def _next_match(group_ids, months, match):
+    """Earliest month of a later row of the same group where match holds, NaN when none (rows sorted by group, month)"""
+    span = int(months.max(initial=0)) + 2
+    encoded = group_ids * span + np.where(match, months, span - 1)
+    running = np.minimum.accumulate(encoded[::-1])[::-1] if len(encoded) else encoded
+    following = np.concatenate((running[1:], [np.iinfo(np.int64).max]))
+    same_group = following < (group_ids + 1) * span
+    value = following - group_ids * span
+    return np.where(same_group & (value < span - 1), value, np.nan)
+
+
+############  Models ##############
+
+def compute(columns, mapping_rows, periods=PERIODS, ytd_year_start=4):
+    """
+    Compute the Snowball tables from revenue columns as read_revenue returns them.
+
+    Args:
+        columns (dict): Mapped column name -> array
+        mapping_rows (list): [source_column, mapped_column, dimension] rows of column_mapping.csv
+        periods (tuple): Period types to compute, as the periods var
+        ytd_year_start (int): First month of the financial year, as the ytd_year_start var
+
+    Returns:
+        dict: table name -> {column name: array} for dim_customer, dim_product, dim_other, monthly_revenue,
+        period_revenue, delta_revenue and rpt_revenue_bridge
+    """
+    periods = [period for period in PERIODS if period in periods]
+    if not periods:
+        raise ValueError(f"Select at least one of {', '.join(PERIODS)}")
+    mapped = list(dict.fromkeys(mapped_column for _, mapped_column, _ in mapping_rows))
+    for required in ("month", "revenue", "customer_level_1", "product_level_1"):
+        if required not in mapped:
+            raise ValueError(f"column_mapping has no '{required}' mapped column")
+    by_dimension = {dimension: [m for s, m, d in mapping_rows if d == dimension]
+                    for dimension in ("customer", "product", "other")}
+    dimension_columns = [column for column in mapped if column not in ("month", "revenue", "volume")]
+
+    # revenue.sql: drop NULL / zero revenue, then one row per dimension combination and month
+    keep = ~np.isnan(columns["revenue"]) & (columns["revenue"] != 0)
+    rows = {name: (columns[name][0][keep], columns[name][1]) for name in dimension_columns}
+    month_rows, revenue_rows = columns["month"][keep], columns["revenue"][keep]
+    type_codes, type_values = rows.get("revenue_type", (np.zeros(keep.sum(), dtype=np.int64), np.array([None])))
+    recurring_rows = np.isin(np.array(["" if value is None else str(value) for value in type_values], dtype=str),
+                             RECURRING_TYPES)[type_codes]
+
+    key_ids, key_first = _group(*(rows[name][0] for name in dimension_columns))
+    revenue_ids, revenue_first = _group(key_ids, month_rows)
+    revenue_count = len(revenue_first)
+    revenue_key = key_ids[revenue_first]
+    revenue_month = month_rows[revenue_first]
+    revenue_sum = _group_sum(revenue_ids, revenue_rows, revenue_count)
+    revenue_mrr = _group_sum(revenue_ids, np.where(recurring_rows, revenue_rows, 0.0), revenue_count)
+    revenue_volume = _group_sum(revenue_ids, np.ones(len(revenue_ids)), revenue_count)
+
+    tables = {}
+    dimension_ids = {}
+    for dimension in ("customer", "product", "other"):
+        dimension_rows = [rows[name] for name in by_dimension[dimension]]
+        if dimension_rows:
+            ids, first = _group(*(codes for codes, _ in dimension_rows))
+        else:
+            ids, first = np.zeros(len(key_ids), dtype=np.int64), np.zeros(min(1, len(key_ids)), dtype=np.int64)
+        dimension_ids[dimension] = ids
+        tables[f"dim_{dimension}"] = {
+            f"{dimension}_key": _hash_keys(dimension_rows, first),
+            **{name: values[codes[first]] for name, (codes, values) in zip(by_dimension[dimension], dimension_rows)},
+        }
+    level_ids, _ = _group(rows["customer_level_1"][0], rows["product_level_1"][0])
+    customer_keys = tables["dim_customer"]["customer_key"]
+    product_keys = tables["dim_product"]["product_key"]
+    other_keys = tables["dim_other"]["other_key"]
+
+    # Per revenue key: its dimension ids, type and hash
+    key_count = len(key_first)
+    key_customer = dimension_ids["customer"][key_first]
+    key_product = dimension_ids["product"][key_first]
+    key_other = dimension_ids["other"][key_first]
+    key_level = level_ids[key_first]
+    key_type_code = type_codes[key_first]
+    key_type = type_values[key_type_code]
+    key_recurring = recurring_rows[key_first]
+    key_hash = _hash_keys([rows[name] for name in dimension_columns], key_first)
+
+    # monthly_revenue: each key scaffolded from its first revenue month to 12 months after its last
+    fact = revenue_sum != 0
+    start = _group_min(revenue_key[fact], revenue_month[fact], key_count, np.iinfo(np.int64).max)
+    end = _group_max(revenue_key[fact], revenue_month[fact], key_count, -1)
+    scaffolded = end >= 0
+    length = np.where(scaffolded, end - start + 13, 0)
+    offset = np.concatenate(([0], np.cumsum(length)[:-1]))
+    monthly_key = np.repeat(np.arange(key_count), length)
+    position = np.arange(len(monthly_key)) - offset[monthly_key]
+    month_roll = start[monthly_key] + position
+
+    mrr = np.zeros(len(monthly_key))
+    volume = np.zeros(len(monthly_key))
+    target = offset[revenue_key[fact]] + revenue_month[fact] - start[revenue_key[fact]]
+    mrr[target] = revenue_mrr[fact]
+    volume[target] = revenue_volume[fact]
+
+    pair_ids, pair_first = _group(key_customer[monthly_key], key_product[monthly_key])
+    pair_count = len(pair_first)
+    churn_month = _group_max(pair_ids[mrr != 0], month_roll[mrr != 0], pair_count, -1)[pair_ids]
+    # SUM(mrr) over ROWS BETWEEN 11 PRECEDING AND CURRENT ROW: cumulative sum minus the one before the window
+    cumulative = np.cumsum(mrr)
+    window_first = np.arange(len(mrr)) - np.minimum(position, 11)
+    rolling_12 = cumulative - (cumulative - mrr)[window_first]
+    arr = np.where(key_recurring[monthly_key], mrr * 12,
+                   np.where(month_roll <= churn_month, rolling_12, 0.0))
+    ytd_helper = (month_roll - (ytd_year_start - 1)) % 12 + 1
+
+    tables["monthly_revenue"] = {
+        "monthly_revenue_key": key_hash[monthly_key],
+        "revenue_type": key_type[monthly_key],
+        "customer_key": customer_keys[key_customer[monthly_key]],
+        "product_key": product_keys[key_product[monthly_key]],
+        "other_key": other_keys[key_other[monthly_key]],
+        "month_roll": month_roll,
+        "mrr": mrr,
+        "volume": volume,
+        "ytd_helper": ytd_helper,
+        "arr": arr,
+    }
+
+    # period_revenue: lags by index shifts within each key, deltas summed per customer, product, month and type
+    lags = {period: _shift(arr, position, ytd_helper if period == "ytd" else LAG_MONTHS[period])
+            for period in periods}
+    deltas = {period: arr - lags[period] for period in periods}
+    delta_ids, delta_first = _group(key_customer[monthly_key], key_product[monthly_key], month_roll,
+                                    key_type_code[monthly_key])
+    # A NULL revenue_type never matches in the join back, so its rows get no summed delta
+    null_type = np.array([value is None for value in key_type], dtype=bool)[monthly_key]
+    sum_deltas = {}
+    for period in periods:
+        sums = _group_sum(delta_ids, deltas[period], len(delta_first))[delta_ids]
+        sum_deltas[period] = np.where(null_type, np.nan, sums)
+
+    tables["period_revenue"] = {
+        "period_revenue_key": key_hash[monthly_key],
+        "customer_key": customer_keys[key_customer[monthly_key]],
+        "product_key": product_keys[key_product[monthly_key]],
+        "other_key": other_keys[key_other[monthly_key]],
+        "month_roll": month_roll,
+        "mrr": mrr,
+        "arr": arr,
+        "volume": volume,
+        **{f"arr_{period}": lags[period] for period in periods},
+        **{f"arr_{period}_delta": deltas[period] for period in periods},
+        **{f"sum_arr_{period}_delta": sum_deltas[period] for period in periods},
+    }
+
+    # customer_contract / customer_product_contract, from the revenue rows with MRR; the product churn month is
+    # taken per customer_level_1 and product_level_1, as in customer_product_contract
+    contract = revenue_mrr != 0
+    contract_customer = key_customer[revenue_key[contract]]
+    contract_month = revenue_month[contract]
+    unset = np.iinfo(np.int64).max
+    customer_join = _group_min(contract_customer, contract_month, len(customer_keys), unset)
+    customer_churn = _group_max(contract_customer, contract_month, len(customer_keys), -1) + 1
+    contract_pair = key_customer[revenue_key[contract]] * len(product_keys) + key_product[revenue_key[contract]]
+    row_pair = key_customer * len(product_keys) + key_product
+    pair_codes, pair_inverse = np.unique(np.concatenate((contract_pair, row_pair)), return_inverse=True)
+    pair_inverse = pair_inverse.reshape(-1)
+    product_start = _group_min(pair_inverse[:len(contract_pair)], contract_month, len(pair_codes), unset)
+    product_churn_level = _group_max(key_level[revenue_key[contract]], contract_month,
+                                     int(key_level.max(initial=0)) + 1, -1) + 1
+
+    # The lifecycle models inner-join those contracts, so keys whose customer or pair never had MRR drop out here
+    key_pair = pair_inverse[len(contract_pair):]
+    key_live = (customer_churn[key_customer] > 0) & (product_start[key_pair] != unset)
+    live = key_live[monthly_key] & scaffolded[monthly_key]
+    lifecycle_key = monthly_key[live]
+    customer = key_customer[lifecycle_key]
+    month = month_roll[live]
+    row_arr = arr[live]
+    row_lags = {period: lags[period][live] for period in periods}
+    row_deltas = {period: deltas[period][live] for period in periods}
+    row_sums = {period: sum_deltas[period][live] for period in periods}
+    row_ytd = ytd_helper[live]
+    join_month = customer_join[customer]
+    churn = customer_churn[customer]
+    product_start_month = product_start[key_pair[lifecycle_key]]
+    product_churn_month = product_churn_level[key_level[lifecycle_key]]
+    period_months = {"l3m": 3, "ltm": 12, "ytd": row_ytd}
+
+    customer_new, customer_churn_flag, customer_existing = {}, {}, {}
+    product_existing, product_churn_flag = {}, {}
+    cross_sell_raw, upsell_raw, downsell_raw = {}, {}, {}
+    lm_customer_new = month == join_month
+    for period in periods:
+        if period == "lm":
+            customer_new[period] = lm_customer_new
+            customer_churn_flag[period] = churn == month
+            customer_existing[period] = (month > join_month) & (month < churn)
+            product_existing[period] = customer_existing[period] & (month > product_start_month) & \
+                (month < product_churn_month)
+            product_churn_flag[period] = customer_existing[period] & (month == product_churn_month)
+            cross_sell_raw[period] = customer_existing[period] & (product_start_month == month)
+        else:
+            span = period_months[period]
+            customer_new[period] = month - join_month < span
+            customer_churn_flag[period] = (month - churn < span) & (month - churn >= 0)
+            customer_existing[period] = (month - join_month >= span) & (month < churn)
+            product_existing[period] = customer_existing[period] & (month - product_start_month >= span) & \
+                (month < product_churn_month)
+            product_churn_flag[period] = customer_existing[period] & (month - product_churn_month < span) & \
+                (month - product_churn_month >= 0)
+            cross_sell_raw[period] = customer_existing[period] & ~product_existing[period]
+        upsell_raw[period] = (row_sums[period] > 0) & product_existing[period]
+        downsell_raw[period] = (row_sums[period] < 0) & product_existing[period]
+
+    # Customer months: ARR totals and the previous / next month with ARR of each customer
+    customer_month_ids, customer_month_first = _group(customer, month)
+    customer_month_count = len(customer_month_first)
+    cm_customer = customer[customer_month_first]
+    cm_month = month[customer_month_first]
+    arr_total = _group_sum(customer_month_ids, row_arr, customer_month_count)
+    has_arr = _group_max(customer_month_ids, (row_arr != 0).astype(np.int8), customer_month_count, 0) == 1
+    previous_nonzero = {"lm": _previous_match(cm_customer, cm_month, has_arr)}
+    has_existing = _group_max(customer_month_ids, (~lm_customer_new).astype(np.int8), customer_month_count, 0) == 1
+    next_nonzero = {"lm": np.where(has_existing, _next_match(cm_customer, cm_month, has_arr), np.nan)}
+    lag_totals = {}
+    for period in periods:
+        if period == "lm":
+            continue
+        lag_totals[period] = _group_sum(customer_month_ids, row_lags[period], customer_month_count)[customer_month_ids]
+        has_lag = _group_max(customer_month_ids, (row_lags[period] != 0).astype(np.int8), customer_month_count, 0) == 1
+        has_existing = _group_max(customer_month_ids, (~customer_new[period]).astype(np.int8),
+                                  customer_month_count, 0) == 1
+        previous_nonzero[period] = _previous_match(cm_customer, cm_month, has_lag)
+        next_nonzero[period] = np.where(has_existing, _next_match(cm_customer, cm_month, has_lag), np.nan)
+
+    total = arr_total[customer_month_ids]
+    previous = previous_nonzero["lm"][customer_month_ids]
+    following = next_nonzero["lm"][customer_month_ids]
+    deactivation = (total == 0) & (following - previous - 2 == 1)
+    reactivation = (total != 0) & (month - previous - 2 == 1)
+    intermittent_churn = (total == 0) & (following - previous - 1 > 3)
+    winback = (total != 0) & (month - previous - 1 > 3)
+    period_winback, period_reactivation = {"lm": winback}, {"lm": reactivation}
+    for period in lag_totals:
+        previous = previous_nonzero[period][customer_month_ids]
+        following = next_nonzero[period][customer_month_ids]
+        lapsed = (total != 0) & (lag_totals[period] == 0)
+        period_winback[period] = lapsed & (following - previous - 1 > 3)
+        period_reactivation[period] = lapsed & (following - previous - 2 == 1)
+
+    # delta_revenue and rpt_revenue_bridge
+    clean = {period: ~period_winback[period] & ~deactivation & ~period_reactivation[period] & ~intermittent_churn
+             for period in periods}
+    zero = np.zeros(len(month))
+    delta = {
+        "delta_revenue_key": key_hash[lifecycle_key],
+        "month_roll": month,
+        "customer_key": customer_keys[customer],
+        "product_key": product_keys[key_product[lifecycle_key]],
+        "other_key": other_keys[key_other[lifecycle_key]],
+    }
+    for period in periods:
+        lag = row_lags[period]
+        delta[f"{period}_delta_customer_new"] = np.where(customer_new[period], row_arr, zero)
+        delta[f"{period}_delta_customer_churn"] = np.where(customer_churn_flag[period], -lag, zero)
+        delta[f"{period}_deactivation"] = np.where(deactivation, -lag, zero)
+        delta[f"{period}_reactivation"] = np.where(period_reactivation[period], row_arr, zero)
+        delta[f"{period}_intermittent_churn"] = np.where(intermittent_churn, -lag, zero)
+        delta[f"{period}_winback"] = np.where(period_winback[period], row_arr, zero)
+        delta[f"{period}_delta_cross_sell"] = np.where(clean[period] & cross_sell_raw[period], row_arr, zero)
+        delta[f"{period}_delta_downgrade"] = np.where(~deactivation & ~intermittent_churn & product_churn_flag[period],
+                                                      -lag, zero)
+        delta[f"{period}_delta_upsell"] = np.where(clean[period] & upsell_raw[period], row_deltas[period], zero)
+        delta[f"{period}_delta_downsell"] = np.where(clean[period] & downsell_raw[period], row_deltas[period], zero)
+    tables["delta_revenue"] = delta
+
+    bridge = {name: [] for name in ("snowball_key", "customer_key", "product_key", "other_key", "month_roll",
+                                    "period_type", "bop_arr", "customer_churn", "product_churn", "downsell", "grr",
+                                    "upsell", "cross_sell", "nrr", "new_customer", "eop_arr", "volume")}
+    for period in periods:
+        bop = row_lags[period]
+        customer_churn_delta = delta[f"{period}_delta_customer_churn"]
+        product_churn_delta = delta[f"{period}_delta_downgrade"]
+        downsell = delta[f"{period}_delta_downsell"]
+        upsell = delta[f"{period}_delta_upsell"]
+        cross_sell = delta[f"{period}_delta_cross_sell"]
+        grr = bop + customer_churn_delta + product_churn_delta + downsell
+        for name, values in (("snowball_key", delta["delta_revenue_key"]), ("customer_key", delta["customer_key"]),
+                             ("product_key", delta["product_key"]), ("other_key", delta["other_key"]),
+                             ("month_roll", month), ("period_type", np.full(len(month), period, dtype=object)),
+                             ("bop_arr", bop), ("customer_churn", customer_churn_delta),
+                             ("product_churn", product_churn_delta), ("downsell", downsell), ("grr", grr),
+                             ("upsell", upsell), ("cross_sell", cross_sell), ("nrr", grr + upsell + cross_sell),
+                             ("new_customer", delta[f"{period}_delta_customer_new"]), ("eop_arr", row_arr),
+                             ("volume", volume[live])):
+            bridge[name].append(values)
+    tables["rpt_revenue_bridge"] = {name: np.concatenate(values) for name, values in bridge.items()}
+    return tables
+
+
+############  Output ##############
+
+def _month_dates(month_roll):
+    """datetime64[D] first days of month numbers"""
+    return (month_roll - 1970 * 12).astype("datetime64[M]").astype("datetime64[D]")
+
+
+def _csv_quote(value):
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _csv_column(column, array):
+    """Text of a column chunk; NULL and NaN (a missing summed delta) are written as empty fields"""
+    if column == "month_roll":
+        return np.datetime_as_string(_month_dates(array)).tolist()
+    if array.dtype.kind == "f":
+        # Each distinct amount is formatted once: most delta and bridge amounts are 0. Adding 0.0 turns -0.0 into 0.0,
+        # which np.unique counts as equal, so the text of a zero does not depend on which sign came first in the chunk
+        values, inverse = np.unique(array + 0.0, return_inverse=True)
+        return np.where(np.isnan(values), "", values.astype(str)).astype(object)[inverse.reshape(-1)].tolist()
+    if array.dtype != object:
+        return array.astype(str).tolist()
+    text = ["" if value is None else str(value) for value in array.tolist()]
+    return [_csv_quote(value) if _CSV_SPECIAL.search(value) else value for value in text]
+
+
+def _arrow_table(table, start, stop):
+    arrays = {}
+    for column, array in table.items():
+        chunk = array[start:stop]
+        if column == "month_roll":
+            arrays[column] = pyarrow.array(_month_dates(chunk))
+        elif chunk.dtype.kind == "f":
+            arrays[column] = pyarrow.array(chunk, mask=np.isnan(chunk))
+        elif chunk.dtype == object:
+            # Typed as text, so an all-NULL first chunk does not fix the schema to the null type
+            arrays[column] = pyarrow.array([None if value is None else str(value) for value in chunk.tolist()],
+                                           type=pyarrow.string())
+        else:
+            arrays[column] = pyarrow.array(chunk)
+    return pyarrow.table(arrays)
+
+
+class _CsvTableWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.file.write(",".join(columns) + "\n")
+
+    def write(self, table, start, stop):
+        # Fields are formatted and quoted a column at a time, then joined: several times faster than csv.writer
+        values = [_csv_column(column, array[start:stop]) for column, array in table.items()]
+        self.file.writelines(",".join(fields) + "\n" for fields in zip(*values))
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetTableWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, table, start, stop):
+        chunk = _arrow_table(table, start, stop)
+        self.writer = self.writer or pyarrow.parquet.ParquetWriter(self.path, chunk.schema)
+        self.writer.write_table(chunk)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _open_writer(path, columns, file_format):
+    if file_format == "parquet":
+        if pyarrow is None:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow, or write CSV")
+        return _ParquetTableWriter(path)
+    return _CsvTableWriter(path, columns)
+
+
+def _write_rows(writer, table, chunk_rows):
+    """Append a table chunk_rows rows at a time; an empty table still gets one empty write, which fixes the Parquet schema"""
+    row_count = len(next(iter(table.values())))
+    for chunk_start in range(0, max(row_count, 1), chunk_rows):
+        writer.write(table, chunk_start, chunk_start + chunk_rows)
+    return row_count
+
+
+def write_tables(tables, out_dir, file_format="csv", chunk_rows=100_000):
+    """
+    Write each table to <out_dir>/<table>.csv or .parquet, months as dates, chunk_rows rows at a time.
+
+    Args:
+        tables (dict): table name -> {column name: array}, as compute returns them
+        out_dir (str): Output directory
+        file_format (str): "csv" or "parquet" (needs pyarrow, one row group per chunk)
+        chunk_rows (int): Rows formatted per write
+
+    Returns:
+        dict: table name -> number of rows written
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for name, table in tables.items():
+        writer = _open_writer(os.path.join(out_dir, f"{name}.{file_format}"), list(table), file_format)
+        try:
+            written[name] = _write_rows(writer, table, chunk_rows)
+        finally:
+            writer.close()
+    return written
+
+
+############  Partitioned runs ##############
+
+def _partition_of(value, partitions):
+    """Stable partition number of a customer_level_1 value, the same on every run and platform"""
+    return zlib.crc32(("" if value is None else str(value)).encode("utf-8")) % partitions
+
+
+def _estimate_rows(revenue_path):
+    """Row count of a Parquet extract from its metadata, of a CSV from its size and its first lines"""
+    if revenue_path.lower().endswith(".parquet"):
+        return pyarrow.parquet.ParquetFile(revenue_path).metadata.num_rows
+    with open(revenue_path, "rb") as file:
+        sample = list(itertools.islice(file, 10_000))
+    mean_bytes = sum(map(len, sample[1:])) / max(len(sample) - 1, 1)
+    return int(os.path.getsize(revenue_path) / max(mean_bytes, 1))
+
+
+def _split_arrow(batches, level_column, partitions, work_dir):
+    """Write record batches to one Parquet file per partition; returns the partition files"""
+    writers, paths = {}, {}
+    try:
+        for batch in batches:
+            encoded = batch.column(level_column).dictionary_encode()
+            targets = np.array([_partition_of(value, partitions) for value in encoded.dictionary.to_pylist()] + [
+                _partition_of(None, partitions)], dtype=np.int64)
+            indices = encoded.indices.fill_null(len(targets) - 1).to_numpy()
+            partition = targets[indices]
+            order = np.argsort(partition, kind="stable")
+            bounds = np.concatenate(([0], np.cumsum(np.bincount(partition, minlength=partitions))))
+            ordered = batch.take(pyarrow.array(order))
+            for number in np.flatnonzero(np.diff(bounds)):
+                part = ordered.slice(bounds[number], bounds[number + 1] - bounds[number])
+                if number not in writers:
+                    paths[number] = os.path.join(work_dir, f"partition_{number:04d}.parquet")
+                    writers[number] = pyarrow.parquet.ParquetWriter(paths[number], part.schema)
+                writers[number].write_batch(part)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return [path for _, path in sorted(paths.items())]
+
+
+def _split_csv(revenue_path, needed, level_column, partitions, work_dir, chunk_rows=200_000):
+    """Write the needed columns of a CSV to one CSV per partition, with the standard library only"""
+    files, writers, targets = {}, {}, {}
+    try:
+        with open(revenue_path, "r", newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            positions = [header.index(name) for name in needed]
+            level = header.index(level_column)
+            while True:
+                records = list(itertools.islice(reader, chunk_rows))
+                if not records:
+                    break
+                for record in records:
+                    value = record[level]
+                    number = targets.get(value)
+                    if number is None:
+                        number = targets[value] = _partition_of(value or None, partitions)
+                    if number not in writers:
+                        files[number] = open(os.path.join(work_dir, f"partition_{number:04d}.csv"), "w", newline="",
+                                             encoding="utf-8")
+                        writers[number] = csv.writer(files[number])
+                        writers[number].writerow(needed)
+                    writers[number].writerow([record[position] for position in positions])
+    finally:
+        for partition_file in files.values():
+            partition_file.close()
+    return [partition_file.name for _, partition_file in sorted(files.items())]
+
+
+def split_revenue(revenue_path, mapping_rows, partitions, work_dir, batch_rows=200_000):
+    """
+    Stream a revenue extract into partition files on a hash of customer_level_1, batch_rows rows at a time.
+
+    All rows of a customer_level_1 land in one partition, so every window of the models, per revenue key, customer
+    or customer_level_1 / product_level_1, stays within a partition. Partitions are Parquet files with pyarrow,
+    CSV without; either reads back with read_revenue.
+
+    Returns:
+        list: Paths of the non-empty partitions
+    """
+    needed = list(dict.fromkeys(source_column for source_column, _, _ in mapping_rows))
+    level_column = next((source_column for source_column, mapped_column, _ in mapping_rows
+                         if mapped_column == "customer_level_1"), None)
+    if level_column is None:
+        raise ValueError("column_mapping has no 'customer_level_1' mapped column")
+    is_parquet = revenue_path.lower().endswith(".parquet")
+    if is_parquet and pyarrow is None:
+        raise ImportError("Parquet extracts need pyarrow: pip install pyarrow, or use a .csv extract")
+
+    if is_parquet:
+        header = pyarrow.parquet.read_schema(revenue_path).names
+    else:
+        with open(revenue_path, "r", newline="", encoding="utf-8-sig") as file:
+            header = next(csv.reader(file))
+    missing = [name for name in needed if name not in header]
+    if missing:
+        raise ValueError(f"Column(s) {', '.join(missing)} of column_mapping not in {revenue_path}")
+
+    os.makedirs(work_dir, exist_ok=True)
+    if is_parquet:
+        batches = pyarrow.parquet.ParquetFile(revenue_path).iter_batches(batch_size=batch_rows, columns=needed)
+    elif pyarrow is not None:
+        # Every column as text, empty fields as NULL, the way read_revenue reads the whole file; blocks of about
+        # batch_rows rows, so the partitions do not get a row group per default 1 MB block
+        row_bytes = os.path.getsize(revenue_path) / max(_estimate_rows(revenue_path), 1)
+        block_size = max(1 << 20, int(row_bytes * batch_rows))
+        batches = pyarrow.csv.open_csv(revenue_path, read_options=pyarrow.csv.ReadOptions(block_size=block_size),
+                                       convert_options=pyarrow.csv.ConvertOptions(
+            column_types={name: pyarrow.string() for name in header}, include_columns=needed,
+            strings_can_be_null=True, null_values=[""]))
+    else:
+        return _split_csv(revenue_path, needed, level_column, partitions, work_dir, batch_rows)
+    return _split_arrow(batches, level_column, partitions, work_dir)
+
+
+def run_partitioned(revenue_path, mapping_rows, out_dir, file_format="csv", periods=PERIODS, ytd_year_start=4,
+                    partitions=None, chunk_rows=100_000):
+    """
+    Out-of-core run: split the extract by customer, compute each partition on its own and append the results.
+
+    Peak memory is that of the largest partition, not of the whole extract. The dim_product and dim_other rows
+    repeated across partitions are written once; dim_customer rows are not repeated, as the split keeps each customer
+    in one partition.
+
+    Args:
+        partitions (int): Number of partitions; None picks one per PARTITION_ROWS estimated revenue rows, up to
+            MAX_PARTITIONS
+
+    Returns:
+        dict: table name -> number of rows written
+    """
+    if partitions is None:
+        partitions = min(MAX_PARTITIONS, max(1, -(-_estimate_rows(revenue_path) // PARTITION_ROWS)))
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+
+    os.makedirs(out_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="snowball_partitions_", dir=out_dir)
+    writers, written, seen_keys = {}, {}, {}
+    try:
+        for partition_path in split_revenue(revenue_path, mapping_rows, partitions, work_dir):
+            tables = compute(read_revenue(partition_path, mapping_rows), mapping_rows, periods, ytd_year_start)
+            os.remove(partition_path)
+            for name, table in tables.items():
+                if name in ("dim_product", "dim_other"):
+                    # Keep the first row of each key: products and other dimensions recur in every partition. Customers
+                    # do not, and are not tracked, as there can be as many of them as revenue rows
+                    key = table[f"{name[4:]}_key"]
+                    seen = seen_keys.setdefault(name, set())
+                    new = np.array([value not in seen for value in key.tolist()], dtype=bool)
+                    seen.update(key[new].tolist())
+                    table = {column: array[new] for column, array in table.items()}
+                if name not in writers:
+                    writers[name] = _open_writer(os.path.join(out_dir, f"{name}.{file_format}"), list(table),
+                                                 file_format)
+                written[name] = written.get(name, 0) + _write_rows(writers[name], table, chunk_rows)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return written
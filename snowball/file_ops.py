@@ -10,6 +10,7 @@ import time
 from pathlib import Path
 from tqdm import tqdm
 from config import *
+from template_sync import sync_template
 
 
 class FileOperations:
@@ -30,25 +31,13 @@ class FileOperations:
 
     def clone_repo(self, source_path: str) -> str:
         """
-        Clone the Git repository from source path.
+        Sync the template from source path, copying only changed files so dbt's
+        partial-parse state and installed packages are kept.
         """
         repo_name = os.path.basename(source_path)
-        downloads_dir = Path.home() / "Downloads"
-        temp_clone_location = downloads_dir / f"{repo_name}_temp"
-        final_clone_location = downloads_dir / repo_name
-
-        # Remove existing target folder if present
-        if final_clone_location.exists():
-            shutil.rmtree(final_clone_location, onerror=self.remove_readonly_files)
-        if temp_clone_location.exists():
-            shutil.rmtree(temp_clone_location, onerror=self.remove_readonly_files)
-
-        # Copy all files to a temporary folder first
-        shutil.copytree(source_path, temp_clone_location, dirs_exist_ok=True)
-        temp_clone_location.rename(final_clone_location)
+        final_clone_location = Path.home() / "Downloads" / repo_name
 
-        current_time = time.time()
-        os.utime(final_clone_location, (current_time, current_time))
+        sync_template(source_path, final_clone_location)
 
         # Return the mapping file path
         return str(final_clone_location / "seeds" / "column_mapping.csv")
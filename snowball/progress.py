@@ -0,0 +1,101 @@
+"""
+progress.py
+
+Progress bars driven by dbt's structured events.
+
+dbtRunner hands every event it fires to the callbacks it was created with. DbtProgress is such a
+callback: the bar only moves when dbt reports real work (a node starting or finishing, a seed being
+loaded, an adapter connection being opened), so it never adds wall-clock time of its own.
+"""
+import shutil
+import threading
+from tqdm import tqdm
+
+# Milestones map a dbt event name to the percentage reached and the description shown once it fires.
+DEPS_MILESTONES = {
+    "DepsLockUpdating": (20, "📖 Reading packages.yml"),
+    "DepsStartPackageInstall": (50, "📥 Downloading packages"),
+    "DepsInstallInfo": (90, "📦 Installing packages"),
+}
+
+DEBUG_MILESTONES = {
+    "DebugCmdOut": (20, "📁 Loading profiles"),
+    "NewConnection": (40, "🔌 Testing connection"),
+    "NewConnectionOpening": (70, "📡 Connecting to database"),
+    "SQLQuery": (85, "✅ Verifying permissions"),
+    "DebugCmdResult": (95, "🎯 Final validation"),
+}
+
+OPERATION_MILESTONES = {
+    "JinjaLogInfo": (20, "🔧 Initializing macro"),
+    "NewConnectionOpening": (40, "🗄️ Setting up database"),
+    "SQLQuery": (60, "🔄 Creating temporary structures"),
+    "SQLQueryStatus": (90, "📋 Configuring environment"),
+}
+
+
+class DbtProgress:
+    """
+    tqdm bar fed by dbt events, passed to ``dbtRunner(callbacks=[...])``.
+
+    Without milestones the bar counts nodes: the total comes from dbt's own node count and the bar
+    advances once per finished node. With milestones it jumps to the percentage mapped to each event.
+    Setting ``DbtProgress.enabled = False`` turns every bar off, for headless runs.
+    """
+    enabled = True
+
+    def __init__(self, desc, done_desc, failed_desc, milestones=None, total=None, label="🔄 Running"):
+        bar_width = shutil.get_terminal_size().columns // 4
+        self.milestones = milestones
+        self.done_desc = done_desc
+        self.failed_desc = failed_desc
+        self.label = label
+        self._lock = threading.Lock()
+
+        if milestones is None:
+            bar_format = '{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}| {n_fmt}/{total_fmt} models'
+            self.pbar = tqdm(total=total or 1, desc=desc, colour="green", bar_format=bar_format,
+                             disable=not self.enabled)
+        else:
+            bar_format = '{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|'
+            self.pbar = tqdm(total=100, desc=desc, colour="green", bar_format=bar_format,
+                             disable=not self.enabled)
+
+    def __call__(self, event):
+        name = event.info.name
+        with self._lock:
+            if self.milestones is not None:
+                self._reach_milestone(name)
+            elif name == "ConcurrencyLine":
+                self.pbar.total = max(event.data.node_count, 1)
+                self.pbar.refresh()
+            elif name == "NodeStart":
+                self.pbar.set_description(f"{self.label}: {event.data.node_info.node_name}")
+            elif name == "LogSeedResult":
+                self.pbar.set_description(f"💾 Loaded: {event.data.node_info.node_name}")
+            elif name == "NodeFinished":
+                if self.pbar.n >= self.pbar.total:
+                    self.pbar.total = self.pbar.n + 1
+                self.pbar.update(1)
+
+    def _reach_milestone(self, name):
+        if name not in self.milestones:
+            return
+        percent, desc = self.milestones[name]
+        if percent > self.pbar.n:
+            self.pbar.update(percent - self.pbar.n)
+            self.pbar.set_description(desc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.pbar.close()
+        return False
+
+    def finish(self, success):
+        """Fill the bar on success and show the final status."""
+        with self._lock:
+            if success and self.pbar.n < self.pbar.total:
+                self.pbar.update(self.pbar.total - self.pbar.n)
+            self.pbar.set_description(self.done_desc if success else self.failed_desc)
@@ -7,29 +7,43 @@
 """ Import necessary libraries """
 import os
 import re
+import importlib.util
 import sys
 import json
 import zipfile
 import shutil
-import subprocess
-import msvcrt
+import argparse
+import yaml
 import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from . import config
 from .config import *
 from git import Repo
 from pathlib import Path
 from datetime import datetime
-from dbt.cli.main import dbtRunner
 import nbformat as nbf
 from nbformat.v4 import new_notebook, new_markdown_cell, new_code_cell
 from tqdm import tqdm
-import threading
-from contextlib import redirect_stdout, redirect_stderr
-from io import StringIO
+from .progress import DbtProgress, DEPS_MILESTONES, DEBUG_MILESTONES, OPERATION_MILESTONES
+from .dbt_session import DbtSession
+from .sql_formatter import format_sql_files, CACHE_DIR as SQLFLUFF_CACHE_DIR
+from . import synth
+from . import bench
+from . import engine
+from .template_sync import STAMP_FILE, sync_template, packages_installed, mark_packages_installed
+
+try:
+    import msvcrt
+except ImportError:
+    # Not on Windows: interactive prompts fall back to input()
+    msvcrt = None
 
 compiled_dir  = os.path.join(project_dir, "target", "compiled")
 dbt_seed_dir  = os.path.join(project_dir, "seeds")
 profiles_dir  = str(Path.home() / "Downloads/snowball_dbt")
 notebooks_dir = os.path.join(output_dir, "notebooks")
+# Shared by every dbt step so the project is parsed once per run
+dbt_session   = DbtSession(project_dir)
 
 term_width = shutil.get_terminal_size().columns
 bar_width = term_width // 4
@@ -77,6 +91,10 @@ def rotating_slash_after(text, duration_sec=5, passed=1):
     sys.stdout.flush()
 
 def blinking_dots_input(base_text="Press Enter to continue"):
+    if msvcrt is None:
+        input(base_text)
+        return
+
     dots = ['', '.', '..', '...']
     i = 0
     print(base_text, end='', flush=True)
@@ -158,174 +176,56 @@ def get_dbt_models_count():
             model_count += len([f for f in files if f.endswith('.sql')])
     return max(model_count, 1)  # At least 1 to avoid division by zero
 
-def run_dbt_deps(dbname, schemaname, tablename):
-    """Run dbt deps to install dependencies with realistic progress tracking"""
+def build_vars_string(dbname, schemaname, tablename, offline=None):
+    """Build the --vars JSON passed to every dbt command; offline defaults to the column_resolution setting"""
     vars_dict = {
         'my_database': dbname,
         'my_schema': schemaname,
         'my_table': tablename
     }
-    vars_str = json.dumps(vars_dict)
+    if offline is None:
+        offline = column_resolution == "offline"
+    if offline:
+        vars_dict['column_mapping'] = load_column_mapping(mapping_file)
+    return json.dumps(vars_dict)
+
+def run_dbt_deps(dbname, schemaname, tablename):
+    """Run dbt deps to install dependencies, tracking progress from dbt's package events"""
+    vars_str = build_vars_string(dbname, schemaname, tablename)
     deps_args = [
         "deps",
         "--project-dir", project_dir,
         "--profiles-dir", profiles_dir,
         "--vars", vars_str
     ]
-    
-    with tqdm(
-        total=100,
-        desc="Installing dependencies",
-        colour="green",
-        bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|'
-    ) as pbar:
-        
-        # Phase 1: Initial setup and package discovery
-        pbar.update(15)
-        pbar.set_description("🔍 Discovering packages")
-        time.sleep(0.5)
-        
-        # Phase 2: Reading dependencies file
-        pbar.update(15)
-        pbar.set_description("📖 Reading packages.yml")
-        time.sleep(0.5)
-        
-        # Phase 3: Downloading packages
-        pbar.update(20)
-        pbar.set_description("📥 Downloading packages")
-        
-        # Actually run dbt deps
-        dbt = dbtRunner()
-        stdout_capture = StringIO()
-        stderr_capture = StringIO()
-        
-        start_time = time.time()
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            result = dbt.invoke(deps_args)
-        execution_time = time.time() - start_time
-        
-        # Update progress based on actual execution time
-        current_progress = 50
-        
-        if execution_time < 1:
-            # Very fast installation
-            pbar.update(50)
-            pbar.set_description("✅ Dependencies installed")
-        else:
-            # Simulate progressive installation steps
-            installation_steps = [
-                ("🔗 Resolving dependencies", 15),
-                ("📦 Installing packages", 20),
-                ("✅ Verifying installations", 15)
-            ]
-            
-            step_time = execution_time / len(installation_steps)
-            
-            for step_desc, step_progress in installation_steps:
-                pbar.set_description(step_desc)
-                time.sleep(step_time * 0.7)  # Use 70% of step time for visual feedback
-                current_progress += step_progress
-                pbar.update(step_progress)
-        
-        # Ensure we reach 100%
-        if pbar.n < 100:
-            pbar.update(100 - pbar.n)
-        
-        if result.success:
-            pbar.set_description("✅ Dependencies installed")
-        else:
-            pbar.set_description("❌ Dependencies failed")
-    
+
+    with DbtProgress("🔍 Discovering packages", "✅ Dependencies installed", "❌ Dependencies failed",
+                     milestones=DEPS_MILESTONES) as progress:
+        result = dbt_session.invoke(deps_args, progress)
+        progress.finish(result.success)
+
     return result
 
 def run_dbt_seed(dbname, schemaname, tablename):
-    """Run dbt seed to update the user mapping file with realistic progress tracking"""
-    vars_dict = {
-        'my_database': dbname,
-        'my_schema': schemaname,
-        'my_table': tablename
-    }
-    vars_str = json.dumps(vars_dict)
+    """Run dbt seed to update the user mapping file, tracking progress from dbt's seed events"""
+    vars_str = build_vars_string(dbname, schemaname, tablename)
     seed_args = [
         "seed",
         "--project-dir", project_dir,
         "--profiles-dir", profiles_dir,
         "--vars", vars_str
     ]
-    
-    with tqdm(
-        total=100,
-        desc="Updating mapping file",
-        colour="green",
-        bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|'
-    ) as pbar:
-        
-        # Phase 1: Initial setup
-        pbar.update(10)
-        pbar.set_description("🔧 Initializing seed")
-        time.sleep(0.3)
-        
-        # Phase 2: Reading seed file
-        pbar.update(20)
-        pbar.set_description("📄 Reading mapping file")
-        time.sleep(0.3)
-        
-        # Phase 3: Database preparation
-        pbar.update(15)
-        pbar.set_description("🗃️ Preparing file to load in database")
-        
-        # Actually run dbt seed
-        dbt = dbtRunner()
-        stdout_capture = StringIO()
-        stderr_capture = StringIO()
-        
-        start_time = time.time()
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            result = dbt.invoke(seed_args)
-        execution_time = time.time() - start_time
-        
-        # Update progress based on actual execution time
-        current_progress = 45
-        
-        if execution_time < 1:
-            # Very fast seed operation
-            pbar.update(55)
-            pbar.set_description("✅ Updated mapping file")
-        else:
-            # Simulate progressive seed steps
-            seed_steps = [
-                ("💾 Loading data", 25),
-                ("✅ Creating table", 20),
-                ("🎯 Finalizing", 10)
-            ]
-            
-            step_time = execution_time / len(seed_steps)
-            
-            for step_desc, step_progress in seed_steps:
-                pbar.set_description(step_desc)
-                time.sleep(step_time * 0.7)
-                current_progress += step_progress
-                pbar.update(step_progress)
-        
-        # Ensure we reach 100%
-        if pbar.n < 100:
-            pbar.update(100 - pbar.n)
-        
-        if result.success:
-            pbar.set_description("✅ Updated mapping file")
-        else:
-            pbar.set_description("❌ Failed to update mapping file")
+
+    with DbtProgress("Updating mapping file", "✅ Updated mapping file", "❌ Failed to update mapping file",
+                     label="💾 Loading") as progress:
+        result = dbt_session.invoke(seed_args, progress)
+        progress.finish(result.success)
 
     return result
 
 def connection_check(dbname, schemaname, tablename):
-    """Run dbt debug to check connection with actual progress tracking"""
-    vars_dict = {
-        'my_database': dbname,
-        'my_schema': schemaname,
-        'my_table': tablename
-    }
-    vars_str = json.dumps(vars_dict)
+    """Run dbt debug to check connection, tracking progress from dbt's connection events"""
+    vars_str = build_vars_string(dbname, schemaname, tablename)
     debug_args = [
         "debug",
         "--project-dir", project_dir,
@@ -333,69 +233,10 @@ def connection_check(dbname, schemaname, tablename):
         "--vars", vars_str
     ]
 
-    dbt = dbtRunner()
-    stdout_capture = StringIO()
-    stderr_capture = StringIO()
-
-    with tqdm(
-        total=100,
-        desc="Establishing Connection",
-        colour="green",
-        bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|'
-    ) as pbar:
-        
-        # Phase 1: Initial setup (10%)
-        pbar.update(10)
-        pbar.set_description("🔧 Initializing dbt")
-        time.sleep(0.5)
-        
-        # Phase 2: Profile loading (20%)
-        pbar.update(10)
-        pbar.set_description("📁 Loading profiles")
-        time.sleep(0.5)
-        
-        # Phase 3: Connection testing (30%)
-        pbar.update(10)
-        pbar.set_description("🔌 Testing connection")
-        
-        # Actually run the debug command and capture real-time progress
-        start_time = time.time()
-        # print(vars_dict)
-        # print(f"[DEBUG] Running dbt debug with args: {debug_args}")
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            result = dbt.invoke(debug_args)
-        execution_time = time.time() - start_time
-        
-        # Based on actual execution time, update progress more realistically
-        if execution_time < 2:
-            # Fast connection - jump to completion
-            pbar.update(70)
-        else:
-            # Simulate progressive connection steps based on actual time
-            connection_steps = [
-                ("🔍 Checking credentials", 15),
-                ("📡 Connecting to database", 25),
-                ("✅ Verifying permissions", 20),
-                ("🎯 Final validation", 10)
-            ]
-            
-            step_time = execution_time / len(connection_steps)
-            current_progress = 30
-            
-            for step_desc, step_progress in connection_steps:
-                pbar.set_description(step_desc)
-                time.sleep(step_time * 0.8)  # Use 80% of step time for visual feedback
-                current_progress += step_progress
-                pbar.update(step_progress)
-        
-        # Ensure we reach 100%
-        if pbar.n < 100:
-            pbar.update(100 - pbar.n)
-        
-        if result.success:
-            pbar.set_description("✅ Connection Established")
-        else:
-            pbar.set_description("❌ Connection Failed")
+    with DbtProgress("🔧 Initializing dbt", "✅ Connection Established", "❌ Connection Failed",
+                     milestones=DEBUG_MILESTONES) as progress:
+        result = dbt_session.invoke(debug_args, progress)
+        progress.finish(result.success)
 
     return result
 
@@ -497,12 +338,8 @@ def connection_check(dbname, schemaname, tablename):
 
 
 def run_dbt(dbname, schemaname, tablename):
-    vars_dict = {
-        'my_database': dbname,
-        'my_schema': schemaname,
-        'my_table': tablename
-    }
-    vars_str = json.dumps(vars_dict)
+    """Run all dbt models, advancing the progress bar as each node finishes"""
+    vars_str = build_vars_string(dbname, schemaname, tablename)
 
     run_args = [
         "run",
@@ -511,65 +348,22 @@ def run_dbt(dbname, schemaname, tablename):
         "--vars", vars_str
     ]
 
-    print("🔄 Processing...")
-
-    dbt = dbtRunner()
-    stdout_capture = StringIO()
-    stderr_capture = StringIO()
-    completed_models = set()
-
-    def track_progress_from_output():
-        output = stdout_capture.getvalue()
-        completion_patterns = [
-            r"\d+\s+of\s+\d+\s+OK\s+created.*model\s+([^\s]+)",
-            r"OK\s+created.*model\s+([^\s]+).*\[OK",
-            r"Completed\s+model\s+([^\s]+).*SUCCESS",
-        ]
-        for pattern in completion_patterns:
-            matches = re.findall(pattern, output)
-            for match in matches:
-                if match and match not in completed_models:
-                    completed_models.add(match)
-
-    def run_dbt_command():
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            return dbt.invoke(run_args)
-
-    start_time = time.time()
-    result_container = []
-    dbt_thread = threading.Thread(
-        target=lambda: result_container.append(run_dbt_command())
-    )
-    dbt_thread.daemon = True
-    dbt_thread.start()
-
-    last_output_size = 0
-    while dbt_thread.is_alive():
-        current_output_size = stdout_capture.tell()
-        if current_output_size > last_output_size:
-            track_progress_from_output()
-            last_output_size = current_output_size
-        time.sleep(0.5)
-
-    result = result_container[0] if result_container else None
-    track_progress_from_output()
+    with DbtProgress("Running dbt models", "✅ All models executed successfully", "❌ Execution failed",
+                     total=get_dbt_models_count()) as progress:
+        result = dbt_session.invoke(run_args, progress)
+        progress.finish(result.success)
 
     return result
 
 
 def run_pre_run_setup(dbname, schemaname, tablename):
-    """Run the pre_run_setup macro with progress tracking"""
+    """Run the pre_run_setup macro, tracking progress from dbt's connection and query events"""
     args_dict = {
         'db_name': dbname,
         'schema_name': schemaname,
         'table_name': tablename
     }
-    vars_dict = {
-        'my_database': dbname,
-        'my_schema': schemaname,
-        'my_table': tablename
-    }
-    vars_str = json.dumps(vars_dict)
+    vars_str = build_vars_string(dbname, schemaname, tablename)
     args_str = json.dumps(args_dict)
     macro_args = [
         "run-operation",
@@ -579,157 +373,94 @@ def run_pre_run_setup(dbname, schemaname, tablename):
         "--vars", vars_str,
         "--args", args_str
     ]
-    
-    with tqdm(
-        total=100,
-        desc="Running Pre setup Macro",
-        colour="green",
-        bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|'
-    ) as pbar:
-        
-        dbt = dbtRunner()
-        stdout_capture = StringIO()
-        stderr_capture = StringIO()
-        
-        # Phase 1: Initialization
-        pbar.update(15)
-        pbar.set_description("🔧 Initializing macro")
-        time.sleep(0.3)
-        
-        # Phase 2: Parameter processing
-        pbar.update(20)
-        pbar.set_description("⚙️ Processing parameters")
-        time.sleep(0.3)
-        
-        # Phase 3: Database preparation
-        pbar.update(15)
-        pbar.set_description("🗄️ Setting up database")
-        
-        # Actually run the macro
-        start_time = time.time()
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            result = dbt.invoke(macro_args)
-        execution_time = time.time() - start_time
-        
-        # Update progress based on actual execution time
-        current_progress = 50
-        
-        if execution_time < 1:
-            # Very fast execution
-            pbar.update(50)
-        else:
-            # Simulate progressive setup steps
-            setup_steps = [
-                ("🔄 Creating temporary structures", 20),
-                ("📋 Configuring environment", 15),
-                ("✅ Setup complete", 15)
-            ]
-            
-            step_time = execution_time / len(setup_steps)
-            
-            for step_desc, step_progress in setup_steps:
-                pbar.set_description(step_desc)
-                time.sleep(step_time * 0.7)
-                current_progress += step_progress
-                pbar.update(step_progress)
-        
-        # Ensure we reach 100%
-        if pbar.n < 100:
-            pbar.update(100 - pbar.n)
-        
-        if result.success:
-            pbar.set_description("✅ Pre-run setup completed")
-        else:
-            pbar.set_description("❌ Pre-run setup failed")
-    
+
+    with DbtProgress("Running Pre setup Macro", "✅ Pre-run setup completed", "❌ Pre-run setup failed",
+                     milestones=OPERATION_MILESTONES) as progress:
+        result = dbt_session.invoke(macro_args, progress)
+        progress.finish(result.success)
+
+    return result
+
+def run_introspection_bootstrap(dbname, schemaname, tablename):
+    """Create schema-only stubs of the relations the models introspect, so compile needs no full dbt run"""
+    vars_str = build_vars_string(dbname, schemaname, tablename)
+    macro_args = [
+        "run-operation",
+        "bootstrap_introspection",
+        "--project-dir", project_dir,
+        "--profiles-dir", profiles_dir,
+        "--vars", vars_str
+    ]
+
+    with DbtProgress("Preparing model metadata", "✅ Model metadata prepared", "❌ Model metadata setup failed",
+                     milestones=OPERATION_MILESTONES) as progress:
+        result = dbt_session.invoke(macro_args, progress)
+        progress.finish(result.success)
+
     return result
 
+def prepare_for_compile(dbname, schemaname, tablename):
+    """
+    Make the introspected relations available before dbt compile.
+
+    Returns:
+        bool: True when compile can proceed
+    """
+    if column_resolution == "offline":
+        # Column lists come from the local mapping, nothing has to exist on the warehouse
+        return True
+
+    if introspection_mode == "bootstrap":
+        bootstrap_result = run_introspection_bootstrap(dbname, schemaname, tablename)
+        if not bootstrap_result.success:
+            print("❌ Introspection bootstrap failed")
+            return False
+        return True
+
+    macro_result = run_pre_run_setup(dbname, schemaname, tablename)
+    if not macro_result.success:
+        print("❌ Pre-run setup macro failed")
+        return False
+
+    run_result = run_dbt(dbname, schemaname, tablename)
+    if not run_result.success:
+        print("❌ Execution failed")
+        return False
+    return True
+
 def build_dbt_compile_args(dbname, schemaname, tablename):
     """Build arguments for dbt compile"""
-    vars_dict = {
-        'my_database': dbname,
-        'my_schema': schemaname,
-        'my_table': tablename
-    }
-    vars_str = json.dumps(vars_dict)
-    return [
+    vars_str = build_vars_string(dbname, schemaname, tablename)
+    compile_args = [
         "compile",
         "--project-dir", project_dir,
         "--profiles-dir", profiles_dir,
         "--vars", vars_str
     ]
+    if column_resolution == "offline":
+        # Offline compile issues no queries, so skip listing schemas to warm the relation cache
+        compile_args.append("--no-populate-cache")
+    return compile_args
 
 def run_dbt_args(cli_args, dbname, schemaname, tablename):
-    vars_dict = {
-        'my_database': dbname,
-        'my_schema': schemaname,
-        'my_table': tablename
-    }
-    vars_str = json.dumps(vars_dict)
+    vars_str = build_vars_string(dbname, schemaname, tablename)
     cli_args += ["--vars", vars_str]
 
     is_compile = "compile" in cli_args
     
     if is_compile:
-        dbt = dbtRunner()
-        stdout_capture = StringIO()
-        stderr_capture = StringIO()
-        
-        compiled_models = set()
-        
-        def track_compile_progress_from_output():
-            output = stdout_capture.getvalue()
-            compile_patterns = [
-                r"Compiling\s+model\s+([^\s]+)",
-                r"Compiled\s+model\s+([^\s]+)",
-                r"Processing\s+model\s+([^\s]+)",
-                r"Found\s+(\d+)\s+models",
-            ]
-            
-            for pattern in compile_patterns:
-                matches = re.findall(pattern, output)
-                for match in matches:
-                    if match and match not in compiled_models:
-                        if match.isdigit():
-                            continue
-                        compiled_models.add(match)
-        
-        def run_dbt_command():
-            with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-                return dbt.invoke(cli_args)
-        
-        result_container = []
-        dbt_thread = threading.Thread(
-            target=lambda: result_container.append(run_dbt_command())
-        )
-        dbt_thread.daemon = True
-        dbt_thread.start()
-        
-        last_output_size = 0
-        while dbt_thread.is_alive():
-            current_output_size = stdout_capture.tell()
-            if current_output_size > last_output_size:
-                track_compile_progress_from_output()
-                last_output_size = current_output_size
-            time.sleep(0.3)
-        
-        result = result_container[0] if result_container else None
-        track_compile_progress_from_output()
-        
+        with DbtProgress("Compiling dbt models", "✅ Models compiled", "❌ Compilation failed",
+                         total=get_dbt_models_count(), label="📝 Compiling") as progress:
+            result = dbt_session.invoke(cli_args, progress)
+            progress.finish(result.success)
+
         return result
         
     else:
-        dbt = dbtRunner()
-        stdout_capture = StringIO()
-        stderr_capture = StringIO()
-        
-        with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-            result = dbt.invoke(cli_args)
-        
-        return result
+        return dbt_session.invoke(cli_args)
 
-def zip_directory(source_dir, zip_path):
-    """Zip the contents of an entire directory"""
+def zip_directory(source_dir, zip_path, exclude=()):
+    """Zip the contents of an entire directory, skipping the top-level entries named in exclude"""
     # Count total files first
     total_files = 0
     for root, _, files in os.walk(source_dir):
@@ -737,7 +468,10 @@ def zip_directory(source_dir, zip_path):
     
     with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
         # with tqdm(total=total_files, desc="Creating archive", colour="green", bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|') as pbar:
-        for root, _, files in os.walk(source_dir):
+        for root, dirs, files in os.walk(source_dir):
+            if os.path.samefile(root, source_dir):
+                dirs[:] = [d for d in dirs if d not in exclude]
+                files = [f for f in files if f not in exclude]
             for file in files:
                 file_path = os.path.join(root, file)
                 arcname = os.path.relpath(file_path, source_dir)
@@ -746,7 +480,7 @@ def zip_directory(source_dir, zip_path):
 
 def run_sqlfluff_on_directory(directory_path, project_root):
     """
-    Run SQLFluff fix on all SQL files in a directory.
+    Run SQLFluff fix on all SQL files in a directory, in parallel and skipping files already formatted.
     """
     try:
         # Collect all SQL files
@@ -759,27 +493,7 @@ def run_sqlfluff_on_directory(directory_path, project_root):
         if not sql_files:
             return True
         
-        success_count = 0
-        # with tqdm(total=len(sql_files), desc="Applying SQLFluff", colour="green",bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|') as pbar:
-        for sql_file in sql_files:
-            try:
-                # Run SQLFluff on individual file
-                result = subprocess.run(
-                    ["sqlfluff", "fix", "--force", sql_file],
-                    check=False,
-                    text=True,
-                    capture_output=True,
-                    cwd=project_root
-                )
-
-                if result.returncode == 0:
-                    success_count += 1
-                    
-            except Exception:
-                pass
-                
-                # pbar.update(1)
-        
+        success_count = format_sql_files(sql_files, project_root)
         return success_count > 0
             
     except Exception:
@@ -788,14 +502,10 @@ def run_sqlfluff_on_directory(directory_path, project_root):
 def apply_sqlfluff_to_compiled(project_root):
     """
     Apply SQLFluff to all compiled SQL files before packaging.
-    Run SQLFluff on the entire compiled models directory at once for efficiency.
     """
     # check SQLFluff is availability
-    try:
-        subprocess.run(["sqlfluff", "--version"], check=True, capture_output=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    if importlib.util.find_spec("sqlfluff") is None:
         # with tqdm(desc="❌ SQLFluff not available", bar_format='{desc}') as pbar:
-        time.sleep(1)
         return False
     
     # Run SQLFluff on the compiled models directory
@@ -869,8 +579,9 @@ def copy_seed_file(seed_path, target_dir, dbname, schemaname, tablename):
     try:
         shutil.copy(seed_path, target_dir)
 
-        # Run dbt seed to update
-        run_dbt_seed(dbname, schemaname, tablename)
+        # Run dbt seed to update; offline column resolution reads the CSV directly
+        if column_resolution != "offline":
+            run_dbt_seed(dbname, schemaname, tablename)
         return True
 
     except FileNotFoundError:
@@ -898,14 +609,14 @@ def update_profile(profile_src_path, profiles_dir):
             time.sleep(1)
         return False
 
-def transform_compiled_sql(sql_file_path):
-    """Post-process a compiled SQL file to wrap in stored procedure format."""
+def transform_compiled_sql(sql_file_path, root=None):
+    """Post-process a compiled SQL file to wrap in stored procedure format. root is the compiled tree it belongs to."""
     try:
         with open(sql_file_path, "r", encoding="utf-8") as f:
             sql_code = f.read()
 
         # Extract folder inside models and model name
-        rel_path = os.path.relpath(sql_file_path, compiled_dir)
+        rel_path = os.path.relpath(sql_file_path, root or compiled_dir)
         parts = rel_path.split(os.sep)
 
         # Find index of "models" in path
@@ -945,32 +656,31 @@ def transform_compiled_sql(sql_file_path):
     except Exception:
         pass
 
-def process_compiled_sql_files():
-    """Walk through compiled models directory and transform all SQL files."""
+def process_compiled_sql_files(compiled_root=None):
+    """Walk through compiled models directory (or a copy of it) and transform all SQL files."""
+    compiled_root = compiled_root or compiled_dir
     # Count SQL files first
     sql_files = []
-    for root, _, files in os.walk(compiled_dir):
+    for root, _, files in os.walk(compiled_root):
         for file in files:
             if file.endswith(".sql"):
                 sql_files.append(os.path.join(root, file))
     
 # with tqdm(total=len(sql_files), desc="Transforming SQL files", colour="green", bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(bar_width) + '}|') as pbar:
     for sql_file in sql_files:
-        transform_compiled_sql(sql_file)
+        transform_compiled_sql(sql_file, compiled_root)
         # pbar.update(1)
 
-def remove_readonly_files(func, path, _):
-    """Error handler for removing read-only files on Windows"""
-    import stat
-    os.chmod(path, stat.S_IWRITE)
-    func(path)
-
-def copy_snowball_dbt(source_path: str) -> str:
+def copy_snowball_dbt(source_path: str, target_path: str = None) -> str:
     """
-    Get the driving snowball dbt folder / code into downloads
-    
+    Sync the driving snowball dbt folder / code into downloads.
+
+    Only files that changed in the template are copied, keeping dbt's partial-parse state and installed
+    packages from the previous run (see template_sync.py).
+
     Args:
         source_path (str): Path to the source directory to copy.
+        target_path (str): Working project directory, Downloads/<source folder name> when not given.
         
     Returns:
         str: Path to the column_mapping.csv file
@@ -981,17 +691,9 @@ def copy_snowball_dbt(source_path: str) -> str:
         raise FileNotFoundError(f"Source directory not found: {source_path}")
 
     repo_name = os.path.basename(source_path)
-    downloads_dir = Path.home() / "Downloads"
-    temp_clone_location = downloads_dir / f"{repo_name}_temp_snowball_driver"
-    final_clone_location = downloads_dir / repo_name
-
-    if final_clone_location.exists():
-        shutil.rmtree(final_clone_location, onerror=remove_readonly_files)
-    if temp_clone_location.exists():
-        shutil.rmtree(temp_clone_location, onerror=remove_readonly_files)
+    final_clone_location = Path(target_path) if target_path else Path.home() / "Downloads" / repo_name
 
-    shutil.copytree(source_path, temp_clone_location, dirs_exist_ok=True)
-    temp_clone_location.rename(final_clone_location)
+    sync_template(source_path, final_clone_location)
 
     mapping_file = final_clone_location / "seeds" / "column_mapping.csv"
     if not mapping_file.exists():
@@ -1082,7 +784,626 @@ def update_revenue_model_with_table_name(output_dir, table_name):
                 except Exception as e:
                     print(f"⚠️ Error updating {file_path}: {e}")
 
+def package_dbt_version(output_zip):
+    """Zip the dbt project as delivered to the user"""
+    # Parse state, logs and the sync stamp belong to this machine, not to the delivered project
+    target_paths = [name for name in os.listdir(project_dir) if name.startswith("target_")]
+    zip_directory(project_dir, output_zip, exclude=("target", "logs", STAMP_FILE, *target_paths))
+
+def package_sql_version(output_zip, user_choice):
+    """Zip the compiled SQL; SQL database gets stored procedures, built on a copy so the compiled tree stays intact"""
+    if user_choice == 4:
+        staging_dir = os.path.join(project_dir, "target", "compiled_sp")
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir)
+        shutil.copytree(compiled_dir, staging_dir)
+        process_compiled_sql_files(staging_dir)
+        zip_directory(staging_dir, output_zip)
+    else:
+        zip_directory(compiled_dir, output_zip)
+
+def package_spark_version(output_zip):
+    """Build the Spark SQL notebooks from the compiled SQL and zip them"""
+    generate_notebooks()
+    if os.path.exists(output_zip):
+        os.remove(output_zip)
+    zip_directory(notebooks_dir, output_zip)
+
+def compile_and_format(dbname, schemaname, tablename, interactive=True):
+    """
+    Prepare the introspected relations, compile the project and format the compiled SQL.
+
+    Returns:
+        bool: True when the compiled tree is ready to package
+    """
+    try:
+        if not prepare_for_compile(dbname, schemaname, tablename):
+            return False
+    except Exception as e:
+        print(f"❌ Execution failed: {e}")
+        return False
+
+    compile_args = build_dbt_compile_args(dbname, schemaname, tablename)
+    compile_result = run_dbt_args(compile_args, dbname, schemaname, tablename)
+    if not (compile_result and compile_result.success):
+        print("❌ dbt compile failed")
+        return False
+
+    sqlfluff_success = apply_sqlfluff_to_compiled(project_dir)
+    if not sqlfluff_success:
+        with tqdm(desc="⚠️ SQLFluff issues detected", bar_format='{desc}') as pbar:
+            if interactive:
+                time.sleep(1)
+    return True
+
+def generate_all_versions(user_choice, dbname, schemaname, tablename, interactive=True):
+    """
+    Produce snowball_dbt.zip, snowball_sql.zip and snowball_spark.zip from a single compile.
+
+    The project is compiled and formatted once, then the stored-procedure transform, the notebooks and
+    the three zips are built concurrently from that compiled tree.
+
+    Returns:
+        bool: True when all three zips were written
+    """
+    print("Generating dbt, SQL and Spark SQL versions...")
+    if not compile_and_format(dbname, schemaname, tablename, interactive):
+        return False
+
+    # The project walk renames the table in the dbt models and in the compiled tree under target/;
+    # do it before the packaging tasks start reading either
+    update_revenue_model_with_table_name(project_dir, tablename)
+
+    packages = {
+        "snowball_dbt.zip": package_dbt_version,
+        "snowball_sql.zip": lambda output_zip: package_sql_version(output_zip, user_choice),
+        "snowball_spark.zip": package_spark_version,
+    }
+    success = True
+    with ThreadPoolExecutor(max_workers=len(packages)) as pool:
+        futures = {pool.submit(package, os.path.join(output_dir, name)): name for name, package in packages.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+                print(f"{name} is saved at: {os.path.join(output_dir, name)}")
+            except Exception as e:
+                print(f"❌ Failed to build {name}: {e}")
+                success = False
+    return success
+
+FANOUT_PLATFORMS = ("snowflake", "databricks", "fabric", "sqlserver", "duckdb")
+
+def compile_target_package(target, platform, dbname, schemaname, tablename, vars_str, project, out):
+    """
+    Process-pool worker: compile, format and zip the SQL version for one profiles.yml target.
+
+    Each target compiles into its own target-path and log-path, so concurrent dbt processes never share
+    parse state, and dbt dispatch resolves the macros of that target's adapter.
+
+    Returns:
+        str: Path of the target's zip
+    """
+    # A spawned worker starts from the default paths
+    apply_path_overrides(out=out, project=project)
+    DbtProgress.enabled = False
+
+    target_path = os.path.join(project_dir, f"target_{target}")
+    compiled_root = os.path.join(target_path, "compiled")
+    if os.path.exists(compiled_root):
+        shutil.rmtree(compiled_root)
+
+    compile_args = [
+        "compile",
+        "--project-dir", project_dir,
+        "--profiles-dir", profiles_dir,
+        "--target", target,
+        "--target-path", target_path,
+        "--log-path", os.path.join(project_dir, "logs", target),
+        "--vars", vars_str,
+        "--no-populate-cache"
+    ]
+    result = dbt_session.invoke(compile_args)
+    if not result.success:
+        raise RuntimeError(f"dbt compile failed for target '{target}'" + (f": {result.exception}" if result.exception else ""))
+
+    sql_files = []
+    for root, _, files in os.walk(compiled_root):
+        sql_files.extend(os.path.join(root, file) for file in files if file.endswith('.sql'))
+    # Already one process per target, so format in this process
+    format_sql_files(sql_files, project_dir, workers=1)
+
+    update_revenue_model_with_table_name(compiled_root, tablename)
+    if platform == "sqlserver":
+        process_compiled_sql_files(compiled_root)
+
+    output_zip = os.path.join(output_dir, f"snowball_sql_{target}.zip")
+    zip_directory(compiled_root, output_zip)
+    return output_zip
+
+def generate_multi_platform(targets, tablename):
+    """
+    Compile the SQL version for several profiles.yml targets concurrently, one package per target.
+
+    Every target resolves its columns offline from the local mapping, so no target needs a seed, bootstrap
+    or connection, and the wall-clock time is close to that of the slowest target.
+
+    Returns:
+        bool: True when every target's zip was written
+    """
+    profile_targets = load_profile_targets("Snowball_dbt")
+    unknown = [target for target in targets if target not in profile_targets]
+    if unknown:
+        print(f"❌ Target(s) not found in profiles.yml: {', '.join(unknown)}")
+        return False
+    unsupported = [target for target in targets if profile_targets[target]["type"] not in FANOUT_PLATFORMS]
+    if unsupported:
+        print(f"❌ Unsupported platform for target(s): {', '.join(unsupported)}")
+        return False
+
+    print(f"Compiling SQL code for {', '.join(targets)}...")
+    success = True
+    with ProcessPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1)) as pool:
+        futures = {}
+        for target in targets:
+            db_config = profile_targets[target]
+            vars_str = build_vars_string(db_config["database"], db_config["schema"], tablename, offline=True)
+            futures[pool.submit(compile_target_package, target, db_config["type"], db_config["database"],
+                                db_config["schema"], tablename, vars_str, project_dir, output_dir)] = target
+        for future in as_completed(futures):
+            try:
+                print(f"{futures[future]}: saved at {future.result()}")
+            except Exception as e:
+                print(f"❌ {futures[future]}: {e}")
+                success = False
+    return success
+
+def generate_version(user_choice_version, user_choice, dbname, schemaname, tablename, interactive=True):
+    """
+    Generate and zip the selected Snowball version for the selected platform.
+
+    Args:
+        user_choice_version (int): 1 dbt, 2 sql, 3 Spark sql, 4 Redshift, 5 all of dbt, sql and Spark sql
+        user_choice (int): Platform number as listed in main (1 Snowflake ... 4 SQL database, 6 DuckDB)
+        interactive (bool): False skips the spinner and the pauses meant for a person at the terminal
+
+    Returns:
+        bool: True when the output zip(s) were written
+    """
+    ''' Final Ending Text applied in all version choices '''
+    final_text = "  Thanks for using Snowball Product! Happy coding! \U0001F642  "
+    # Get terminal width
+    term_width = shutil.get_terminal_size().columns
+    success = False
+
+    if user_choice_version == 1:
+        if user_choice == 1:
+            text = "Generating Snowflake adaptable dbt code "
+        if user_choice == 2:
+            text = "Generating Databricks adaptable dbt code ..."
+        if user_choice == 3:
+            text = "Generating Fabric adaptable dbt code ..."
+        if user_choice == 4:
+            text = "Generating SQL database adaptable dbt code ..."
+        if user_choice == 6:
+            text = "Generating DuckDB adaptable dbt code ..."
+
+        try:
+            if interactive:
+                rotating_slash_after(text, 10)
+            output_zip = os.path.join(output_dir, "snowball_dbt.zip")
+            update_revenue_model_with_table_name(project_dir, tablename)
+            package_dbt_version(output_zip)
+            print(f"snowball_dbt code is saved at: {output_zip}\n")
+            success = True
+        except Exception as e:
+            print(f"❌ Failed to zip dbt project: {e}")
+
+    elif user_choice_version == 2:
+        print("Generating SQL code...")
+        output_zip = os.path.join(output_dir, "snowball_sql.zip")
+        if compile_and_format(dbname, schemaname, tablename, interactive):
+            update_revenue_model_with_table_name(compiled_dir, tablename)
+            package_sql_version(output_zip, user_choice)
+            print(f"snowball_sql code is generated successfully and saved at: {output_zip}\n")
+            success = True
+
+    elif user_choice_version == 3:
+        print("\nGenerating Spark SQL notebooks...\n")
+        output_zip = os.path.join(output_dir, "snowball_spark.zip")
+        if compile_and_format(dbname, schemaname, tablename, interactive):
+            update_revenue_model_with_table_name(compiled_dir, tablename)
+            package_spark_version(output_zip)
+            print(f"Snowball Spark SQL Notebooks are zipped and saved at: {output_zip}\n")
+            success = True
+
+    elif user_choice_version == 4:
+        print("\nRedshift Version is in Progress! Please contact Snowball product team.")
+    elif user_choice_version == 5:
+        success = generate_all_versions(user_choice, dbname, schemaname, tablename, interactive)
+    else:
+        print("❌ Invalid choice. Please enter [1-5]")
+
+    if success and interactive:
+        print(final_text.center(term_width, '*'))
+    return success
+
+############  Headless CLI ##############
+
+PLATFORM_CHOICES = {"snowflake": 1, "databricks": 2, "fabric": 3, "sqlserver": 4, "duckdb": 6}
+VERSION_CHOICES = {"dbt": 1, "sql": 2, "spark": 3, "all": 5}
+
+def apply_path_overrides(mapping=None, profiles=None, out=None, project=None):
+    """
+    Point the module-level paths at the locations given on the command line.
+
+    Every step reads these globals at call time, and load_dbt_profile reads config.dbt_profiles_dir,
+    so both are updated.
+    """
+    global mapping_file, dbt_profiles_dir, output_dir, project_dir
+    global compiled_dir, dbt_seed_dir, profiles_dir, notebooks_dir, dbt_session
+
+    if mapping:
+        mapping_file = config.mapping_file = os.path.abspath(mapping)
+    if profiles:
+        dbt_profiles_dir = config.dbt_profiles_dir = os.path.abspath(profiles)
+    if out:
+        output_dir = config.output_dir = os.path.abspath(out)
+        os.makedirs(output_dir, exist_ok=True)
+    if project:
+        project_dir = config.project_dir = os.path.abspath(project)
+        profiles_dir = project_dir
+
+    compiled_dir  = os.path.join(project_dir, "target", "compiled")
+    dbt_seed_dir  = os.path.join(project_dir, "seeds")
+    notebooks_dir = os.path.join(output_dir, "notebooks")
+    dbt_session   = DbtSession(project_dir)
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="snowball", description="Generate dbt, SQL projects and PySpark notebooks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="Generate one Snowball version without any prompts")
+    generate.add_argument("--config", help="YAML file with any of the options below; command-line flags win")
+    generate.add_argument("--table", help="Revenue table name in the profile's database and schema")
+    generate.add_argument("--platform", choices=list(PLATFORM_CHOICES), help="Database platform")
+    generate.add_argument("--version", choices=list(VERSION_CHOICES), help="Snowball version to generate")
+    generate.add_argument("--mapping", help=f"column_mapping.csv to use (default: {mapping_file})")
+    generate.add_argument("--profiles", help=f"profiles.yml to use (default: {dbt_profiles_dir})")
+    generate.add_argument("--out", help=f"Directory for the generated zip (default: {output_dir})")
+    generate.add_argument("--project", help=f"Working dbt project directory (default: {project_dir})")
+    generate.add_argument("--skip-connection-check", action="store_true", default=None,
+                          help="Do not run dbt debug before generating")
+    generate.add_argument("--targets", nargs="+",
+                          help="profiles.yml targets to compile concurrently, one snowball_sql_<target>.zip each "
+                               "(replaces --platform, implies --version sql)")
+
+    synth_parser = subparsers.add_parser("synth", help="Write a synthetic revenue table for load and scaling tests")
+    synth_parser.add_argument("--out", required=True, help="Output file, .csv or .parquet (Parquet needs pyarrow)")
+    synth_parser.add_argument("--format", choices=["csv", "parquet"], help="Output format (default: from --out)")
+    synth_parser.add_argument("--mapping", help="column_mapping.csv whose source columns are written "
+                                                "(default: the one in Downloads, else the packaged seed)")
+    for name, default in synth.DEFAULTS.items():
+        synth_parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default,
+                                  help=f"(default: {default})")
+
+    bench_parser = subparsers.add_parser("bench", help="Time the pipeline and every model on synthetic data, "
+                                                       "locally on DuckDB")
+    bench_parser.add_argument("--scales", nargs="+", default=["1000x36", "10000x60", "100000x120"],
+                              help="<customers>x<months> scales to run (default: 1000x36 10000x60 100000x120)")
+    bench_parser.add_argument("--out", default="bench.json", help="JSON file for the timings (default: bench.json)")
+    bench_parser.add_argument("--baseline", help="Earlier bench JSON to compare with; slower stages or models fail the run")
+    bench_parser.add_argument("--tolerance", type=float, default=bench.DEFAULT_TOLERANCE,
+                              help=f"Allowed slowdown against the baseline (default: {bench.DEFAULT_TOLERANCE})")
+    bench_parser.add_argument("--min-seconds", type=float, default=bench.DEFAULT_MIN_SECONDS,
+                              help=f"Slowdowns below this many seconds are noise (default: {bench.DEFAULT_MIN_SECONDS})")
+    bench_parser.add_argument("--mapping", help="column_mapping.csv to generate the data for "
+                                                "(default: the one in Downloads, else the packaged seed)")
+    bench_parser.add_argument("--work", default=os.path.join(output_dir, "snowball_bench"),
+                              help="Directory for the data, dbt project, database and zips")
+    bench_parser.add_argument("--threads", type=int, default=4, help="dbt threads (default: 4)")
+    bench_parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data (default: 0)")
+
+    bridge_parser = subparsers.add_parser("bridge", help="Compute the revenue bridge from a local extract with NumPy, "
+                                                         "without a warehouse or dbt")
+    bridge_parser.add_argument("--revenue", required=True, help="Revenue extract, .csv or .parquet (Parquet needs pyarrow)")
+    bridge_parser.add_argument("--out", required=True, help="Directory for the output tables")
+    bridge_parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                               help="Output format (default: csv; Parquet needs pyarrow)")
+    bridge_parser.add_argument("--mapping", help="column_mapping.csv of the extract "
+                                                 "(default: the one in Downloads, else the packaged seed)")
+    bridge_parser.add_argument("--periods", nargs="+", choices=list(engine.PERIODS), default=list(engine.PERIODS),
+                               help=f"Period types to compute (default: {' '.join(engine.PERIODS)})")
+    bridge_parser.add_argument("--ytd-year-start", type=int, choices=range(1, 13), default=4, metavar="{1..12}",
+                               help="First month of the financial year (default: 4)")
+    bridge_parser.add_argument("--chunked", action="store_true",
+                               help="Out-of-core run for extracts that do not fit in memory: split the extract by "
+                                    "customer and compute one partition at a time")
+    bridge_parser.add_argument("--partitions", type=int,
+                               help=f"Partitions of --chunked (default: one per {engine.PARTITION_ROWS:,} revenue rows, "
+                                    f"up to {engine.MAX_PARTITIONS})")
+    return parser
+
+def resolve_mapping_file(mapping=None):
+    """The given column_mapping.csv, else the one in Downloads, else the one shipped with the template"""
+    if mapping:
+        return os.path.abspath(mapping)
+    packaged = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "snowball_versions", "snowball_dbt", "seeds", "column_mapping.csv")
+    return mapping_file if os.path.exists(mapping_file) else packaged
+
+def run_synth(args):
+    """
+    Entry point of `snowball synth`: streams a synthetic revenue table for the column mapping to args.out.
+
+    Returns:
+        int: Process exit code, 0 on success
+    """
+    mapping = resolve_mapping_file(args.mapping)
+    params = {name: getattr(args, name) for name in synth.DEFAULTS}
+    try:
+        rows = synth.write_revenue_table(args.out, load_column_mapping(mapping), args.format, **params)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"{rows:,} rows written to {args.out}")
+    return 0
+
+def run_bridge(args):
+    """
+    Entry point of `snowball bridge`: computes the Snowball tables from a local revenue extract with the NumPy
+    engine and writes them to args.out.
+
+    Returns:
+        int: Process exit code, 0 on success
+    """
+    start = time.perf_counter()
+    try:
+        mapping_rows = load_column_mapping(resolve_mapping_file(args.mapping))
+        if args.chunked or args.partitions:
+            written = engine.run_partitioned(args.revenue, mapping_rows, args.out, args.format, args.periods,
+                                             args.ytd_year_start, args.partitions)
+        else:
+            columns = engine.read_revenue(args.revenue, mapping_rows)
+            tables = engine.compute(columns, mapping_rows, args.periods, args.ytd_year_start)
+            written = engine.write_tables(tables, args.out, args.format)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        return 1
+    for name, rows in written.items():
+        print(f"{name}: {rows:,} rows")
+    print(f"Tables saved at: {os.path.abspath(args.out)} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+BENCH_PROFILE = """Snowball_dbt:
+  target: dev
+  outputs:
+    dev:
+      type: duckdb
+      path: {path}
+      schema: main
+      threads: {threads}
+"""
+
+def bench_scale(customers, months, work_dir, timer, seed=0):
+    """
+    Run the whole pipeline once on a synthetic revenue table of the given scale, on a fresh DuckDB database.
+
+    Stages: synth, copy, deps, seed, run, compile, sqlfluff, notebook, zip. The dbt run reads the synthetic
+    extract through the revenue_path var, so every model executes on the generated rows.
+
+    Returns:
+        dict: The scale's entry of the bench result document
+    """
+    file_format = "parquet" if synth.pyarrow is not None else "csv"
+    revenue_path = os.path.join(work_dir, f"revenue_{customers}x{months}.{file_format}")
+    with timer.stage("synth"):
+        rows = synth.write_revenue_table(revenue_path, load_column_mapping(mapping_file),
+                                         customers=customers, months=months, seed=seed)
+
+    database_path = os.path.join(work_dir, "bench.duckdb")
+    if os.path.exists(database_path):
+        os.remove(database_path)
+    dbname, schemaname, tablename = "bench", "main", "revenue"
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    with timer.stage("copy"):
+        copy_snowball_dbt(os.path.join(current_dir, "snowball_versions", "snowball_dbt"), project_dir)
+        if not update_profile(dbt_profiles_dir, os.path.join(profiles_dir, "profiles.yml")):
+            raise RuntimeError("profiles.yml could not be copied")
+
+    with timer.stage("deps"):
+        if not packages_installed(project_dir):
+            if not run_dbt_deps(dbname, schemaname, tablename).success:
+                raise RuntimeError("dbt deps failed")
+            mark_packages_installed(project_dir)
+
+    with timer.stage("seed"):
+        if not copy_seed_file(mapping_file, dbt_seed_dir, dbname, schemaname, tablename):
+            raise RuntimeError("column_mapping.csv could not be seeded")
+
+    vars_dict = json.loads(build_vars_string(dbname, schemaname, tablename))
+    vars_dict["revenue_path"] = revenue_path
+    with timer.stage("run"):
+        result = dbt_session.invoke(["run", "--project-dir", project_dir, "--profiles-dir", profiles_dir,
+                                     "--vars", json.dumps(vars_dict), "--full-refresh"])
+    models = bench.parse_run_results(os.path.join(project_dir, "target", "run_results.json"))
+    if not result.success:
+        failed = [name for name, timing in models.items() if timing["status"] != "success"]
+        raise RuntimeError(f"dbt run failed: {', '.join(failed) or result.exception}")
+
+    # The run leaves every introspected relation in place, so compile needs no bootstrap
+    with timer.stage("compile"):
+        if not run_dbt_args(build_dbt_compile_args(dbname, schemaname, tablename), dbname, schemaname, tablename).success:
+            raise RuntimeError("dbt compile failed")
+    # The compiled SQL is the same at every scale, so the format cache is cleared to time SQLFluff itself
+    shutil.rmtree(os.path.join(project_dir, SQLFLUFF_CACHE_DIR), ignore_errors=True)
+    with timer.stage("sqlfluff"):
+        apply_sqlfluff_to_compiled(project_dir)
+    with timer.stage("notebook"):
+        generate_notebooks()
+    with timer.stage("zip"):
+        update_revenue_model_with_table_name(compiled_dir, tablename)
+        package_dbt_version(os.path.join(output_dir, "snowball_dbt.zip"))
+        package_sql_version(os.path.join(output_dir, "snowball_sql.zip"), PLATFORM_CHOICES["duckdb"])
+        zip_directory(notebooks_dir, os.path.join(output_dir, "snowball_spark.zip"))
+
+    return {"customers": customers, "months": months, "rows": rows, "stages": timer.stages, "models": models}
+
+def run_bench(args):
+    """
+    Entry point of `snowball bench`: times the pipeline and every model on synthetic data at each scale,
+    writes the timings as JSON and compares them with a baseline.
+
+    Returns:
+        int: Process exit code, 0 on success, 1 on failure or on a regression against the baseline
+    """
+    try:
+        scales = [bench.parse_scale(scale) for scale in args.scales]
+        baseline = bench.load_results(args.baseline) if args.baseline else None
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    DbtProgress.enabled = False
+    work_dir = os.path.abspath(args.work)
+    os.makedirs(work_dir, exist_ok=True)
+    profiles_path = os.path.join(work_dir, "profiles.yml")
+    with open(profiles_path, "w", encoding="utf-8") as file:
+        file.write(BENCH_PROFILE.format(path=os.path.join(work_dir, "bench.duckdb"), threads=args.threads))
+    apply_path_overrides(resolve_mapping_file(args.mapping), profiles_path, work_dir,
+                         os.path.join(work_dir, "snowball_dbt"))
+
+    results = bench.new_results()
+    for customers, months in scales:
+        scale = f"{customers}x{months}"
+        print(f"Benchmarking {scale}...")
+        try:
+            results["scales"][scale] = bench_scale(customers, months, work_dir, bench.StageTimer(), args.seed)
+        except Exception as e:
+            print(f"❌ {scale}: {e}")
+            return 1
+        bench.write_results(results, args.out)
+
+    regressions = None
+    if baseline is not None:
+        regressions = bench.compare_results(results, baseline, args.tolerance, args.min_seconds)
+    print(bench.format_report(results, regressions))
+    print(f"Timings saved at: {os.path.abspath(args.out)}")
+    return 1 if regressions else 0
+
+def load_run_options(args):
+    """Merge the --config file with the command-line flags, flags taking precedence"""
+    options = {}
+    if args.config:
+        with open(args.config, "r") as file:
+            options = {key.replace("-", "_"): value for key, value in (yaml.safe_load(file) or {}).items()}
+    for key, value in vars(args).items():
+        if key not in ("command", "config") and value is not None:
+            options[key] = value
+
+    if options.get("targets"):
+        if isinstance(options["targets"], str):
+            options["targets"] = [target.strip() for target in options["targets"].split(",") if target.strip()]
+        options.setdefault("version", "sql")
+        if options["version"] != "sql":
+            raise ValueError("--targets generates the sql version only")
+        options["platform"] = None
+        missing = [] if options.get("table") else ["--table"]
+    else:
+        missing = [f"--{key}" for key in ("table", "platform", "version") if not options.get(key)]
+    if missing:
+        raise ValueError(f"Missing required option(s): {', '.join(missing)}")
+    if options["platform"] not in PLATFORM_CHOICES and not options.get("targets"):
+        raise ValueError(f"Unsupported platform '{options['platform']}', choose from {', '.join(PLATFORM_CHOICES)}")
+    if options["version"] not in VERSION_CHOICES:
+        raise ValueError(f"Unsupported version '{options['version']}', choose from {', '.join(VERSION_CHOICES)}")
+    return options
+
+def run_headless(argv):
+    """
+    Entry point of `snowball generate`: runs setup, connection check, deps, seed and generation from
+    arguments alone, without prompts, spinners or fixed delays.
+
+    Returns:
+        int: Process exit code, 0 on success
+    """
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "synth":
+        return run_synth(args)
+    if args.command == "bench":
+        return run_bench(args)
+    if args.command == "bridge":
+        return run_bridge(args)
+    try:
+        options = load_run_options(args)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    DbtProgress.enabled = False
+    apply_path_overrides(options.get("mapping"), options.get("profiles"), options.get("out"), options.get("project"))
+    tablename = options["table"]
+    targets = options.get("targets")
+
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    snowball_versions_path = os.path.join(current_dir, "snowball_versions", "snowball_dbt")
+    try:
+        copy_snowball_dbt(snowball_versions_path, project_dir)
+        if not os.path.exists(mapping_file):
+            raise FileNotFoundError(f"column_mapping.csv not found at: {mapping_file}")
+        if not targets:
+            db_config = load_dbt_profile("Snowball_dbt", "dev")
+    except Exception as e:
+        print(f"❌ Error setting up snowball: {e}")
+        return 1
+
+    if targets:
+        if not update_profile(dbt_profiles_dir, os.path.join(profiles_dir, "profiles.yml")):
+            return 1
+        if not packages_installed(project_dir):
+            if not run_dbt_deps(None, None, tablename).success:
+                print("❌ dbt deps failed")
+                return 1
+            mark_packages_installed(project_dir)
+        # Columns resolve offline from the mapping, the seed file is only shipped with the project
+        shutil.copy(mapping_file, dbt_seed_dir)
+        return 0 if generate_multi_platform(targets, tablename) else 1
+
+    user_choice = PLATFORM_CHOICES[options["platform"]]
+
+    dbname = db_config.get("database")
+    schemaname = db_config.get("schema")
+    if db_config.get("type") != options["platform"]:
+        print(f"❌ profiles.yml target is '{db_config.get('type')}', not '{options['platform']}'")
+        return 1
+    print(f"Revenue table: {dbname}.{schemaname}.{tablename}")
+
+    if not update_profile(dbt_profiles_dir, os.path.join(profiles_dir, "profiles.yml")):
+        return 1
+
+    if not options.get("skip_connection_check"):
+        if not connection_check(dbname, schemaname, tablename).success:
+            print("❌ Connection Failed")
+            return 1
+
+    if not packages_installed(project_dir):
+        if not run_dbt_deps(dbname, schemaname, tablename).success:
+            print("❌ dbt deps failed")
+            return 1
+        mark_packages_installed(project_dir)
+
+    if not copy_seed_file(mapping_file, dbt_seed_dir, dbname, schemaname, tablename):
+        return 1
+
+    success = generate_version(VERSION_CHOICES[options["version"]], user_choice, dbname, schemaname, tablename,
+                               interactive=False)
+    return 0 if success else 1
+
 def main():
+    if len(sys.argv) > 1:
+        return run_headless(sys.argv[1:])
+
     welcome_message()
 
     # Clean up previous runs
@@ -1111,7 +1432,6 @@ def main():
     
     initial_set_up()
     
-    project_root = project_dir
     text = f"Checking Database Connection!"
     width = len(text) + 8  # padding for stars
     border = "*" * width * 2
@@ -1139,22 +1459,24 @@ def main():
     print("     3: Fabric")
     print("     4: SQL database")
     print("     5: Redshift --In Progress")
+    print("     6: DuckDB (local)")
 
     platform_dict = {
         1: "snowflake",
         2: "databricks",
         3: "fabric",
         4: "sqlserver",
-        5: "redshift"
+        5: "redshift",
+        6: "duckdb"
     }
-    user_choice = int(input("\nSelect your Database Platform [1-5]: ").strip())
+    user_choice = int(input("\nSelect your Database Platform [1-6]: ").strip())
     while 1:
         try:
-            if user_choice in [1, 2, 3, 4, 5]:
+            if user_choice in [1, 2, 3, 4, 5, 6]:
                 break
-            else: user_choice = int(input("❌ Invalid input. Please enter between [1-5]: ").strip())
+            else: user_choice = int(input("❌ Invalid input. Please enter between [1-6]: ").strip())
         except ValueError:
-            print("❌ Invalid input. Please enter between [1-5].")
+            print("❌ Invalid input. Please enter between [1-6].")
 
     def checking():
         connection = connection_check(dbname,schemaname,tablename)
@@ -1179,10 +1501,14 @@ def main():
     print(line2)
     print(line3)
     
-    deps_result = run_dbt_deps(dbname, schemaname, tablename)
-    if not deps_result.success:
-        print("❌ dbt deps failed")
-        return
+    if packages_installed(project_dir):
+        print("✅ Dependencies up to date")
+    else:
+        deps_result = run_dbt_deps(dbname, schemaname, tablename)
+        if not deps_result.success:
+            print("❌ dbt deps failed")
+            return
+        mark_packages_installed(project_dir)
 
     copy_seed_file(mapping_file, dbt_seed_dir, dbname, schemaname, tablename)
     print(line3)
@@ -1191,115 +1517,16 @@ def main():
     print("     2: sql")
     print("     3: Spark sql")
     print("     4: Redshift - N/A")
+    print("     5: All (dbt, sql and Spark sql from one compile)")
 
-    ''' Final Ending Text applied in all version choices '''
-    final_text = "  Thanks for using Snowball Product! Happy coding! \U0001F642  "
-    # Get terminal width
-    term_width = shutil.get_terminal_size().columns
     try:
         user_choice_version = int(input("\nSelect your Snowball Version: ").strip())
     except ValueError:
-        print("❌ Invalid input. Please enter [1-4].")
+        print("❌ Invalid input. Please enter [1-5].")
         return
     
     print(f"{line1}\n")
-    if user_choice_version == 1:
-        if user_choice == 1:
-            text = "Generating Snowflake adaptable dbt code "
-        if user_choice == 2:
-            text = "Generating Databricks adaptable dbt code ..."
-        if user_choice == 3:
-            text = "Generating Fabric adaptable dbt code ..."
-
-        try:
-            rotating_slash_after(text, 10)
-            output_zip = os.path.join(output_dir, "snowball_dbt.zip")
-            update_revenue_model_with_table_name(project_dir, tablename)
-            zip_directory(project_dir, output_zip)
-            print(f"snowball_dbt code is saved at: {output_zip}\n")
-            print(final_text.center(term_width, '*'))
-        except Exception as e:
-            print(f"❌ Failed to zip dbt project: {e}")
-
-    elif user_choice_version == 2:
-        print("Generating SQL code...")
-        
-        try:
-            output_zip = os.path.join(output_dir, "snowball_sql.zip")
-            macro_result = run_pre_run_setup(dbname, schemaname, tablename)
-            if not macro_result.success:
-                print("❌ Pre-run setup macro failed")
-                return
-                
-            run_result = run_dbt(dbname, schemaname, tablename)
-            if not run_result.success:
-                print("❌ Execution failed")
-                return
-                
-        except Exception as e:
-            print(f"❌ Execution failed: {e}")
-            return
-        
-        compile_args = build_dbt_compile_args(dbname, schemaname, tablename)
-        compile_result = run_dbt_args(compile_args, dbname, schemaname, tablename)
-
-        if compile_result.success:
-            sqlfluff_success = apply_sqlfluff_to_compiled(project_root)
-            if not sqlfluff_success:
-                with tqdm(desc="SQLFluff issues detected", bar_format='{desc}') as pbar:
-                    time.sleep(1)
-                    
-            if user_choice == 4: process_compiled_sql_files()
-            update_revenue_model_with_table_name(compiled_dir, tablename)
-            zip_directory(compiled_dir, output_zip)
-            print(f"snowball_sql code is generated successfully and saved at: {output_zip}\n")
-            print(final_text.center(term_width, '*'))
-        else:
-            print("❌ dbt compile failed")
-
-    elif user_choice_version == 3:
-        print("\nGenerating Spark SQL notebooks...\n")
-            
-        try:
-            output_zip = os.path.join(output_dir, "snowball_spark.zip")
-            macro_result = run_pre_run_setup(dbname, schemaname, tablename)
-            if not macro_result.success:
-                print("❌ Pre-run setup macro failed")
-                return
-                
-            run_result = run_dbt(dbname, schemaname, tablename)
-            if not run_result.success:
-                print("❌ Execution failed")
-                return
-                
-        except Exception as e:
-            print(f"❌ Execution failed: {e}")
-            return
-
-        compile_args = build_dbt_compile_args(dbname, schemaname, tablename)
-        result = run_dbt_args(compile_args, dbname, schemaname, tablename)
-
-        if result and result.success:
-            sqlfluff_success = apply_sqlfluff_to_compiled(project_root)
-            if not sqlfluff_success:
-                with tqdm(desc="⚠️ SQLFluff issues detected", bar_format='{desc}') as pbar:
-                    time.sleep(1)
-
-            generate_notebooks()
-
-            if os.path.exists(output_zip):
-                os.remove(output_zip)
-            update_revenue_model_with_table_name(notebooks_dir, tablename)
-            zip_directory(notebooks_dir, output_zip)
-            print(f"Snowball Spark SQL Notebooks are zipped and saved at: {output_zip}\n")
-            print(final_text.center(term_width, '*'))
-
-        else:
-            print("❌ dbt compile failed")
-    elif user_choice_version == 4:
-        print("\nRedshift Version is in Progress! Please contact Snowball product team.")
-    else:
-        print("❌ Invalid choice. Please enter [1-4]")
+    generate_version(user_choice_version, user_choice, dbname, schemaname, tablename)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,16 +1,26 @@
+--  Column names of a model, read from the warehouse once per invocation or, when the column_mapping var is set, from the
+--  layouts in introspection.sql so that no metadata query is needed
+{%- macro get_relation_column_names(model_name) -%}
+    {%- set relation = ref(model_name) -%}
+    {%- if var('column_mapping', none) is not none -%}
+        {%- do return(introspected_columns(model_name)) -%}
+    {%- endif -%}
+
+    {%- do return(cached_columns_in_relation(relation)) -%}
+{%- endmacro -%}
+
 --  Macro to dynamically select columns for the models. It can be chosen by giving any of the 4 parameters as per requirement.
 --  The 4 params are: model name, match key word, table prefix name, exclusion list
 {%- macro get_dimension_from_table(model_name, keyword, alias=None, exclude_list=[]) -%}
-    {%- set relation = ref(model_name) -%}
-    {%- set columns = adapter.get_columns_in_relation(relation) -%}
+    {%- set columns = get_relation_column_names(model_name) -%}
 
     {%- set filtered_columns = [] -%}
     {%- for col in columns -%}
-        {%- if keyword | lower in col.name | lower and col.name | lower not in (exclude_list | map('lower') | list) -%}
+        {%- if keyword | lower in col | lower and col | lower not in (exclude_list | map('lower') | list) -%}
             {%- if alias -%}
-                {%- do filtered_columns.append(alias ~ '.' ~ col.name) -%}
+                {%- do filtered_columns.append(alias ~ '.' ~ col) -%}
             {%- else -%}
-                {%- do filtered_columns.append(col.name) -%}
+                {%- do filtered_columns.append(col) -%}
             {%- endif -%}
         {%- endif -%}
     {%- endfor -%}
@@ -33,14 +43,13 @@
 ----------------------------------------------------------------------------------------------------------------
 --  Macro for coalesced usage in models
 {%- macro coalesce_columns_with_alias(model_name, keyword, alias=None, exclude_list=[]) -%}
-    {%- set relation = ref(model_name) -%}
-    {%- set columns = adapter.get_columns_in_relation(relation) -%}
+    {%- set columns = get_relation_column_names(model_name) -%}
 
     {%- set coalesced_columns = [] -%}
     {%- for col in columns -%}
-        {%- if keyword | lower in col.name | lower and col.name not in exclude_list -%}
-            {%- set col_expr = "COALESCE(" ~ (alias ~ '.' if alias else '') ~ col.name ~ ", '')" -%}
-            {%- do coalesced_columns.append(col_expr ~ " AS " ~ col.name) -%}
+        {%- if keyword | lower in col | lower and col not in exclude_list -%}
+            {%- set col_expr = "COALESCE(" ~ (alias ~ '.' if alias else '') ~ col ~ ", '')" -%}
+            {%- do coalesced_columns.append(col_expr ~ " AS " ~ col) -%}
         {%- endif -%}
     {%- endfor -%}
 
@@ -57,13 +66,12 @@
 --  Macro to generate join conditions based on a keyword and aliases
 --  It can be used to create join conditions dynamically based on the columns present in the model
 {%- macro get_join_conditions(model_name, keyword, left_alias, right_alias, exclude_list=[]) -%}
-    {%- set relation = ref(model_name) -%}
-    {%- set columns = adapter.get_columns_in_relation(relation) -%}
+    {%- set columns = get_relation_column_names(model_name) -%}
     {%- set exclude_list_lower = exclude_list | map('lower') | list -%}
 
     {%- set join_conditions = [] -%}
     {%- for col in columns -%}
-        {%- set col_name = col.name -%}
+        {%- set col_name = col -%}
         {%- if keyword | lower in col_name | lower and col_name | lower not in exclude_list_lower -%}
             {%- do join_conditions.append(left_alias ~ '.' ~ col_name ~ ' = ' ~ right_alias ~ '.' ~ col_name) -%}
         {%- endif -%}
@@ -76,4 +84,79 @@
             {{- '\n   AND ' ~ condition -}}
         {%- endif -%}
     {%- endfor -%}
-{%- endmacro -%}
\ No newline at end of file
+{%- endmacro -%}
+
+-----------------------------------------------------------------------------------------------------------------
+--  Analysis-layer wrappers of the macros above. With dimension_mode 'wide' they return the same columns; with 'narrow'
+--  each dimension is carried by its surrogate key only and the descriptive columns stay in dim_customer, dim_product
+--  and dim_other, to be joined on the keys in the report models or the BI tool.
+
+{%- macro is_narrow_mode() -%}
+    {%- do return(var('dimension_mode', 'wide') == 'narrow') -%}
+{%- endmacro -%}
+
+--  Columns a keyword stands for in narrow mode: the dimension's surrogate key, or none at all for 'level'.
+--  Returns none in wide mode and for keywords without a narrow form (e.g. 'key'), which match the same columns in both modes
+{%- macro narrow_columns(keyword) -%}
+    {%- set narrow_keys = {
+        'customer': 'customer_key', 'customer_level': 'customer_key',
+        'product': 'product_key', 'product_level': 'product_key',
+        'other': 'other_key', 'other_key': 'other_key',
+        'level': none
+    } -%}
+    {%- if is_narrow_mode() and keyword | lower in narrow_keys -%}
+        {%- set key_column = narrow_keys[keyword | lower] -%}
+        {%- do return([key_column] if key_column else []) -%}
+    {%- endif -%}
+    {%- do return(none) -%}
+{%- endmacro -%}
+
+{%- macro analysis_columns(model_name, keyword, alias=None, exclude_list=[]) -%}
+    {%- set key_columns = narrow_columns(keyword) -%}
+    {%- if key_columns is not none -%}
+        {%- for key_column in key_columns -%}
+            {{- (alias ~ '.' if alias else '') ~ key_column -}}
+        {%- endfor -%}
+    {%- else -%}
+        {{- get_dimension_from_table(model_name, keyword, alias, exclude_list) -}}
+    {%- endif -%}
+{%- endmacro -%}
+
+{%- macro analysis_join_conditions(model_name, keyword, left_alias, right_alias, exclude_list=[]) -%}
+    {%- if is_narrow_mode() -%}
+        {%- set key_column = keyword.split('_')[0] | lower ~ '_key' -%}
+        {{- left_alias ~ '.' ~ key_column ~ ' = ' ~ right_alias ~ '.' ~ key_column -}}
+    {%- else -%}
+        {{- get_join_conditions(model_name, keyword, left_alias, right_alias, exclude_list) -}}
+    {%- endif -%}
+{%- endmacro -%}
+
+--  Column that identifies a customer / product in the lifecycle, winback and CLTV logic: customer_level_1 /
+--  product_level_1, or the surrogate key in narrow mode
+{%- macro analysis_grain_column(dimension) -%}
+    {{- dimension ~ ('_key' if is_narrow_mode() else '_level_1') -}}
+{%- endmacro -%}
+
+
+--  Descriptive dimension columns of the report models, each as ", column", in column_mapping order, so the report tables
+--  are the same in both dimension modes. carried_alias names analysis rows that carry all of them in wide mode
+--  (monthly_revenue does; delta_revenue keeps the levels only). Otherwise, and in narrow mode, they are read from
+--  dim_customer, dim_product and dim_other, joined back on the surrogate keys by report_dimension_joins.
+{%- macro report_dimension_columns(carried_alias=None) -%}
+    {%- for dimension in ['customer', 'product', 'other'] -%}
+        {%- set source_alias = carried_alias if carried_alias and not is_narrow_mode() else 'd_' ~ dimension -%}
+        {%- for column_name in get_seed_table_data(filter_value=dimension, index=1) -%}
+            {{- '\n        , ' ~ source_alias ~ '.' ~ column_name -}}
+        {%- endfor -%}
+    {%- endfor -%}
+{%- endmacro -%}
+
+--  Joins the dims on the keys of key_alias in narrow mode, or in both modes with join_in_wide_mode
+{%- macro report_dimension_joins(key_alias, join_in_wide_mode=false) -%}
+    {%- if is_narrow_mode() or join_in_wide_mode -%}
+        {%- for dimension in ['customer', 'product', 'other'] %}
+    LEFT JOIN {{ ref('dim_' ~ dimension) }} AS d_{{ dimension }}
+        ON {{ key_alias }}.{{ dimension }}_key = d_{{ dimension }}.{{ dimension }}_key
+        {%- endfor -%}
+    {%- endif -%}
+{%- endmacro -%}
@@ -1,9 +1,16 @@
 {%- macro databricks__generate_hash_key(filter_value=None, index=-1, exclude_list=[]) -%}
     {%- set results = get_seed_table_data(filter_value, index=index, exclude_list=exclude_list) -%}
+    {%- if var('hash_key_type', 'md5') == 'bigint' -%}
+    xxhash64(
+        {%- for column_name in results -%}
+            COALESCE({{ column_name }}, ''){%- if not loop.last -%},{{ '\n        ' }}{%- endif -%}
+        {%- endfor -%})
+    {%- else -%}
     MD5(CONCAT(
         {%- for column_name in results -%}
             COALESCE({{ column_name }}, ''){%- if not loop.last -%},{{ '\n        ' }}{%- endif -%}
         {%- endfor -%}))
+    {%- endif -%}
 {%- endmacro -%}
 
 {%- macro databricks__generate_series() -%}
@@ -51,11 +58,71 @@
     FROM {{ var('my_database') }}.{{ var('my_schema') }}.snowball_revenue
 {%- endmacro -%}
 
+-- One scan of model_ref; stack() emits a (kpi, kpi_value) row per column, nulls included
 {%- macro databricks__unpivot_kpis(model_ref, columns) -%}
-    {%- set col_exprs = [] %}
-    {%- for col in columns %}
-        {%- set expr = "SELECT '" ~ col ~ "' AS kpi, CAST(" ~ col ~ " AS DECIMAL(18,2)) AS kpi_value FROM " ~ model_ref %}
-        {%- do col_exprs.append(expr) %}
+    SELECT
+        STACK(
+            {{ columns | length }}
+            {%- for col in columns %}
+            , '{{ col }}', CAST({{ col }} AS DECIMAL(18, 2))
+            {%- endfor %}
+        ) AS (kpi, kpi_value)
+    FROM {{ model_ref }}
+{%- endmacro -%}
+
+-- Databricks SQL runs one statement per request, so the stubs are created statement by statement.
+{%- macro databricks__create_introspection_stubs(stubs) -%}
+    {%- set schemas = [] -%}
+    {%- for stub in stubs -%}
+        {%- set schema_name = stub.relation.database ~ '.' ~ stub.relation.schema -%}
+        {%- if schema_name not in schemas -%}
+            {%- do schemas.append(schema_name) -%}
+            {% do run_query("CREATE SCHEMA IF NOT EXISTS " ~ schema_name) %}
+        {%- endif -%}
+    {%- endfor -%}
+
+    {%- for stub in stubs %}
+        {% set create_stub %}
+            CREATE OR REPLACE TABLE {{ stub.relation }} (
+                {%- for column_name in stub.columns %}
+                {{ column_name }} STRING{% if not loop.last %},{% endif %}
+                {%- endfor %}
+            )
+        {% endset %}
+
+        {% do run_query(create_stub) %}
     {%- endfor %}
-    {{ col_exprs | join('\nUNION ALL\n') }}
+{%- endmacro -%}
+
+-- Merges the window on unique_key (Delta MERGE), as dbt-databricks has no delete+insert. A stored row of the recomputed
+-- months that the window no longer returns is kept until the next --full-refresh.
+{%- macro databricks__recompute_window_strategy(unique_key) -%}
+    {%- do return({'incremental_strategy': 'merge', 'unique_key': unique_key}) -%}
+{%- endmacro -%}
+
+-- One row per month from start_column to end_column for every row of relation, exploded from a native date sequence
+{%- macro databricks__month_scaffold(relation, start_column, end_column) -%}
+    SELECT
+        b.*
+        , EXPLODE(SEQUENCE(b.{{ start_column }}, b.{{ end_column }}, INTERVAL 1 MONTH))     AS month_roll
+    FROM {{ relation }} AS b
+{%- endmacro -%}
+
+-- Delta layout on customer_key and the month. zorder and partition make dbt-databricks run OPTIMIZE ... ZORDER BY
+-- after each build; liquid clustering replaces both and clusters on write.
+{%- macro databricks__table_layout_config(layout, month_column) -%}
+    {%- if layout.databricks_clustering == 'liquid' -%}
+        {%- do return({'liquid_clustered_by': ['customer_key', month_column]}) -%}
+    {%- elif layout.databricks_clustering == 'partition' -%}
+        {%- do return({'partition_by': [month_column], 'zorder': ['customer_key']}) -%}
+    {%- endif -%}
+    {%- do return({'zorder': ['customer_key', month_column]}) -%}
+{%- endmacro -%}
+
+{%- macro databricks__add_months(date_expr, months) -%}
+    DATEADD(MONTH, {{ months }}, {{ date_expr }})
+{%- endmacro -%}
+
+{%- macro databricks__month_diff(start_date, end_date) -%}
+    DATEDIFF(MONTH, {{ start_date }}, {{ end_date }})
 {%- endmacro -%}
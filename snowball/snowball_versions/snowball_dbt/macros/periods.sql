@@ -0,0 +1,45 @@
+-- Period types the analysis and report models compute, from the periods var, in lm, l3m, ltm, ytd order.
+-- The month-on-month winback / reactivation / deactivation / intermittent churn helpers and lm_customer_new_flag are
+-- inputs to every period type, so they are computed whichever periods are selected.
+{%- macro enabled_periods() -%}
+    {%- set all_periods = ['lm', 'l3m', 'ltm', 'ytd'] -%}
+    {%- set selected = var('periods', all_periods) | map('lower') | list -%}
+    {%- for period in selected -%}
+        {%- if period not in all_periods -%}
+            {{ exceptions.raise_compiler_error("Unknown period '" ~ period ~ "' in the periods var; use " ~ all_periods | join(', ')) }}
+        {%- endif -%}
+    {%- endfor -%}
+    {%- if not selected -%}
+        {{ exceptions.raise_compiler_error("The periods var must select at least one of " ~ all_periods | join(', ')) }}
+    {%- endif -%}
+    {%- do return(all_periods | select('in', selected) | list) -%}
+{%- endmacro -%}
+
+{%- macro period_enabled(period) -%}
+    {%- do return(period in enabled_periods()) -%}
+{%- endmacro -%}
+
+-- How period_revenue reads the YTD start ARR, from the ytd_lag_method var. The self join matches the month before the
+-- fiscal year start on the customer / product pair, so it returns one row per monthly_revenue_key of the pair; the
+-- window can only return one, so 'window' is refused once monthly_revenue holds a pair with several keys.
+{%- macro ytd_lag_method() -%}
+    {%- set method = var('ytd_lag_method', 'self_join') -%}
+    {%- if method not in ['self_join', 'window'] -%}
+        {{ exceptions.raise_compiler_error("Unknown ytd_lag_method '" ~ method ~ "'; use self_join or window") }}
+    {%- endif -%}
+    {%- if method == 'window' and period_enabled('ytd') and execute -%}
+        {%- set shared_pairs -%}
+            SELECT customer_key, product_key
+            FROM {{ ref('monthly_revenue') }}
+            GROUP BY customer_key, product_key
+            HAVING COUNT(DISTINCT monthly_revenue_key) > 1
+            LIMIT 1
+        {%- endset -%}
+        {%- set shared = run_query(shared_pairs).rows -%}
+        {%- if shared -%}
+            {{ exceptions.raise_compiler_error("ytd_lag_method 'window' needs a single monthly_revenue_key per customer / product pair, but customer_key "
+                ~ shared[0][0] ~ " / product_key " ~ shared[0][1] ~ " has several; use ytd_lag_method 'self_join'") }}
+        {%- endif -%}
+    {%- endif -%}
+    {%- do return(method) -%}
+{%- endmacro -%}
@@ -0,0 +1,17 @@
+-- Adds the physical design of the large fact, analysis and report tables, from the physical_layout var, to
+-- model_config (e.g. the incremental config), passed to config() as keyword arguments. The tables prune on
+-- month_column and customer_key: BI queries filter on both.
+-- used in fact_revenue, monthly_revenue, period_revenue, delta_revenue and rpt_revenue_bridge
+{%- macro physical_layout_config(model_config={}, month_column='month_roll') -%}
+    {%- set layout = {'enabled': false, 'transient': true, 'databricks_clustering': 'zorder'} -%}
+    {%- do layout.update(var('physical_layout', {})) -%}
+    {%- set layout_config = model_config.copy() -%}
+    {%- if not layout.enabled -%}
+        {%- do return(layout_config) -%}
+    {%- endif -%}
+    {%- if layout.databricks_clustering not in ['zorder', 'liquid', 'partition'] -%}
+        {{ exceptions.raise_compiler_error("Unknown databricks_clustering '" ~ layout.databricks_clustering ~ "' in the physical_layout var; use zorder, liquid or partition") }}
+    {%- endif -%}
+    {%- do layout_config.update(table_layout_config(layout, month_column)) -%}
+    {%- do return(layout_config) -%}
+{%- endmacro -%}
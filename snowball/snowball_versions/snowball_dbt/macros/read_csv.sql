@@ -19,19 +19,18 @@
 {% endmacro %}
 
 --Helper function that actually reads seed file and return specific columns based on filter criteria for get_dimension macro
+--Seed rows are memoized per filter for the whole invocation (metadata_cache.sql)
+--When the column_mapping var carries the local column_mapping.csv rows, they are used instead of querying the seed
 {%- macro get_seed_table_data(filter_value=None, index=-1, exclude_list=[]) -%}
-    {%- set site_array -%}
-        SELECT * FROM {{ ref('column_mapping') }} 
-        {% if filter_value is not none -%}
-           WHERE dimension = '{{ filter_value | lower }}'
-        {%- endif -%}
-    {%- endset -%}
+    {%- if var('column_mapping', none) is not none -%}
+        {%- do return(get_local_mapping_data(filter_value=filter_value, index=index, exclude_list=exclude_list)) -%}
+    {%- endif -%}
 
     {%- if execute -%}
-        {%- set query_results = run_query(site_array) -%}
-        {%- set col_value = query_results.columns[index].values() if index != -1 else query_results.rows -%}
+        {%- set rows = cached_seed_rows(filter_value) -%}
         {%- set results = [] -%}
-        {%- for ele in col_value -%}
+        {%- for row in rows -%}
+            {%- set ele = row[index] if index != -1 else row -%}
             {%- if ele not in exclude_list -%}
                 {%- do results.append(ele) -%}
             {%- endif -%}
@@ -42,6 +41,21 @@
     {%- endif -%}
 {%- endmacro -%}
 
+--Offline counterpart of get_seed_table_data: filters the column_mapping var rows
+--([source_column, mapped_column, dimension]) the same way the seed query does, with no warehouse I/O
+{%- macro get_local_mapping_data(filter_value=None, index=-1, exclude_list=[]) -%}
+    {%- set results = [] -%}
+    {%- for row in var('column_mapping') -%}
+        {%- if filter_value is none or row[2] == filter_value | lower -%}
+            {%- set ele = row if index == -1 else row[index] -%}
+            {%- if ele not in exclude_list -%}
+                {%- do results.append(ele) -%}
+            {%- endif -%}
+        {%- endif -%}
+    {%- endfor -%}
+    {%- do return(results) -%}
+{%- endmacro -%}
+
 -- macros/pre_run_setup.sql
 -- To create temporary tables or perform setup tasks before main operations
 {% macro pre_run_setup(db_name, schema_name, table_name) %}
@@ -11,7 +11,7 @@ WITH date_bounds AS (
     SELECT 
 
         MIN(month)                              AS StartDate
-        , DATEADD(MONTH, 12, MAX(month))        AS EndDate
+        , {{ add_months('MAX(month)', 12) }}        AS EndDate
 
     FROM {{ ref('revenue') }}
 ),
@@ -26,12 +26,12 @@ calendar AS (
 
     SELECT
 
-        DATEADD(MONTH, Number - 1, StartDate)   AS month_roll
+        {{ add_months('StartDate', 'Number - 1') }}   AS month_roll
 
     FROM date_bounds
     JOIN numbers
     ON
-        DATEADD(MONTH, Number - 1, StartDate) <= EndDate
+        {{ add_months('StartDate', 'Number - 1') }} <= EndDate
 )
 
 SELECT 
@@ -1,6 +1,7 @@
 {{ 
     config(
-        tags=['datamart']
+        tags=['datamart'],
+        **physical_layout_config(month_column='month')
         ) 
 }}
 
@@ -9,11 +9,11 @@
 WITH get_product_start_end_month AS (
 
     SELECT
-        {{ get_dimension_from_table('revenue', 'customer_level') }} 
-        , {{ get_dimension_from_table('revenue', 'product_level') }}   
-        , MIN(month) OVER (PARTITION BY  {{ get_dimension_from_table('revenue', 'customer_level') }} , {{ get_dimension_from_table('revenue', 'product_level') }} )                 AS product_start_month
-        , MAX(month) OVER (PARTITION BY  {{ get_dimension_from_table('revenue', 'customer_level') }} , {{ get_dimension_from_table('revenue', 'product_level') }} )                 AS product_end_month
-        , DATEADD(MONTH, 1, MAX(month) OVER (PARTITION BY customer_level_1, product_level_1))                                                                                       AS product_churn_month
+        {{ analysis_columns('revenue', 'customer_level') }} 
+        , {{ analysis_columns('revenue', 'product_level') }}   
+        , MIN(month) OVER (PARTITION BY  {{ analysis_columns('revenue', 'customer_level') }} , {{ analysis_columns('revenue', 'product_level') }} )                 AS product_start_month
+        , MAX(month) OVER (PARTITION BY  {{ analysis_columns('revenue', 'customer_level') }} , {{ analysis_columns('revenue', 'product_level') }} )                 AS product_end_month
+        , {{ add_months('MAX(month) OVER (PARTITION BY customer_level_1, product_level_1)', 1) }}                                                                                       AS product_churn_month
     
     FROM {{ ref('revenue') }} AS r
     WHERE
@@ -23,8 +23,8 @@ WITH get_product_start_end_month AS (
 
 SELECT
     
-    {{ get_dimension_from_table('revenue', 'customer_level') }} 
-    , {{ get_dimension_from_table('revenue', 'product_level') }}   
+    {{ analysis_columns('revenue', 'customer_level') }} 
+    , {{ analysis_columns('revenue', 'product_level') }}   
     , product_start_month
     , product_end_month
     , product_churn_month
@@ -33,8 +33,8 @@ FROM
     get_product_start_end_month
 
 GROUP BY
-    {{ get_dimension_from_table('revenue', 'customer_level') }} 
-    , {{ get_dimension_from_table('revenue', 'product_level') }}   
+    {{ analysis_columns('revenue', 'customer_level') }} 
+    , {{ analysis_columns('revenue', 'product_level') }}   
     , product_start_month
     , product_end_month
     , product_churn_month
\ No newline at end of file
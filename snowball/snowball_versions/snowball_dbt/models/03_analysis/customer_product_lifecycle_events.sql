@@ -1,8 +1,15 @@
 {{ 
     config(
-        tags=['analysis']
+        tags=['analysis'],
+        enabled=not var('fused_lifecycle', false),
+        **incremental_window_config(['customer_product_lifecycle_events_key', 'month_roll'])
         ) 
 }}
+{#- recompute_from_month() refs fact_revenue, monthly_revenue and the contracts on incremental runs only, which dbt does not see at parse time -#}
+{%- do ref('fact_revenue') %}
+{%- do ref('monthly_revenue') %}
+{%- do ref('customer_contract') %}
+{%- do ref('customer_product_contract') %}
 
 /* This stored procedure calculates product lifecycle flags by evaluating churn and existing status across different periods (monthly, quarterly, yearly, and year-to-date), based on revenue and customer lifecycle data. */
 
@@ -12,19 +19,18 @@ WITH get_churn_month_difference AS (
     SELECT
 
         m.monthly_revenue_key
-        , {{ get_dimension_from_table('period_revenue', 'customer_level', 'm') }} 
-        , {{ get_dimension_from_table('period_revenue', 'product_level', 'm') }} 
+        , {{ analysis_columns('period_revenue', 'customer_level', 'm') }} 
+        , {{ analysis_columns('period_revenue', 'product_level', 'm') }} 
         , m.month_roll
         , m.ytd_helper
         , p.product_start_month
         , p.product_end_month
         , p.product_churn_month
-        , c.lm_customer_existing_flag
-        , c.l3m_customer_existing_flag
-        , c.ltm_customer_existing_flag
-        , c.ytd_customer_existing_flag
-        , DATEDIFF(MONTH, p.product_start_month, m.month_roll)       AS product_start_month_difference
-        , DATEDIFF(MONTH, p.product_churn_month, m.month_roll)       AS product_churn_month_difference
+        {%- for period in enabled_periods() %}
+        , c.{{ period }}_customer_existing_flag
+        {%- endfor %}
+        , {{ month_diff('p.product_start_month', 'm.month_roll') }}       AS product_start_month_difference
+        , {{ month_diff('p.product_churn_month', 'm.month_roll') }}       AS product_churn_month_difference
 
     FROM 
         {{ ref('monthly_revenue') }} AS m
@@ -32,16 +38,20 @@ WITH get_churn_month_difference AS (
     INNER JOIN 
         {{ ref('customer_product_contract') }} AS p
         ON
-        {{ get_join_conditions('customer_product_contract', 'customer_level', 'm', 'p') }}
+        {{ analysis_join_conditions('customer_product_contract', 'customer_level', 'm', 'p') }}
         AND 
-        {{ get_join_conditions('customer_product_contract', 'product_level', 'm', 'p') }}
+        {{ analysis_join_conditions('customer_product_contract', 'product_level', 'm', 'p') }}
 
     INNER JOIN 
         {{ ref('customer_lifecycle_events') }} AS c
         ON m.monthly_revenue_key = c.customer_lifecycle_events_key
         AND m.month_roll = c.month_roll
         AND 
-        {{ get_join_conditions('customer_product_contract', 'customer_level', 'm', 'c') }} 
+        {{ analysis_join_conditions('customer_product_contract', 'customer_level', 'm', 'c') }} 
+    {% if incremental_run() %}
+    WHERE
+        m.month_roll >= {{ recompute_from_month() }}
+    {% endif %}
 )
 
 , product_lifecycle_flags AS (
@@ -49,10 +59,11 @@ WITH get_churn_month_difference AS (
     SELECT
 
         monthly_revenue_key
-        , {{ get_dimension_from_table('period_revenue', 'customer_level') }} 
-        , {{ get_dimension_from_table('period_revenue', 'product_level') }}         
+        , {{ analysis_columns('period_revenue', 'customer_level') }} 
+        , {{ analysis_columns('period_revenue', 'product_level') }}         
         , month_roll      
 
+        {% if period_enabled('lm') %}
         -- Monthly flags
         , CASE 
             WHEN lm_customer_existing_flag = 1
@@ -67,7 +78,9 @@ WITH get_churn_month_difference AS (
             THEN 1 
             ELSE 0 
         END AS lm_product_churn_flag      
+        {% endif %}
 
+        {% if period_enabled('l3m') %}
         -- Quarterly flags
         , CASE 
             WHEN l3m_customer_existing_flag = 1 
@@ -83,7 +96,9 @@ WITH get_churn_month_difference AS (
             THEN 1 
             ELSE 0 
         END AS l3m_product_churn_flag    
+        {% endif %}
 
+        {% if period_enabled('ltm') %}
         -- Yearly flags
         , CASE 
             WHEN ltm_customer_existing_flag = 1 
@@ -99,7 +114,9 @@ WITH get_churn_month_difference AS (
             THEN 1 
             ELSE 0 
         END AS ltm_product_churn_flag      
+        {% endif %}
           
+        {% if period_enabled('ytd') %}
         -- YTD flags
         , CASE 
             WHEN ytd_customer_existing_flag = 1 
@@ -115,6 +132,7 @@ WITH get_churn_month_difference AS (
             THEN 1 
             ELSE 0 
         END AS ytd_product_churn_flag
+        {% endif %}
 
     FROM get_churn_month_difference
     
@@ -123,20 +141,28 @@ WITH get_churn_month_difference AS (
 SELECT
 
     monthly_revenue_key         AS customer_product_lifecycle_events_key
-    , {{ get_dimension_from_table('period_revenue', 'customer_level') }} 
-    , {{ get_dimension_from_table('period_revenue', 'product_level') }}     
+    , {{ analysis_columns('period_revenue', 'customer_level') }} 
+    , {{ analysis_columns('period_revenue', 'product_level') }}     
     , month_roll
+    {% if period_enabled('lm') %}
     , lm_product_churn_flag
     , lm_product_existing_flag
+    {% endif %}
 
+    {% if period_enabled('l3m') %}
     , l3m_product_churn_flag
     , l3m_product_existing_flag
+    {% endif %}
 
+    {% if period_enabled('ltm') %}
     , ltm_product_churn_flag
     , ltm_product_existing_flag
+    {% endif %}
     
+    {% if period_enabled('ytd') %}
     , ytd_product_churn_flag
     , ytd_product_existing_flag
+    {% endif %}
 
 FROM 
     product_lifecycle_flags
\ No newline at end of file
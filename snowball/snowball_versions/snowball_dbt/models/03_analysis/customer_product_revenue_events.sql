@@ -1,8 +1,16 @@
 {{ 
     config(
-        tags=['analysis']
+        tags=['analysis'],
+        enabled=not var('fused_lifecycle', false),
+        **incremental_window_config(['customer_product_revenue_events_key', 'month_roll'])
         ) 
 }}
+{#- recompute_from_month() refs fact_revenue, monthly_revenue and the contracts on incremental runs only, which dbt does not see at parse time -#}
+{%- do ref('fact_revenue') %}
+{%- do ref('monthly_revenue') %}
+{%- do ref('customer_contract') %}
+{%- do ref('customer_product_contract') %}
+{% set customer_grain = analysis_grain_column('customer') %}
  
  /* This model calculates flags for revenue events by assessing product growth and decline across various periods (monthly, quarterly, yearly, and year-to-date), joining revenue data with customer and product lifecycle information to identify cross-sell, upsell, and downsell activities. */
 
@@ -11,16 +19,16 @@
         SELECT
 
             period_revenue_key
-            , {{ get_dimension_from_table('period_revenue', 'customer') }} 
-            , {{ get_dimension_from_table('period_revenue', 'product') }} 
-            , {{ get_dimension_from_table('period_revenue', 'other_key') }} 
+            , {{ analysis_columns('period_revenue', 'customer') }} 
+            , {{ analysis_columns('period_revenue', 'product') }} 
+            , {{ analysis_columns('period_revenue', 'other_key') }} 
             , month_roll
             , arr
-            , arr_lm
-            , arr_l3m
-            , arr_ltm
-            , arr_ytd
+            {%- for period in enabled_periods() %}
+            , arr_{{ period }}
+            {%- endfor %}
 
+            {% if period_enabled('lm') %}
             --MONTHLY GREW
             , CASE
                 WHEN sum_arr_lm_delta > 0 THEN 1
@@ -30,6 +38,8 @@
                 WHEN sum_arr_lm_delta < 0 THEN 1
                 ELSE 0
             END AS product_declined_monthly            
+            {% endif %}
+            {% if period_enabled('l3m') %}
             --QUARTERLY GREW
             , CASE
                 WHEN sum_arr_l3m_delta > 0 THEN 1
@@ -39,6 +49,8 @@
                 WHEN sum_arr_l3m_delta < 0 THEN 1
                 ELSE 0
             END AS product_declined_quarterly           
+            {% endif %}
+            {% if period_enabled('ltm') %}
             --YEARLY GREW
             , CASE
                 WHEN sum_arr_ltm_delta > 0 THEN 1
@@ -48,6 +60,8 @@
                 WHEN sum_arr_ltm_delta < 0 THEN 1
                 ELSE 0
             END AS product_declined_yearly            
+            {% endif %}
+            {% if period_enabled('ytd') %}
             --ytd GREW
             , CASE
                 WHEN sum_arr_ytd_delta > 0 THEN 1
@@ -57,6 +71,7 @@
                 WHEN sum_arr_ytd_delta < 0 THEN 1
                 ELSE 0
             END AS product_declined_ytd
+            {% endif %}
 
         FROM {{ ref('period_revenue') }}
 
@@ -67,24 +82,23 @@
         SELECT 
 
             p1.period_revenue_key
-            , {{ get_dimension_from_table('period_revenue', 'customer', 'p1') }} 
-            , {{ get_dimension_from_table('period_revenue', 'product', 'p1') }} 
-            , {{ get_dimension_from_table('period_revenue', 'other_key', 'p1') }}   
+            , {{ analysis_columns('period_revenue', 'customer', 'p1') }} 
+            , {{ analysis_columns('period_revenue', 'product', 'p1') }} 
+            , {{ analysis_columns('period_revenue', 'other_key', 'p1') }}   
             , p1.arr
-            , p1.arr_lm
-            , p1.arr_l3m
-            , p1.arr_ltm
-            , p1.arr_ytd
+            {%- for period in enabled_periods() %}
+            , p1.arr_{{ period }}
+            {%- endfor %}
             , p1.month_roll
             , c.lm_customer_new_flag
-            , c.l3m_customer_new_flag
-            , c.ltm_customer_new_flag
-            , c.ytd_customer_new_flag
-            , c.lm_customer_churn_flag
-            , c.l3m_customer_churn_flag
-            , c.ltm_customer_churn_flag
-            , c.ytd_customer_churn_flag
-
+            {%- for period in enabled_periods() if period != 'lm' %}
+            , c.{{ period }}_customer_new_flag
+            {%- endfor %}
+            {%- for period in enabled_periods() %}
+            , c.{{ period }}_customer_churn_flag
+            {%- endfor %}
+
+            {% if period_enabled('lm') %}
             -- MONTHLY FLAGS
             , CASE
                 WHEN lm_customer_existing_flag = 1
@@ -104,7 +118,9 @@
                 THEN 1
                 ELSE 0
             END AS lm_downsell_flag 
+            {% endif %}
 
+            {% if period_enabled('l3m') %}
             -- QUARTERLY FLAGS
             , CASE
                 WHEN l3m_customer_existing_flag = 1
@@ -124,7 +140,9 @@
                 THEN 1
                 ELSE 0
             END AS l3m_downsell_flag 
+            {% endif %}
 
+            {% if period_enabled('ltm') %}
             -- YEARLY FLAGS
             , CASE
                 WHEN ltm_customer_existing_flag = 1
@@ -144,7 +162,9 @@
                 THEN 1
                 ELSE 0
             END AS ltm_downsell_flag 
+            {% endif %}
 
+            {% if period_enabled('ytd') %}
             -- ytd FLAGS
             , CASE
                 WHEN ytd_customer_existing_flag = 1
@@ -164,6 +184,7 @@
                 THEN 1
                 ELSE 0
             END AS ytd_downsell_flag
+            {% endif %}
         
         FROM product_grew AS p1
 
@@ -175,33 +196,51 @@
             AND p1.month_roll = p2.month_roll
         INNER JOIN {{ ref('customer_product_contract') }} AS p3
             ON  
-            {{ get_join_conditions('customer_product_contract', 'customer_level', 'p1', 'p3') }}
+            {{ analysis_join_conditions('customer_product_contract', 'customer_level', 'p1', 'p3') }}
             AND 
-            {{ get_join_conditions('customer_product_contract', 'product_level', 'p1', 'p3') }} 
+            {{ analysis_join_conditions('customer_product_contract', 'product_level', 'p1', 'p3') }} 
 
     )
 
+{% if incremental_run() %}
+-- Only the recomputed months are evaluated and written; the previous / next non-zero month lookups still search
+-- the whole history, as the gap before a month can be longer than any fixed lookback
+, recomputed_product AS (
+
+    SELECT
+        *
+    FROM
+        ranked_product
+    WHERE
+        month_roll >= {{ recompute_from_month() }}
+
+)
+{% set current_rows = 'recomputed_product' %}
+{% else %}
+{% set current_rows = 'ranked_product' %}
+{% endif %}
+
 -- Logic for Intermittent_churn , Winback , deactivation, reactivaiton helper columns
 
 , find_next_nonzero_month AS (
 
     SELECT 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MIN(next_plan.month_roll) AS next_nonzero_month -- finding next non zero month, so can get possible winback dates
 
     FROM 
-        ranked_product AS current_plan
+        {{ current_rows }} AS current_plan
 
     LEFT JOIN 
         ranked_product AS next_plan 
-        ON current_plan.customer_level_1 = next_plan.customer_level_1 
+        ON current_plan.{{ customer_grain }} = next_plan.{{ customer_grain }} 
         AND next_plan.arr != 0 
         AND next_plan.month_roll > current_plan.month_roll
     WHERE
         current_plan.lm_customer_new_flag = 0
     GROUP BY 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
 
 )
@@ -210,41 +249,42 @@
 
     SELECT DISTINCT 
 
-         current_plan.customer_level_1
+         current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MAX(prev_plan.month_roll) AS prev_nonzero_month  -- will get possible intermittent churn dates
     
     FROM 
-        ranked_product AS current_plan
+        {{ current_rows }} AS current_plan
     LEFT JOIN 
         ranked_product AS prev_plan 
-        ON current_plan.customer_level_1 = prev_plan.customer_level_1
+        ON current_plan.{{ customer_grain }} = prev_plan.{{ customer_grain }}
         AND prev_plan.arr <> 0
         AND prev_plan.month_roll < current_plan.month_roll
     GROUP BY 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
 
 )
 
+{% if period_enabled('l3m') %}
 , find_next_nonzero_month_l3m AS (
 
     SELECT 
     
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MIN(next_plan.month_roll) AS next_nonzero_month_l3m -- finding next non zero month, so can get possible winback dates
     FROM 
-        ranked_product AS current_plan
+        {{ current_rows }} AS current_plan
     LEFT JOIN 
         ranked_product AS next_plan 
-        ON current_plan.customer_level_1 = next_plan.customer_level_1 
+        ON current_plan.{{ customer_grain }} = next_plan.{{ customer_grain }} 
         AND next_plan.arr_l3m != 0 
         AND next_plan.month_roll > current_plan.month_roll
     WHERE
         current_plan.l3m_customer_new_flag = 0
     GROUP BY 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
 
 )
@@ -253,44 +293,46 @@
 
     SELECT DISTINCT 
         
-         current_plan.customer_level_1
+         current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MAX(prev_plan.month_roll) AS prev_nonzero_month_l3m  -- will get possible intermittent churn dates
     
-    FROM ranked_product AS current_plan
+    FROM {{ current_rows }} AS current_plan
 
     LEFT JOIN 
         ranked_product AS prev_plan 
-        ON current_plan.customer_level_1 = prev_plan.customer_level_1
+        ON current_plan.{{ customer_grain }} = prev_plan.{{ customer_grain }}
         AND prev_plan.arr_l3m <> 0
         AND prev_plan.month_roll < current_plan.month_roll
 
     GROUP BY 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
 
 )
+{% endif %}
 
+{% if period_enabled('ltm') %}
 , find_next_nonzero_month_ltm AS (
 
     SELECT 
 
-         current_plan.customer_level_1
+         current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MIN(next_plan.month_roll) AS next_nonzero_month_ltm -- finding next non zero month, so can get possible winback dates
 
-    FROM ranked_product AS current_plan
+    FROM {{ current_rows }} AS current_plan
 
     LEFT JOIN
        ranked_product AS next_plan 
-    ON current_plan.customer_level_1 = next_plan.customer_level_1 
+    ON current_plan.{{ customer_grain }} = next_plan.{{ customer_grain }} 
         AND next_plan.arr_ltm != 0 
         AND next_plan.month_roll > current_plan.month_roll
 
     WHERE  current_plan.ltm_customer_new_flag = 0
     
     GROUP BY 
-            current_plan.customer_level_1
+            current_plan.{{ customer_grain }}
             , current_plan.month_roll
 
 )
@@ -300,42 +342,44 @@
 
     SELECT DISTINCT 
     
-         current_plan.customer_level_1
+         current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MAX(prev_plan.month_roll) AS prev_nonzero_month_ltm  -- will get possible intermittent churn dates
 
     FROM 
-        ranked_product AS current_plan
+        {{ current_rows }} AS current_plan
     LEFT JOIN 
         ranked_product AS prev_plan 
-        ON current_plan.customer_level_1 = prev_plan.customer_level_1 
+        ON current_plan.{{ customer_grain }} = prev_plan.{{ customer_grain }} 
         AND prev_plan.arr_ltm <> 0
         AND prev_plan.month_roll < current_plan.month_roll
     GROUP BY 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
 
 )
+{% endif %}
 
+{% if period_enabled('ytd') %}
 , find_next_nonzero_month_ytd AS (
 
     SELECT 
 
-         current_plan.customer_level_1
+         current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MIN(next_plan.month_roll) AS next_nonzero_month_ytd -- finding next non zero month, so can get possible winback dates
 
     FROM 
-        ranked_product AS current_plan
+        {{ current_rows }} AS current_plan
     LEFT JOIN
        ranked_product AS next_plan 
-        ON current_plan.customer_level_1 = next_plan.customer_level_1 
+        ON current_plan.{{ customer_grain }} = next_plan.{{ customer_grain }} 
         AND next_plan.arr_ytd != 0 
         AND next_plan.month_roll > current_plan.month_roll
     WHERE  
         current_plan.ytd_customer_new_flag = 0
     GROUP BY 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
 
 )
@@ -345,22 +389,23 @@
 
     SELECT DISTINCT 
     
-         current_plan.customer_level_1
+         current_plan.{{ customer_grain }}
         , current_plan.month_roll
         , MAX(prev_plan.month_roll) AS prev_nonzero_month_ytd  -- will get possible intermittent churn dates
 
     FROM 
-        ranked_product AS current_plan
+        {{ current_rows }} AS current_plan
     LEFT JOIN 
         ranked_product AS prev_plan 
-        ON current_plan.customer_level_1 = prev_plan.customer_level_1 
+        ON current_plan.{{ customer_grain }} = prev_plan.{{ customer_grain }} 
         AND prev_plan.arr_ytd <> 0
         AND prev_plan.month_roll < current_plan.month_roll
     GROUP BY 
-        current_plan.customer_level_1
+        current_plan.{{ customer_grain }}
         , current_plan.month_roll
 
 )
+{% endif %}
 
 , pre_final AS (
 
@@ -368,47 +413,59 @@
          rp.*
         , fn.next_nonzero_month 
         , fp.prev_nonzero_month
+        {% if period_enabled('l3m') %}
         , fn3m.next_nonzero_month_l3m
         , fp3m.prev_nonzero_month_l3m
+        {% endif %}
+        {% if period_enabled('ltm') %}
         , fnm.next_nonzero_month_ltm
         , fpm.prev_nonzero_month_ltm
+        {% endif %}
+        {% if period_enabled('ytd') %}
         , fntd.next_nonzero_month_ytd
         , fptd.prev_nonzero_month_ytd
+        {% endif %}
     
     FROM 
-        ranked_product  AS rp                                    -- will get possible dates of churn winback in one table
+        {{ current_rows }}  AS rp                                    -- will get possible dates of churn winback in one table
     LEFT JOIN 
         find_next_nonzero_month AS fn 
-        ON rp.customer_level_1=fn.customer_level_1
+        ON rp.{{ customer_grain }}=fn.{{ customer_grain }}
         AND rp.month_roll=fn.month_roll
     LEFT JOIN 
         find_prev_nonzero_month AS fp
-        ON rp.customer_level_1=fp.customer_level_1
+        ON rp.{{ customer_grain }}=fp.{{ customer_grain }}
         AND rp.month_roll=fp.month_roll
+    {% if period_enabled('l3m') %}
     LEFT JOIN 
         find_next_nonzero_month_l3m AS fn3m 
-        ON rp.customer_level_1=fn3m.customer_level_1
+        ON rp.{{ customer_grain }}=fn3m.{{ customer_grain }}
         AND rp.month_roll=fn3m.month_roll
         LEFT JOIN 
         find_prev_nonzero_month_l3m AS fp3m
-        ON rp.customer_level_1=fp3m.customer_level_1
+        ON rp.{{ customer_grain }}=fp3m.{{ customer_grain }}
         AND rp.month_roll=fp3m.month_roll
+    {% endif %}
+    {% if period_enabled('ltm') %}
     LEFT JOIN 
         find_next_nonzero_month_ltm AS fnm
-        ON rp.customer_level_1=fnm.customer_level_1
+        ON rp.{{ customer_grain }}=fnm.{{ customer_grain }}
         AND rp.month_roll=fnm.month_roll
     LEFT JOIN 
         find_prev_nonzero_month_ltm AS fpm
-        ON rp.customer_level_1=fpm.customer_level_1
+        ON rp.{{ customer_grain }}=fpm.{{ customer_grain }}
         AND rp.month_roll=fpm.month_roll
+    {% endif %}
+    {% if period_enabled('ytd') %}
     LEFT JOIN 
         find_next_nonzero_month_ytd AS fntd
-        ON rp.customer_level_1=fntd.customer_level_1
+        ON rp.{{ customer_grain }}=fntd.{{ customer_grain }}
         AND rp.month_roll=fntd.month_roll
     LEFT JOIN 
         find_prev_nonzero_month_ytd AS fptd
-    ON rp.customer_level_1=fptd.customer_level_1
+    ON rp.{{ customer_grain }}=fptd.{{ customer_grain }}
         AND rp.month_roll=fptd.month_roll
+    {% endif %}
         
 )
 
@@ -418,75 +475,81 @@
         *
     --creating a flag column bsaed on conditions with date difference
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) = 0  
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month AS DATE),CAST(next_nonzero_month AS DATE))-2 = 1
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) = 0  
+                AND {{ month_diff('CAST(prev_nonzero_month AS DATE)', 'CAST(next_nonzero_month AS DATE)') }}-2 = 1
             THEN 1
             ELSE 0
          END AS deactivation_helper
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0 
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month AS DATE),CAST(month_roll AS DATE))-2 = 1
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0 
+                AND {{ month_diff('CAST(prev_nonzero_month AS DATE)', 'CAST(month_roll AS DATE)') }}-2 = 1
             THEN 1
             ELSE 0
          END AS reactivation_helper
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) =0  
-                 AND DATEDIFF(MONTH,CAST(prev_nonzero_month AS DATE),CAST(next_nonzero_month AS DATE))-1> 3
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) =0  
+                 AND {{ month_diff('CAST(prev_nonzero_month AS DATE)', 'CAST(next_nonzero_month AS DATE)') }}-1> 3
             THEN 1
             ELSE 0
          END AS intermittent_churn_helper
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0  
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month AS DATE),CAST(month_roll AS DATE))-1 > 3
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0  
+                AND {{ month_diff('CAST(prev_nonzero_month AS DATE)', 'CAST(month_roll AS DATE)') }}-1 > 3
             THEN 1
             ELSE 0
          END AS winback_helper
+         {% if period_enabled('l3m') %}
          , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0  
-                AND (SUM(arr_l3m) OVER (PARTITION BY customer_level_1,month_roll))  = 0  
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month_l3m AS DATE),CAST(next_nonzero_month_l3m AS DATE)) -1 > 3
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0  
+                AND (SUM(arr_l3m) OVER (PARTITION BY {{ customer_grain }},month_roll))  = 0  
+                AND {{ month_diff('CAST(prev_nonzero_month_l3m AS DATE)', 'CAST(next_nonzero_month_l3m AS DATE)') }} -1 > 3
             THEN 1
             ELSE 0
          END AS l3m_winback_helper
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0 
-                AND (SUM(arr_l3m) OVER (PARTITION BY customer_level_1,month_roll))  = 0 
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month_l3m AS DATE),CAST(next_nonzero_month_l3m AS DATE)) -2 = 1
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0 
+                AND (SUM(arr_l3m) OVER (PARTITION BY {{ customer_grain }},month_roll))  = 0 
+                AND {{ month_diff('CAST(prev_nonzero_month_l3m AS DATE)', 'CAST(next_nonzero_month_l3m AS DATE)') }} -2 = 1
             THEN 1
             ELSE 0
          END AS l3m_reactivation_helper
+         {% endif %}
 
+        {% if period_enabled('ltm') %}
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0  
-                AND (SUM(arr_ltm) OVER (PARTITION BY customer_level_1,month_roll))  = 0  
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month_ltm AS DATE),CAST(next_nonzero_month_ltm AS DATE)) -1 > 3
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0  
+                AND (SUM(arr_ltm) OVER (PARTITION BY {{ customer_grain }},month_roll))  = 0  
+                AND {{ month_diff('CAST(prev_nonzero_month_ltm AS DATE)', 'CAST(next_nonzero_month_ltm AS DATE)') }} -1 > 3
             THEN 1
             ELSE 0
          END AS ltm_winback_helper
 
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0 
-                AND (SUM(arr_ltm) OVER (PARTITION BY customer_level_1,month_roll))  = 0 
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month_ltm AS DATE),CAST(next_nonzero_month_ltm AS DATE)) -2 = 1
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0 
+                AND (SUM(arr_ltm) OVER (PARTITION BY {{ customer_grain }},month_roll))  = 0 
+                AND {{ month_diff('CAST(prev_nonzero_month_ltm AS DATE)', 'CAST(next_nonzero_month_ltm AS DATE)') }} -2 = 1
             THEN 1
             ELSE 0
          END AS ltm_reactivation_helper
+        {% endif %}
 
+         {% if period_enabled('ytd') %}
          , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0  
-                AND (SUM(arr_ytd) OVER (PARTITION BY customer_level_1,month_roll))  = 0  
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month_ytd AS DATE),CAST(next_nonzero_month_ytd AS DATE)) -1 > 3
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0  
+                AND (SUM(arr_ytd) OVER (PARTITION BY {{ customer_grain }},month_roll))  = 0  
+                AND {{ month_diff('CAST(prev_nonzero_month_ytd AS DATE)', 'CAST(next_nonzero_month_ytd AS DATE)') }} -1 > 3
             THEN 1
             ELSE 0
          END AS ytd_winback_helper
 
         , CASE
-            WHEN (SUM(arr) OVER (PARTITION BY customer_level_1,month_roll)) <>0 
-                AND (SUM(arr_ytd) OVER (PARTITION BY customer_level_1,month_roll))  = 0 
-                AND DATEDIFF(MONTH,CAST(prev_nonzero_month_ytd AS DATE),CAST(next_nonzero_month_ytd AS DATE)) -2 = 1
+            WHEN (SUM(arr) OVER (PARTITION BY {{ customer_grain }},month_roll)) <>0 
+                AND (SUM(arr_ytd) OVER (PARTITION BY {{ customer_grain }},month_roll))  = 0 
+                AND {{ month_diff('CAST(prev_nonzero_month_ytd AS DATE)', 'CAST(next_nonzero_month_ytd AS DATE)') }} -2 = 1
             THEN 1
             ELSE 0
          END AS ytd_reactivation_helper
+         {% endif %}
 
     FROM pre_final  
 
@@ -496,15 +559,16 @@
 SELECT
 
     period_revenue_key                  AS customer_product_revenue_events_key
-    , {{ get_dimension_from_table('period_revenue', 'customer') }} 
-    , {{ get_dimension_from_table('monthly_revenue', 'product') }} 
-    , {{ get_dimension_from_table('monthly_revenue', 'other_key') }}
+    , {{ analysis_columns('period_revenue', 'customer') }} 
+    , {{ analysis_columns('monthly_revenue', 'product') }} 
+    , {{ analysis_columns('monthly_revenue', 'other_key') }}
     , month_roll
     , winback_helper
     , deactivation_helper
     , reactivation_helper
     , intermittent_churn_helper
 
+    {% if period_enabled('lm') %}
     , CASE 
         WHEN  winback_helper = 0  AND deactivation_helper = 0
             AND reactivation_helper = 0 AND intermittent_churn_helper = 0 
@@ -523,6 +587,8 @@ SELECT
         THEN lm_downsell_flag
         ELSE 0
     END lm_downsell_flag
+    {% endif %}
+    {% if period_enabled('l3m') %}
     , l3m_reactivation_helper
     , l3m_winback_helper
     , CASE 
@@ -543,6 +609,8 @@ SELECT
         THEN l3m_downsell_flag
         ELSE 0
     END l3m_downsell_flag
+    {% endif %}
+    {% if period_enabled('ltm') %}
     , ltm_reactivation_helper
     , ltm_winback_helper
     , CASE 
@@ -563,6 +631,8 @@ SELECT
         THEN ltm_downsell_flag
         ELSE 0
     END ltm_downsell_flag
+    {% endif %}
+    {% if period_enabled('ytd') %}
     , ytd_reactivation_helper
     , ytd_winback_helper
     , CASE 
@@ -583,6 +653,7 @@ SELECT
         THEN ytd_downsell_flag
         ELSE 0
     END ytd_downsell_flag
+    {% endif %}
 
 FROM
     customer_product_revenue_events
\ No newline at end of file
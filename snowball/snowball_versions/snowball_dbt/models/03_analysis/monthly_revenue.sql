@@ -1,12 +1,144 @@
 {{ 
     config(
-        tags=['analysis']
+        tags=['analysis'],
+        **physical_layout_config(incremental_config(['monthly_revenue_key', 'month_roll']))
         ) 
 }}
 
 /* This model processes revenue data by joining it with customer contract information to calculate and aggregate ARR (Annual Recurring Revenue) across different months.*/
 
-WITH date_joins AS (
+/* Incremental runs (snowball_incremental: true) recompute only the (customer_key, product_key) pairs whose fact rows
+   were added or changed since the last run. A pair's full history is read, since its segments, churn month and
+   12-month ARR windows span all of it, but only the rows from the first month that can differ are merged.
+   Deleted fact rows stop the run (assert_no_deleted_revenue) and changed dimension attributes are not picked up:
+   run with --full-refresh after either. */
+
+WITH
+{% if incremental_run() %}
+{%- do assert_no_deleted_revenue() %}
+fact_months AS (
+
+    SELECT
+        revenue_key
+        , customer_key
+        , product_key
+        , month
+        , SUM(mrr)                  AS mrr
+        , SUM(volume)               AS volume
+    FROM {{ ref('fact_revenue') }}
+    WHERE
+        revenue <> 0.00
+    GROUP BY
+        revenue_key
+        , customer_key
+        , product_key
+        , month
+
+)
+
+, stored_months AS (
+
+    SELECT
+        monthly_revenue_key
+        , customer_key
+        , product_key
+        , month_roll
+        , SUM(mrr)                  AS mrr
+        , SUM(volume)               AS volume
+    FROM {{ this }}
+    GROUP BY
+        monthly_revenue_key
+        , customer_key
+        , product_key
+        , month_roll
+
+)
+
+-- Months whose revenue differs from the stored table, including months that were never stored
+, changed_months AS (
+
+    SELECT
+        COALESCE(f.revenue_key, s.monthly_revenue_key) AS revenue_key
+        , COALESCE(f.customer_key, s.customer_key)      AS customer_key
+        , COALESCE(f.product_key, s.product_key)        AS product_key
+        , COALESCE(f.month, s.month_roll)               AS month
+    FROM fact_months AS f
+    FULL OUTER JOIN stored_months AS s
+        ON f.revenue_key = s.monthly_revenue_key
+        AND f.month = s.month_roll
+    WHERE
+        s.monthly_revenue_key IS NULL
+        OR COALESCE(f.mrr, 0) <> s.mrr
+        OR COALESCE(f.volume, 0) <> s.volume
+
+)
+
+, stored_churn_month AS (
+
+    SELECT
+        customer_key
+        , product_key
+        , MAX(month_roll)           AS product_churn_month
+    FROM
+        stored_months
+    WHERE
+        mrr <> 0.0
+    GROUP BY
+        customer_key
+        , product_key
+
+)
+
+-- Last stored month of each revenue key: the end of its old scaffold
+, stored_key_end AS (
+
+    SELECT
+        monthly_revenue_key
+        , MAX(month_roll)           AS scaffold_end_month
+    FROM
+        stored_months
+    GROUP BY
+        monthly_revenue_key
+
+)
+
+-- Rows before the first changed month only change when the churn month moves, so the merge starts at the earlier of the two.
+-- A key with revenue again after its old scaffold ended gets new rows from the month after that end; the churn month
+-- does not cover them when the pair has no MRR (non-recurring only) or its churn month falls after that end
+, changed_pairs AS (
+
+    SELECT
+        m.customer_key
+        , m.product_key
+        , CASE
+            WHEN MIN(s.product_churn_month) < MIN(m.first_new_month) THEN MIN(s.product_churn_month)
+            ELSE MIN(m.first_new_month)
+        END AS recompute_from_month
+    FROM (
+        SELECT
+            c.customer_key
+            , c.product_key
+            , CASE
+                WHEN k.scaffold_end_month < c.month THEN {{ add_months('k.scaffold_end_month', 1) }}
+                ELSE c.month
+            END AS first_new_month
+        FROM changed_months AS c
+        LEFT JOIN stored_key_end AS k
+            ON c.revenue_key = k.monthly_revenue_key
+    ) AS m
+    LEFT JOIN stored_churn_month AS s
+        ON m.customer_key = s.customer_key
+        AND m.product_key = s.product_key
+    GROUP BY
+        m.customer_key
+        , m.product_key
+
+)
+
+, date_joins AS (
+{% else %}
+date_joins AS (
+{% endif %}
 
     SELECT
     
@@ -19,6 +151,14 @@ WITH date_joins AS (
         , r.volume
         , MIN(month) OVER (PARTITION BY revenue_key)        AS segment_start_month
         , MAX(month) OVER (PARTITION BY revenue_key)        AS segment_end_month
+    {% if is_narrow_mode() %}
+        -- Narrow mode: the scaffolded rows carry the dimension keys only
+        , r.customer_key
+        , r.product_key
+        , r.other_key
+
+    FROM {{ ref('fact_revenue') }} AS r
+    {% else %}
         , c.*
         , p.*
         , o.*
@@ -33,42 +173,76 @@ WITH date_joins AS (
     LEFT JOIN 
         {{ ref('dim_other') }} AS o
     ON r.other_key = o.other_key
+    {% endif %}
+    {% if incremental_run() %}
+    INNER JOIN 
+        changed_pairs AS cp
+    ON r.customer_key = cp.customer_key
+    AND r.product_key = cp.product_key
+    {% endif %}
     WHERE
         r.revenue <> 0.00
 
 )
 
--- Filling in the gaps for each customer with 0 revenue whenever a record of revenue for a customer on a month is not available
-, date_scaffolding AS (
+-- One row per revenue key and revenue type, with the months it is scaffolded over: its first revenue month to 12 months after its last
+, segment_bounds AS (
+
+    SELECT DISTINCT
+
+        revenue_key
+        , revenue_type
+        , {{ analysis_columns('revenue', 'customer') }} 
+        , {{ analysis_columns('revenue', 'product') }} 
+        , {{ analysis_columns('revenue', 'other') }} 
+        , segment_start_month
+        , {{ add_months('segment_end_month', 12) }}     AS segment_scaffold_end_month
+
+    FROM date_joins
+
+)
+
+, revenue_months AS (
 
     SELECT
 
         revenue_key
         , revenue_type
-        , {{ get_dimension_from_table('revenue', 'customer') }} 
-        , {{ get_dimension_from_table('revenue', 'product') }} 
-        , {{ get_dimension_from_table('revenue', 'other') }} 
-        , c.month_roll
-        , CASE
-            WHEN
-                c.month_roll > d.month
-                OR c.month_roll <> d.month
-                THEN 0
-            ELSE d.volume
-        END AS volume
-        , CASE
-            WHEN
-                c.month_roll > d.month
-                OR c.month_roll <> d.month
-                THEN 0
-            ELSE d.mrr
-        END AS mrr
+        , month
+        , SUM(mrr)                  AS mrr
+        , SUM(volume)               AS volume
 
-    FROM {{ ref('dim_calendar') }} AS c
+    FROM date_joins
+    GROUP BY
+        revenue_key
+        , revenue_type
+        , month
+
+)
+
+-- Filling in the gaps for each customer with 0 revenue whenever a record of revenue for a customer on a month is not available.
+-- The months are generated once per revenue key (month_scaffold), then the revenue of each month is joined back in
+, date_scaffolding AS (
 
-    INNER JOIN date_joins AS d
-        ON c.month_roll <= DATEADD(MONTH,12, d.segment_end_month) 
-        AND c.month_roll >= d.segment_start_month
+    SELECT
+
+        s.revenue_key
+        , s.revenue_type
+        , {{ analysis_columns('revenue', 'customer', 's') }} 
+        , {{ analysis_columns('revenue', 'product', 's') }} 
+        , {{ analysis_columns('revenue', 'other', 's') }} 
+        , s.month_roll
+        , COALESCE(f.volume, 0)     AS volume
+        , COALESCE(f.mrr, 0)        AS mrr
+
+    FROM (
+        {{ month_scaffold('segment_bounds', 'segment_start_month', 'segment_scaffold_end_month') }}
+    ) AS s
+
+    LEFT JOIN revenue_months AS f
+        ON s.revenue_key = f.revenue_key
+        AND (s.revenue_type = f.revenue_type OR (s.revenue_type IS NULL AND f.revenue_type IS NULL))
+        AND s.month_roll = f.month
 
 )
 
@@ -79,23 +253,16 @@ WITH date_joins AS (
 
         revenue_key                                                                         AS monthly_revenue_key
         , revenue_type
-        , {{ get_dimension_from_table('revenue', 'customer') }} 
-        , {{ get_dimension_from_table('revenue', 'product') }} 
-        , {{ get_dimension_from_table('revenue', 'other') }} 
+        , {{ analysis_columns('revenue', 'customer') }} 
+        , {{ analysis_columns('revenue', 'product') }} 
+        , {{ analysis_columns('revenue', 'other') }} 
         , month_roll
-        , SUM(mrr)                  AS mrr
-        , SUM(volume)               AS volume
+        , mrr
+        , volume
         -- Add 1 back to YTD year start here so YTD start aligns with month selected i.e. 4 = start in April
-        , {{ extract_date_part("MONTH", "DATEADD(MONTH, -" ~ var('ytd_year_start') ~ " + 1, month_roll)") }} AS ytd_helper
+        , {{ extract_date_part("MONTH", add_months('month_roll', 1 - var('ytd_year_start'))) }} AS ytd_helper
     FROM 
         date_scaffolding
-    GROUP BY
-        revenue_key
-        , {{ get_dimension_from_table('revenue', 'customer') }} 
-        , {{ get_dimension_from_table('revenue', 'product') }} 
-        , {{ get_dimension_from_table('revenue', 'other') }} 
-        , month_roll
-        , revenue_type
 
 )
 
@@ -116,6 +283,7 @@ WITH date_joins AS (
 )
 
 -- Create monthly_revenue table
+, monthly_arr AS (
 
 SELECT
     a.*
@@ -133,4 +301,35 @@ FROM
 LEFT JOIN
     churn_month c
     ON a.customer_key = c.customer_key 
-    AND a.product_key = c.product_key
\ No newline at end of file
+    AND a.product_key = c.product_key
+
+)
+
+{% if incremental_run() %}
+-- The windows above need the whole history of a pair; filter to the rows to merge only once they are computed.
+-- snowball_invocation_id marks the rows this run merged, so recompute_from_month() rebuilds the later models from
+-- the earliest of them
+SELECT
+    m.*
+    , '{{ invocation_id }}'     AS snowball_invocation_id
+FROM
+    monthly_arr m
+INNER JOIN
+    changed_pairs p
+    ON m.customer_key = p.customer_key
+    AND m.product_key = p.product_key
+LEFT JOIN
+    churn_month c
+    ON m.customer_key = c.customer_key
+    AND m.product_key = c.product_key
+WHERE
+    m.month_roll >= p.recompute_from_month
+    OR m.month_roll >= c.product_churn_month
+{% elif var('snowball_incremental', false) %}
+SELECT
+    *
+    , '{{ invocation_id }}'     AS snowball_invocation_id
+FROM monthly_arr
+{% else %}
+SELECT * FROM monthly_arr
+{% endif %}
\ No newline at end of file
@@ -0,0 +1,364 @@
+{{
+    config(
+        tags=['analysis'],
+        enabled=var('fused_lifecycle', false),
+        **incremental_window_config(['revenue_lifecycle_events_key', 'month_roll'])
+        )
+}}
+{#- recompute_from_month() refs fact_revenue, monthly_revenue and the contracts on incremental runs only, which dbt does not see at parse time -#}
+{%- do ref('fact_revenue') %}
+{%- do ref('monthly_revenue') %}
+{%- do ref('customer_contract') %}
+{%- do ref('customer_product_contract') %}
+{% set customer_grain = analysis_grain_column('customer') %}
+{% set period_months = {'l3m': 3, 'ltm': 12, 'ytd': 'ytd_helper'} %}
+
+/* This model replaces customer_lifecycle_events, customer_product_lifecycle_events and customer_product_revenue_events when fused_lifecycle is set.
+   It computes the customer and product lifecycle flags and the cross-sell, upsell, downsell, winback, reactivation, deactivation and intermittent churn
+   flags in one pass over period_revenue, with the previous / next non-zero months taken from window aggregates per customer and month,
+   and carries the period_revenue columns delta_revenue reads so that delta_revenue needs no join. */
+
+WITH contract_months AS (
+
+    SELECT
+
+        p1.period_revenue_key
+        , {{ analysis_columns('period_revenue', 'customer', 'p1') }}
+        , {{ analysis_columns('period_revenue', 'product', 'p1') }}
+        , {{ analysis_columns('period_revenue', 'other_key', 'p1') }}
+        , p1.month_roll
+        , p1.arr
+        {%- for period in enabled_periods() %}
+        , p1.arr_{{ period }}
+        {%- endfor %}
+        {%- for period in enabled_periods() %}
+        , p1.arr_{{ period }}_delta
+        {%- endfor %}
+        {%- for period in enabled_periods() %}
+        , p1.sum_arr_{{ period }}_delta
+        {%- endfor %}
+        , {{ extract_date_part("MONTH", add_months('p1.month_roll', 1 - var('ytd_year_start'))) }} AS ytd_helper
+        , c.customer_join_month
+        , c.customer_churn_month
+        , p.product_start_month
+        , p.product_churn_month
+        , {{ month_diff('c.customer_join_month', 'p1.month_roll') }}       AS customer_join_month_difference
+        , {{ month_diff('c.customer_churn_month', 'p1.month_roll') }}      AS customer_churn_month_difference
+        , {{ month_diff('p.product_start_month', 'p1.month_roll') }}       AS product_start_month_difference
+        , {{ month_diff('p.product_churn_month', 'p1.month_roll') }}       AS product_churn_month_difference
+
+    FROM {{ ref('period_revenue') }} AS p1
+
+    -- One row per customer and per customer-product pair: small joins, unlike the key and month joins they replace
+    INNER JOIN {{ ref('customer_contract') }} AS c
+        ON
+            {{ analysis_join_conditions('monthly_revenue', 'customer_level', 'p1', 'c') }}
+    INNER JOIN {{ ref('customer_product_contract') }} AS p
+        ON
+        {{ analysis_join_conditions('customer_product_contract', 'customer_level', 'p1', 'p') }}
+        AND
+        {{ analysis_join_conditions('customer_product_contract', 'product_level', 'p1', 'p') }}
+
+)
+
+-- Customer lifecycle flags and product growth, as in customer_lifecycle_events and customer_product_revenue_events
+, customer_flags AS (
+
+    SELECT
+
+        *
+        -- MONTHLY FLAGS
+        , CASE
+            WHEN month_roll = customer_join_month
+                THEN 1
+            ELSE 0
+        END AS lm_customer_new_flag
+        {%- if period_enabled('lm') %}
+        , CASE
+            WHEN customer_churn_month = month_roll
+                THEN 1
+            ELSE 0
+        END AS lm_customer_churn_flag
+        , CASE
+            WHEN month_roll > customer_join_month
+            AND month_roll < customer_churn_month
+                THEN 1
+            ELSE 0
+        END AS lm_customer_existing_flag
+        , CASE
+            WHEN sum_arr_lm_delta > 0 THEN 1
+            ELSE 0
+        END AS lm_product_grew
+        , CASE
+            WHEN sum_arr_lm_delta < 0 THEN 1
+            ELSE 0
+        END AS lm_product_declined
+        {%- endif %}
+
+        -- QUARTERLY, YEARLY AND YTD FLAGS
+        {%- for period in enabled_periods() if period != 'lm' %}
+        , CASE
+            WHEN customer_join_month_difference < {{ period_months[period] }}
+                THEN 1
+            ELSE 0
+        END AS {{ period }}_customer_new_flag
+        , CASE
+            WHEN customer_churn_month_difference < {{ period_months[period] }}
+            AND customer_churn_month_difference >= 0
+                THEN 1
+            ELSE 0
+        END AS {{ period }}_customer_churn_flag
+        , CASE
+            WHEN customer_join_month_difference >= {{ period_months[period] }}
+            AND month_roll < customer_churn_month
+                THEN 1
+            ELSE 0
+        END AS {{ period }}_customer_existing_flag
+        , CASE
+            WHEN sum_arr_{{ period }}_delta > 0 THEN 1
+            ELSE 0
+        END AS {{ period }}_product_grew
+        , CASE
+            WHEN sum_arr_{{ period }}_delta < 0 THEN 1
+            ELSE 0
+        END AS {{ period }}_product_declined
+        {%- endfor %}
+
+    FROM contract_months
+
+)
+
+-- Product lifecycle flags, as in customer_product_lifecycle_events
+, product_flags AS (
+
+    SELECT
+
+        *
+        {%- if period_enabled('lm') %}
+        , CASE
+            WHEN lm_customer_existing_flag = 1
+                    AND month_roll > product_start_month
+                    AND month_roll < product_churn_month
+            THEN 1
+            ELSE 0
+        END AS lm_product_existing_flag
+        , CASE
+            WHEN lm_customer_existing_flag = 1
+                    AND month_roll = product_churn_month
+            THEN 1
+            ELSE 0
+        END AS lm_product_churn_flag
+        {%- endif %}
+        {%- for period in enabled_periods() if period != 'lm' %}
+        , CASE
+            WHEN {{ period }}_customer_existing_flag = 1
+                    AND product_start_month_difference >= {{ period_months[period] }}
+                    AND month_roll < product_churn_month
+            THEN 1
+            ELSE 0
+        END AS {{ period }}_product_existing_flag
+        , CASE
+            WHEN {{ period }}_customer_existing_flag = 1
+                    AND product_churn_month_difference < {{ period_months[period] }}
+                    AND product_churn_month_difference >= 0
+            THEN 1
+            ELSE 0
+        END AS {{ period }}_product_churn_flag
+        {%- endfor %}
+
+    FROM customer_flags
+
+)
+
+-- Cross-sell, upsell and downsell flags, as in ranked_product of customer_product_revenue_events
+, ranked_product AS (
+
+    SELECT
+
+        *
+        {%- if period_enabled('lm') %}
+        , CASE
+            WHEN lm_customer_existing_flag = 1
+                 AND product_start_month = month_roll
+            THEN 1
+            ELSE 0
+        END AS lm_cross_sell_flag_raw
+        {%- endif %}
+        {%- for period in enabled_periods() if period != 'lm' %}
+        , CASE
+            WHEN {{ period }}_customer_existing_flag = 1
+                 AND {{ period }}_product_existing_flag = 0
+            THEN 1
+            ELSE 0
+        END AS {{ period }}_cross_sell_flag_raw
+        {%- endfor %}
+        {%- for period in enabled_periods() %}
+        , CASE
+            WHEN {{ period }}_product_grew = 1
+                 AND {{ period }}_product_existing_flag = 1
+            THEN 1
+            ELSE 0
+        END AS {{ period }}_upsell_flag_raw
+        , CASE
+            WHEN {{ period }}_product_declined = 1
+                 AND {{ period }}_product_existing_flag = 1
+            THEN 1
+            ELSE 0
+        END AS {{ period }}_downsell_flag_raw
+        {%- endfor %}
+
+    FROM product_flags
+
+)
+
+-- One row per customer and month: whether any of its rows has ARR (or period-start ARR), and whether any row is not a new customer
+, customer_months AS (
+
+    SELECT
+
+        {{ customer_grain }}
+        , month_roll
+        , MAX(CASE WHEN arr <> 0 THEN 1 ELSE 0 END)                          AS has_arr
+        , MAX(CASE WHEN lm_customer_new_flag = 0 THEN 1 ELSE 0 END)          AS has_lm_existing
+        {%- for period in enabled_periods() if period != 'lm' %}
+        , MAX(CASE WHEN arr_{{ period }} <> 0 THEN 1 ELSE 0 END)               AS has_arr_{{ period }}
+        , MAX(CASE WHEN {{ period }}_customer_new_flag = 0 THEN 1 ELSE 0 END)  AS has_{{ period }}_existing
+        {%- endfor %}
+
+    FROM ranked_product
+    GROUP BY
+        {{ customer_grain }}
+        , month_roll
+
+)
+
+-- Previous / next month with ARR of each customer, from window aggregates instead of range self-joins.
+-- The next non-zero month is only looked up for the months in which not every row of the customer is new.
+, nonzero_months AS (
+
+    SELECT
+
+        {{ customer_grain }}
+        , month_roll
+        , CASE
+            WHEN has_lm_existing = 1
+            THEN MIN(CASE WHEN has_arr = 1 THEN month_roll END) OVER (
+                PARTITION BY {{ customer_grain }} ORDER BY month_roll ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING)
+        END AS next_nonzero_month
+        , MAX(CASE WHEN has_arr = 1 THEN month_roll END) OVER (
+            PARTITION BY {{ customer_grain }} ORDER BY month_roll ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS prev_nonzero_month
+        {%- for period in enabled_periods() if period != 'lm' %}
+        , CASE
+            WHEN has_{{ period }}_existing = 1
+            THEN MIN(CASE WHEN has_arr_{{ period }} = 1 THEN month_roll END) OVER (
+                PARTITION BY {{ customer_grain }} ORDER BY month_roll ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING)
+        END AS next_nonzero_month_{{ period }}
+        , MAX(CASE WHEN has_arr_{{ period }} = 1 THEN month_roll END) OVER (
+            PARTITION BY {{ customer_grain }} ORDER BY month_roll ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS prev_nonzero_month_{{ period }}
+        {%- endfor %}
+
+    FROM customer_months
+
+)
+
+-- Helper columns, as in customer_product_revenue_events
+, revenue_events AS (
+
+    SELECT
+
+        rp.*
+        , CASE
+            WHEN (SUM(rp.arr) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) = 0
+                AND {{ month_diff('CAST(n.prev_nonzero_month AS DATE)', 'CAST(n.next_nonzero_month AS DATE)') }} - 2 = 1
+            THEN 1
+            ELSE 0
+        END AS deactivation_helper
+        , CASE
+            WHEN (SUM(rp.arr) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) <> 0
+                AND {{ month_diff('CAST(n.prev_nonzero_month AS DATE)', 'CAST(rp.month_roll AS DATE)') }} - 2 = 1
+            THEN 1
+            ELSE 0
+        END AS reactivation_helper
+        , CASE
+            WHEN (SUM(rp.arr) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) = 0
+                AND {{ month_diff('CAST(n.prev_nonzero_month AS DATE)', 'CAST(n.next_nonzero_month AS DATE)') }} - 1 > 3
+            THEN 1
+            ELSE 0
+        END AS intermittent_churn_helper
+        , CASE
+            WHEN (SUM(rp.arr) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) <> 0
+                AND {{ month_diff('CAST(n.prev_nonzero_month AS DATE)', 'CAST(rp.month_roll AS DATE)') }} - 1 > 3
+            THEN 1
+            ELSE 0
+        END AS winback_helper
+        {%- for period in enabled_periods() if period != 'lm' %}
+        , CASE
+            WHEN (SUM(rp.arr) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) <> 0
+                AND (SUM(rp.arr_{{ period }}) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) = 0
+                AND {{ month_diff('CAST(n.prev_nonzero_month_' ~ period ~ ' AS DATE)', 'CAST(n.next_nonzero_month_' ~ period ~ ' AS DATE)') }} - 1 > 3
+            THEN 1
+            ELSE 0
+        END AS {{ period }}_winback_helper
+        , CASE
+            WHEN (SUM(rp.arr) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) <> 0
+                AND (SUM(rp.arr_{{ period }}) OVER (PARTITION BY rp.{{ customer_grain }}, rp.month_roll)) = 0
+                AND {{ month_diff('CAST(n.prev_nonzero_month_' ~ period ~ ' AS DATE)', 'CAST(n.next_nonzero_month_' ~ period ~ ' AS DATE)') }} - 2 = 1
+            THEN 1
+            ELSE 0
+        END AS {{ period }}_reactivation_helper
+        {%- endfor %}
+
+    FROM ranked_product AS rp
+    LEFT JOIN nonzero_months AS n
+        ON rp.{{ customer_grain }} = n.{{ customer_grain }}
+        AND rp.month_roll = n.month_roll
+
+)
+
+SELECT
+
+    period_revenue_key                  AS revenue_lifecycle_events_key
+    , {{ analysis_columns('period_revenue', 'customer') }}
+    , {{ analysis_columns('period_revenue', 'product') }}
+    , {{ analysis_columns('period_revenue', 'other_key') }}
+    , month_roll
+    , arr
+    {%- for period in enabled_periods() %}
+    , arr_{{ period }}
+    {%- endfor %}
+    {%- for period in enabled_periods() %}
+    , arr_{{ period }}_delta
+    {%- endfor %}
+    {%- for period in enabled_periods() %}
+    , {{ period }}_customer_new_flag
+    , {{ period }}_customer_churn_flag
+    , {{ period }}_product_churn_flag
+    {%- endfor %}
+    , winback_helper
+    , deactivation_helper
+    , reactivation_helper
+    , intermittent_churn_helper
+    {%- for period in enabled_periods() %}
+    {%- set winback = 'winback_helper' if period == 'lm' else period ~ '_winback_helper' %}
+    {%- set reactivation = 'reactivation_helper' if period == 'lm' else period ~ '_reactivation_helper' %}
+    {%- if period != 'lm' %}
+    , {{ reactivation }}
+    , {{ winback }}
+    {%- endif %}
+    {%- for flag in ['cross_sell', 'upsell', 'downsell'] %}
+    , CASE
+        WHEN  {{ winback }} = 0  AND deactivation_helper = 0
+            AND {{ reactivation }} = 0 AND intermittent_churn_helper = 0
+        THEN {{ period }}_{{ flag }}_flag_raw
+        ELSE 0
+    END AS {{ period }}_{{ flag }}_flag
+    {%- endfor %}
+    {%- endfor %}
+
+FROM
+    revenue_events
+{% if incremental_run() %}
+-- The windows above read the whole history; only the recomputed months are written
+WHERE
+    month_roll >= {{ recompute_from_month() }}
+{% endif %}
@@ -1,8 +1,14 @@
 {{ 
     config(
-        tags=['reporting']
+        tags=['reporting'],
+        **physical_layout_config(incremental_window_config(['snowball_key', 'month_roll', 'period_type']))
         ) 
 }}
+{#- recompute_from_month() refs fact_revenue, monthly_revenue and the contracts on incremental runs only, which dbt does not see at parse time -#}
+{%- do ref('fact_revenue') %}
+{%- do ref('monthly_revenue') %}
+{%- do ref('customer_contract') %}
+{%- do ref('customer_product_contract') %}
 
 /* This stored procedure combines all types of period revenues into one, enabling slicing and dicing between the period types in BI. */
 
@@ -13,10 +19,9 @@ WITH arr_join AS (
         a.*
         , m.arr
         , m.volume
-        , p.arr_lm
-        , p.arr_l3m
-        , p.arr_ltm
-        , p.arr_ytd
+        {%- for period in enabled_periods() %}
+        , p.arr_{{ period }}
+        {%- endfor %}
 
     FROM {{ ref('delta_revenue') }} a
 
@@ -26,9 +31,14 @@ WITH arr_join AS (
     INNER JOIN {{ ref('period_revenue') }} p
         ON a.delta_revenue_key = p.period_revenue_key
         AND a.month_roll = p.month_roll
+    {% if incremental_run() %}
+    WHERE
+        a.month_roll >= {{ recompute_from_month() }}
+    {% endif %}
 
 )
 
+{% if period_enabled('lm') %}
 , lm_prep AS (
 
     SELECT
@@ -63,7 +73,9 @@ WITH arr_join AS (
         arr_join
 
 )
+{% endif %}
 
+{% if period_enabled('l3m') %}
 , l3m_prep AS (
 
     SELECT
@@ -96,13 +108,15 @@ WITH arr_join AS (
         arr_join
 
 )
+{% endif %}
 
+{% if period_enabled('ltm') %}
 -- CTE for ltm_prep
 , ltm_prep AS (
 
     SELECT
     
-        delta_revenue_key                        AS snowball_ke
+        delta_revenue_key                        AS snowball_key
         , customer_key
         , product_key
         , other_key
@@ -130,7 +144,9 @@ WITH arr_join AS (
         arr_join
 
 )
+{% endif %}
 
+{% if period_enabled('ytd') %}
 , ytd_prep AS (
 
     SELECT
@@ -162,43 +178,41 @@ WITH arr_join AS (
     FROM arr_join
 
 )
+{% endif %}
 
 , combined_period_type AS (
 
-    SELECT * FROM lm_prep
-
-    UNION ALL
-
-    SELECT * FROM l3m_prep
-
-    UNION ALL
-
-    SELECT * FROM ltm_prep
+    {% for period in enabled_periods() %}
+    {%- if not loop.first %}
 
     UNION ALL
 
-    SELECT * FROM ytd_prep
+    {% endif -%}
+    SELECT * FROM {{ period }}_prep
+    {%- endfor %}
     
 )
 
 SELECT
 
-    snowball_key
-    , customer_key
-    , product_key
-    , other_key
-    , month_roll
-    , period_type
-    , bop_arr
-    , customer_churn
-    , product_churn
-    , downsell
-    , bop_arr + customer_churn + product_churn + downsell                                            AS grr
-    , upsell
-    , cross_sell
-    , bop_arr + customer_churn + product_churn + downsell + upsell + cross_sell                      AS nrr
-    , new_customer
-    , eop_arr
-    , volume
-
-FROM combined_period_type
\ No newline at end of file
+    b.snowball_key
+    , b.customer_key
+    , b.product_key
+    , b.other_key
+    {{- report_dimension_columns() }}
+    , b.month_roll
+    , b.period_type
+    , b.bop_arr
+    , b.customer_churn
+    , b.product_churn
+    , b.downsell
+    , b.bop_arr + b.customer_churn + b.product_churn + b.downsell                                    AS grr
+    , b.upsell
+    , b.cross_sell
+    , b.bop_arr + b.customer_churn + b.product_churn + b.downsell + b.upsell + b.cross_sell          AS nrr
+    , b.new_customer
+    , b.eop_arr
+    , b.volume
+
+FROM combined_period_type AS b
+{{- report_dimension_joins('b', join_in_wide_mode=true) }}
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+sql_formatter.py
+
+SQLFluff formatting of the compiled SQL through SQLFluff's Python API.
+
+Files are fixed in a process pool sized to the CPU count, each worker loading the project's .sqlfluff
+config and building its linter once. Formatted output is cached on disk under target/, keyed by the
+SQL content hash and the config hash, so models whose compiled SQL did not change are not formatted again.
+Cache entries are written to a temporary file and renamed into place, so processes sharing the cache never
+read a partly written entry.
+"""
+import os
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+CACHE_DIR = os.path.join("target", "sqlfluff_cache")
+
+# Linter built once per worker process by _init_worker
+_linter = None
+
+
+def config_hash(project_root):
+    """Hash of the SQLFluff version and the project's .sqlfluff, part of every cache key"""
+    import sqlfluff
+
+    digest = hashlib.sha256(sqlfluff.__version__.encode("utf-8"))
+    config_path = os.path.join(project_root, ".sqlfluff")
+    if os.path.exists(config_path):
+        with open(config_path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _init_worker(project_root):
+    global _linter
+    from sqlfluff.core import FluffConfig, Linter
+
+    _linter = Linter(config=FluffConfig.from_path(project_root))
+
+
+def _fix_sql(sql):
+    """
+    Fix one SQL string the way `sqlfluff fix --force` would.
+
+    Returns:
+        str: The fixed SQL, or None when the file could not be parsed and was left alone.
+    """
+    try:
+        result = _linter.lint_string_wrapped(sql, fix=True)
+        _, parse_errors = result.count_tmp_prs_errors()
+        if parse_errors > 0:
+            return None
+        return result.paths[0].files[0].fix_string()[0]
+    except Exception:
+        return None
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def _write(path, content):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def _write_cache_entry(path, content):
+    """Write a cache entry atomically: to a temporary file in the cache directory, then os.replace onto path"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def format_sql_files(sql_files, project_root, workers=None):
+    """
+    Apply SQLFluff fixes to the given files in place.
+
+    workers defaults to the CPU count; 1 formats in the calling process, for callers that already run in a pool.
+
+    Returns:
+        int: Number of files formatted successfully, from cache or by SQLFluff.
+    """
+    cache_dir = os.path.join(project_root, CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    cfg_hash = config_hash(project_root)
+
+    formatted_count = 0
+    pending = {}
+    for sql_file in sql_files:
+        sql = _read(sql_file)
+        key = hashlib.sha256((cfg_hash + sql).encode("utf-8")).hexdigest()
+        cache_path = os.path.join(cache_dir, key + ".sql")
+        if os.path.exists(cache_path):
+            fixed = _read(cache_path)
+            if fixed != sql:
+                _write(sql_file, fixed)
+            formatted_count += 1
+        else:
+            pending[sql_file] = (sql, cache_path)
+
+    if not pending:
+        return formatted_count
+
+    files = list(pending)
+    sources = [pending[f][0] for f in files]
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    if workers == 1:
+        _init_worker(project_root)
+        results = list(map(_fix_sql, sources))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(project_root,)) as pool:
+            results = list(pool.map(_fix_sql, sources))
+
+    for sql_file, fixed in zip(files, results):
+        if fixed is None:
+            continue
+        sql, cache_path = pending[sql_file]
+        if fixed != sql:
+            _write(sql_file, fixed)
+        _write_cache_entry(cache_path, fixed)
+        formatted_count += 1
+
+    return formatted_count
@@ -5,13 +5,14 @@ SQL processing operations including SQLFluff, notebook generation, and SQL trans
 """
 import os
 import re
-import subprocess
+import importlib.util
 import time
 import shutil
 from tqdm import tqdm
 import nbformat as nbf
 from nbformat.v4 import new_notebook, new_markdown_cell, new_code_cell
 from config import *
+from sql_formatter import format_sql_files
 
 
 class SQLProcessor:
@@ -24,7 +25,7 @@ class SQLProcessor:
 
     def run_sqlfluff_on_directory(self, directory_path, project_root):
         """
-        Run SQLFluff fix on all SQL files in a directory.
+        Run SQLFluff fix on all SQL files in a directory, in parallel and skipping files already formatted.
         """
         try:
             sql_files = []
@@ -36,27 +37,7 @@ class SQLProcessor:
             if not sql_files:
                 return True
             
-            success_count = 0
-            with tqdm(total=len(sql_files), desc="Applying SQLFluff", colour="green",
-                     bar_format='{desc}  {percentage:3.0f}%|{bar:' + str(self.bar_width) + '}|') as pbar:
-                for sql_file in sql_files:
-                    try:
-                        result = subprocess.run(
-                            ["sqlfluff", "fix", "--force", sql_file],
-                            check=False,
-                            text=True,
-                            capture_output=True,
-                            cwd=project_root
-                        )
-
-                        if result.returncode == 0:
-                            success_count += 1
-                            
-                    except Exception:
-                        pass
-                    
-                    pbar.update(1)
-            
+            success_count = format_sql_files(sql_files, project_root)
             return success_count > 0
                 
         except Exception:
@@ -66,9 +47,7 @@ class SQLProcessor:
         """
         Apply SQLFluff to all compiled SQL files before packaging.
         """
-        try:
-            subprocess.run(["sqlfluff", "--version"], check=True, capture_output=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if importlib.util.find_spec("sqlfluff") is None:
             with tqdm(desc="❌ SQLFluff not available", bar_format='{desc}') as pbar:
                 time.sleep(1)
             return False
@@ -0,0 +1,247 @@
+"""
+synth.py
+
+Synthetic revenue table for load and scaling tests of the Snowball models.
+
+One row per customer / product line and billed month, with one column per source column of column_mapping.csv,
+so the output loads as the revenue table `snowball generate` reads. Lines start, churn, come back and change price
+month by month at the given rates; key_skew concentrates lines and revenue on the first customers, the way a few
+large accounts dominate a real book.
+
+Rows are written chunk_rows at a time, to CSV or, with pyarrow installed, Parquet (one row group per chunk), so
+memory stays bounded whatever the table size.
+"""
+import csv
+import os
+import random
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    # Parquet output is optional: CSV needs the standard library only
+    pyarrow = None
+
+DEFAULTS = {
+    "customers": 1000,
+    "products": 20,
+    "products_per_customer": 2.0,
+    "months": 36,
+    "start_month": "2021-01",
+    "churn_rate": 0.02,
+    "reactivation_rate": 0.05,
+    "upsell_rate": 0.03,
+    "downsell_rate": 0.02,
+    "key_skew": 0.0,
+    "recurring_share": 0.9,
+    "chunk_rows": 1_000_000,
+    "seed": 0,
+}
+
+# Distinct values of the customer attributes below level 1, of the other dimensions, and products per product family
+CUSTOMER_ATTRIBUTE_VALUES = 8
+OTHER_DIM_VALUES = 3
+PRODUCTS_PER_FAMILY = 4
+# Share of months a non-recurring line bills in
+NON_RECURRING_BILLING = 0.25
+MONTHLY_PRICES = (100, 250, 500, 1000, 2500)
+
+
+def column_roles(mapping_rows):
+    """
+    Source columns of the mapping in order, each with the role its first mapping row gives it.
+
+    Returns:
+        list: (source_column, mapped_column, role) with role one of customer, product, other, revenue_type, month,
+        revenue, volume, or None for columns the models do not read.
+    """
+    columns, seen = [], set()
+    for source_column, mapped_column, dimension in mapping_rows:
+        if source_column in seen:
+            continue
+        seen.add(source_column)
+        if dimension in ("customer", "product", "other"):
+            role = dimension
+        elif mapped_column in ("revenue_type", "month", "revenue", "volume"):
+            role = mapped_column
+        else:
+            role = None
+        columns.append((source_column, mapped_column, role))
+
+    missing = [role for role in ("customer", "product", "month", "revenue") if role not in {c[2] for c in columns}]
+    if missing:
+        raise ValueError(f"column_mapping has no {', '.join(missing)} column")
+    return columns
+
+
+def _month_labels(start_month, months):
+    """DD-MM-YYYY labels of the first day of each month, the text format revenue.sql parses"""
+    year, month = (int(part) for part in start_month.split("-"))
+    labels = []
+    for offset in range(months):
+        y, m = divmod(month - 1 + offset, 12)
+        labels.append(f"01-{m + 1:02d}-{year + y}")
+    return labels
+
+
+def _customer_weights(customers, key_skew):
+    """Zipf-like weight of each customer, (rank + 1) ** -key_skew scaled to a mean of 1; all 1 without skew"""
+    if key_skew <= 0:
+        return None
+    total = sum((rank + 1) ** -key_skew for rank in range(customers))
+    return customers / total
+
+
+class _CsvChunkWriter:
+    def __init__(self, path, header):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetChunkWriter:
+    def __init__(self, path, header, numeric_columns):
+        fields = [(name, pyarrow.float64() if name in numeric_columns else pyarrow.string()) for name in header]
+        self.schema = pyarrow.schema(fields)
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = [list(values) for values in zip(*rows)]
+        self.writer.write_table(pyarrow.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _open_writer(path, header, numeric_columns, file_format):
+    if file_format == "parquet":
+        if pyarrow is None:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow, or write a .csv file")
+        return _ParquetChunkWriter(path, header, numeric_columns)
+    return _CsvChunkWriter(path, header)
+
+
+def _validate(params):
+    for name in ("customers", "products", "months", "chunk_rows"):
+        if params[name] < 1:
+            raise ValueError(f"{name} must be at least 1")
+    for name in ("churn_rate", "reactivation_rate", "upsell_rate", "downsell_rate", "recurring_share"):
+        if not 0 <= params[name] <= 1:
+            raise ValueError(f"{name} must be between 0 and 1")
+    if params["upsell_rate"] + params["downsell_rate"] > 1:
+        raise ValueError("upsell_rate + downsell_rate must not exceed 1")
+    if params["products_per_customer"] <= 0 or params["key_skew"] < 0:
+        raise ValueError("products_per_customer must be positive and key_skew not negative")
+
+
+def write_revenue_table(out_path, mapping_rows, file_format=None, **overrides):
+    """
+    Write a synthetic revenue table for the mapping to out_path.
+
+    Args:
+        out_path (str): Output file; a .parquet extension writes Parquet unless file_format says otherwise
+        mapping_rows (list): [source_column, mapped_column, dimension] rows, as load_column_mapping returns them
+        file_format (str): "csv" or "parquet"
+        overrides: Any of DEFAULTS
+
+    Returns:
+        int: Number of rows written
+    """
+    unknown = set(overrides) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown synth parameter(s): {', '.join(sorted(unknown))}")
+    params = {**DEFAULTS, **overrides}
+    _validate(params)
+    file_format = file_format or ("parquet" if out_path.lower().endswith(".parquet") else "csv")
+
+    rng = random.Random(params["seed"])
+    columns = column_roles(mapping_rows)
+    header = [source_column for source_column, _, _ in columns]
+    roles = [role for _, _, role in columns]
+    month_index = roles.index("month")
+    revenue_index = roles.index("revenue")
+    type_index = roles.index("revenue_type") if "revenue_type" in roles else None
+    volume_index = roles.index("volume") if "volume" in roles else None
+    customer_indexes = [i for i, role in enumerate(roles) if role == "customer"]
+    product_indexes = [i for i, role in enumerate(roles) if role == "product"]
+    other_indexes = [i for i, role in enumerate(roles) if role == "other"]
+    # The first customer / product column of the mapping is the top level: customer name, product family
+    customer_sources = list(dict.fromkeys(header[i] for i in customer_indexes))
+    product_sources = list(dict.fromkeys(header[i] for i in product_indexes))
+
+    months, products = params["months"], params["products"]
+    month_labels = _month_labels(params["start_month"], months)
+    weight_scale = _customer_weights(params["customers"], params["key_skew"])
+    upsell_rate, downsell_rate = params["upsell_rate"], params["downsell_rate"]
+    churn_rate, reactivation_rate = params["churn_rate"], params["reactivation_rate"]
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    numeric_columns = {header[revenue_index]} | ({header[volume_index]} if volume_index is not None else set())
+    writer = _open_writer(out_path, header, numeric_columns, file_format)
+    chunk, written = [], 0
+    try:
+        for customer in range(params["customers"]):
+            weight = 1.0 if weight_scale is None else weight_scale * (customer + 1) ** -params["key_skew"]
+            customer_values = {}
+            for level, source_column in enumerate(customer_sources):
+                if level == 0:
+                    customer_values[source_column] = f"Customer {customer + 1}"
+                else:
+                    customer_values[source_column] = f"{source_column} {rng.randrange(CUSTOMER_ATTRIBUTE_VALUES) + 1}"
+
+            line_count = round(params["products_per_customer"] * weight * rng.uniform(0.5, 1.5))
+            for product in rng.sample(range(products), min(products, max(1, line_count))):
+                values = [None] * len(header)
+                for i in customer_indexes:
+                    values[i] = customer_values[header[i]]
+                for i in product_indexes:
+                    if header[i] == product_sources[0]:
+                        values[i] = f"{header[i]} {product // PRODUCTS_PER_FAMILY + 1}"
+                    else:
+                        values[i] = f"{header[i]} {product + 1}"
+                entity = rng.randrange(OTHER_DIM_VALUES) + 1
+                for i in other_indexes:
+                    values[i] = f"{header[i]} {entity}"
+                recurring = rng.random() < params["recurring_share"]
+                if type_index is not None:
+                    values[type_index] = "1" if recurring else "0"
+
+                # Half the lines are live from the first month, the rest start during the period
+                start = 0 if rng.random() < 0.5 else rng.randrange(months)
+                price = rng.choice(MONTHLY_PRICES) * weight
+                active = True
+                for month in range(start, months):
+                    if active and (recurring or rng.random() < NON_RECURRING_BILLING):
+                        row = values.copy()
+                        row[month_index] = month_labels[month]
+                        row[revenue_index] = round(price, 2)
+                        if volume_index is not None:
+                            row[volume_index] = float(rng.randint(1, 10))
+                        chunk.append(row)
+                        if len(chunk) >= params["chunk_rows"]:
+                            writer.write(chunk)
+                            written += len(chunk)
+                            chunk = []
+
+                    if active:
+                        active = rng.random() >= churn_rate
+                    else:
+                        active = rng.random() < reactivation_rate
+                    change = rng.random()
+                    if change < upsell_rate:
+                        price *= 1 + rng.uniform(0.05, 0.5)
+                    elif change < upsell_rate + downsell_rate:
+                        price *= 1 - rng.uniform(0.05, 0.3)
+
+        if chunk:
+            writer.write(chunk)
+            written += len(chunk)
+    finally:
+        writer.close()
+    return written
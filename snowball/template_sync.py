@@ -0,0 +1,147 @@
+"""
+template_sync.py
+
+Incremental sync of the packaged snowball_dbt template into the working dbt project.
+
+Only files that changed in the template are copied, so dbt's partial-parse state (target/partial_parse.msgpack)
+and the installed packages (dbt_packages/) survive between Snowball runs. A stamp file in the project records the
+Snowball and dbt versions, the packages.yml hash and the template files it was synced from; a version bump drops
+both caches, a packages.yml change drops the installed packages.
+"""
+import os
+import json
+import stat
+import shutil
+import hashlib
+import filecmp
+from importlib import metadata
+from pathlib import Path
+from dbt.version import __version__ as dbt_version
+
+STAMP_FILE = ".snowball_sync.json"
+# Written by dbt inside the project, never part of the template
+GENERATED_DIRS = ("target", "dbt_packages", "logs")
+# Compiled output is regenerated on every run, stale files from removed models must not be packaged
+STALE_OUTPUT_DIRS = (os.path.join("target", "compiled"), os.path.join("target", "run"))
+
+
+def remove_readonly_files(func, path, _):
+    """Error handler for removing read-only files on Windows"""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+def _remove(path: Path):
+    if path.is_dir():
+        shutil.rmtree(path, onerror=remove_readonly_files)
+    elif path.exists():
+        os.chmod(path, stat.S_IWRITE)
+        path.unlink()
+
+
+def _snowball_version() -> str:
+    try:
+        return metadata.version("snowball")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _file_hash(path: Path) -> str:
+    if not path.exists():
+        return ""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _load_stamp(project_path: Path) -> dict:
+    try:
+        with open(project_path / STAMP_FILE, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamp(project_path: Path, stamp: dict):
+    with open(project_path / STAMP_FILE, "w", encoding="utf-8") as file:
+        json.dump(stamp, file, indent=2)
+
+
+def _template_files(source_path: Path) -> list:
+    """Relative paths of the template files, skipping dbt output and Python caches"""
+    files = []
+    for root, dirs, names in os.walk(source_path):
+        rel_root = os.path.relpath(root, source_path)
+        dirs[:] = [d for d in dirs
+                   if d != "__pycache__" and not (rel_root == "." and d in GENERATED_DIRS)]
+        for name in names:
+            files.append(os.path.normpath(os.path.join(rel_root, name)))
+    return sorted(files)
+
+
+def sync_template(source_path: str, project_path: str) -> dict:
+    """
+    Bring project_path in line with the template at source_path, touching only what changed.
+
+    Returns:
+        dict: Counts of copied, unchanged and removed files, for reporting.
+    """
+    source_path = Path(source_path)
+    project_path = Path(project_path)
+    project_path.mkdir(parents=True, exist_ok=True)
+
+    previous = _load_stamp(project_path)
+    stamp = {
+        "snowball_version": _snowball_version(),
+        "dbt_version": dbt_version,
+        "packages_hash": _file_hash(source_path / "packages.yml"),
+    }
+
+    # Invalidate the caches the current template can no longer vouch for
+    if (previous.get("snowball_version"), previous.get("dbt_version")) != (stamp["snowball_version"], stamp["dbt_version"]):
+        _remove(project_path / "target")
+        _remove(project_path / "dbt_packages")
+        _remove(project_path / "package-lock.yml")
+    elif previous.get("packages_hash") != stamp["packages_hash"]:
+        _remove(project_path / "dbt_packages")
+        _remove(project_path / "package-lock.yml")
+    else:
+        stamp["packages_installed"] = previous.get("packages_installed", False)
+
+    for stale_dir in STALE_OUTPUT_DIRS:
+        _remove(project_path / stale_dir)
+
+    files = _template_files(source_path)
+    counts = {"copied": 0, "unchanged": 0, "removed": 0}
+    for rel_path in files:
+        src = source_path / rel_path
+        dest = project_path / rel_path
+        if dest.exists() and filecmp.cmp(src, dest, shallow=True):
+            counts["unchanged"] += 1
+            continue
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            os.chmod(dest, stat.S_IWRITE | stat.S_IREAD)
+        shutil.copy2(src, dest)
+        counts["copied"] += 1
+
+    # Only files that came from an earlier template are removed; anything dbt or the user created stays
+    for rel_path in set(previous.get("files", [])) - set(files):
+        _remove(project_path / rel_path)
+        counts["removed"] += 1
+
+    stamp["files"] = files
+    _write_stamp(project_path, stamp)
+    return counts
+
+
+def packages_installed(project_path: str) -> bool:
+    """True when dbt deps already installed the packages of the synced packages.yml"""
+    project_path = Path(project_path)
+    return _load_stamp(project_path).get("packages_installed", False) and (project_path / "dbt_packages").is_dir()
+
+
+def mark_packages_installed(project_path: str):
+    """Record a successful dbt deps so later runs can skip it"""
+    project_path = Path(project_path)
+    stamp = _load_stamp(project_path)
+    stamp["packages_installed"] = True
+    _write_stamp(project_path, stamp)
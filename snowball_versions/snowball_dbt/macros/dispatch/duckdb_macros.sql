@@ -0,0 +1,133 @@
+{%- macro duckdb__generate_hash_key(filter_value=None, index=-1, exclude_list=[]) -%}
+    {%- set results = get_seed_table_data(filter_value, index=index, exclude_list=exclude_list) -%}
+    {%- if var('hash_key_type', 'md5') == 'bigint' -%}
+    HASH(
+        {%- for column_name in results -%}
+            COALESCE(CAST({{ column_name }} AS VARCHAR), ''){%- if not loop.last -%},{{ '\n        ' }}{%- endif -%}
+        {%- endfor -%})
+    {%- else -%}
+    MD5(CONCAT(
+        {%- for column_name in results -%}
+            COALESCE(CAST({{ column_name }} AS VARCHAR), ''){%- if not loop.last -%},{{ '\n        ' }}{%- endif -%}
+        {%- endfor -%}))
+    {%- endif -%}
+{%- endmacro -%}
+
+{%- macro duckdb__generate_series() -%}
+    (SELECT range + 1 AS Number FROM range(1000))
+{%- endmacro -%}
+
+{%- macro duckdb__format_date(date_column, format) -%}
+    STRFTIME({{ date_column }}, '{{ format | replace("MON", "%b") | replace("YYYY", "%Y") | replace("YY", "%y") }}')
+{%- endmacro -%}
+
+{%- macro duckdb__cast_revenue_type(column_name) -%}
+    CAST({{ column_name }} AS VARCHAR)
+{%- endmacro -%}
+
+{%- macro duckdb__format_mmm_yy(column_name) -%}
+    STRFTIME({{ column_name }}, '%b-%y')
+{%- endmacro -%}
+
+{%- macro duckdb__extract_date_part(part, date_expr) -%}
+    EXTRACT({{ part | upper }} FROM {{ date_expr }})
+{%- endmacro -%}
+
+{%- macro duckdb__get_quarter_string(date_col) -%}
+    CONCAT('Q', QUARTER({{ date_col }}))
+{%- endmacro -%}
+
+-- DD-MM-YYYY text as on the other platforms; Parquet extracts and CSVs read with a detected date type are cast as they are
+{%- macro duckdb__get_month(date_col) -%}
+    CAST(COALESCE(TRY_STRPTIME(CAST({{ date_col }} AS VARCHAR), '%d-%m-%Y'), TRY_CAST({{ date_col }} AS TIMESTAMP)) AS DATE)
+{%- endmacro -%}
+
+-- The revenue input: the local Parquet / CSV extract(s) of the revenue_path var when set, the revenue table otherwise
+{%- macro duckdb__revenue_source(db_name, schema_name, table_name) -%}
+    {%- if var('revenue_path', none) -%}
+        '{{ var('revenue_path') }}'
+    {%- else -%}
+        {{ db_name }}.{{ schema_name }}.{{ table_name }}
+    {%- endif -%}
+{%- endmacro -%}
+
+{%- macro duckdb__snowball_revenue_temp_table(db_name, schema_name, table_name) -%}
+    {% set create_temp_table %}
+        CREATE SCHEMA IF NOT EXISTS {{ db_name }}.{{ schema_name }};
+        CREATE OR REPLACE TABLE {{ db_name }}.{{ schema_name }}.snowball_revenue AS
+        SELECT *
+        FROM {{ duckdb__revenue_source(db_name, schema_name, table_name) }}
+        LIMIT 0;
+    {% endset %}
+
+    {% do run_query(create_temp_table) %}
+{%- endmacro -%}
+
+-- With revenue_path set, revenue.sql reads the extract itself, so the whole DAG runs on local data
+{%- macro duckdb__select_snowball_revenue_temp_table() -%}
+    SELECT
+        {{ get_dimension() }}
+    FROM {{ duckdb__revenue_source(var('my_database'), var('my_schema'), 'snowball_revenue') }}
+{%- endmacro -%}
+
+-- One scan of model_ref; the kpi names come back as written
+{%- macro duckdb__unpivot_kpis(model_ref, columns) -%}
+    SELECT *
+    FROM (
+        SELECT
+            {% for col in columns %}
+              CAST({{ col }} AS DECIMAL(18, 2)) AS {{ col }}{% if not loop.last %},{% endif %}
+            {% endfor %}
+        FROM {{ model_ref }}
+    ) AS src
+    UNPIVOT INCLUDE NULLS (
+        kpi_value FOR kpi IN (
+            {{ columns | join(', ') }}
+        )
+    ) AS unpvt
+{%- endmacro -%}
+
+-- DuckDB runs a multi-statement string in one call, so all stubs are created in a single round-trip.
+{%- macro duckdb__create_introspection_stubs(stubs) -%}
+    {% set create_stubs %}
+        {%- for stub in stubs %}
+        CREATE SCHEMA IF NOT EXISTS {{ stub.relation.database }}.{{ stub.relation.schema }};
+        CREATE OR REPLACE TABLE {{ stub.relation }} (
+            {%- for column_name in stub.columns %}
+            {{ column_name }} VARCHAR{% if not loop.last %},{% endif %}
+            {%- endfor %}
+        );
+        {%- endfor %}
+    {% endset %}
+
+    {% do run_query(create_stubs) %}
+{%- endmacro -%}
+
+-- Deletes every stored row of the recomputed months, then inserts the window
+{%- macro duckdb__recompute_window_strategy(unique_key) -%}
+    {%- do return({'incremental_strategy': 'delete+insert', 'unique_key': 'month_roll'}) -%}
+{%- endmacro -%}
+
+-- One row per month from start_column to end_column for every row of relation, by a join to the tally of generate_series
+{%- macro duckdb__month_scaffold(relation, start_column, end_column) -%}
+    SELECT
+        b.*
+        , {{ duckdb__add_months('b.' ~ start_column, 'n.Number - 1') }}     AS month_roll
+    FROM {{ relation }} AS b
+    INNER JOIN (SELECT * FROM {{ generate_series() }}) AS n
+        ON n.Number <= {{ duckdb__month_diff('b.' ~ start_column, 'b.' ~ end_column) }} + 1
+{%- endmacro -%}
+
+-- DuckDB keeps min / max zonemaps per row group on its own, with nothing to configure
+{%- macro duckdb__table_layout_config(layout, month_column) -%}
+    {%- do return({}) -%}
+{%- endmacro -%}
+
+-- DATE + INTERVAL is a TIMESTAMP in DuckDB, so the result is cast back to DATE
+{%- macro duckdb__add_months(date_expr, months) -%}
+    CAST({{ date_expr }} + TO_MONTHS(CAST({{ months }} AS INTEGER)) AS DATE)
+{%- endmacro -%}
+
+{%- macro duckdb__month_diff(start_date, end_date) -%}
+    DATE_DIFF('month', {{ start_date }}, {{ end_date }})
+{%- endmacro -%}
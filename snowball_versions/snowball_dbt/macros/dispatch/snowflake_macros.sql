@@ -1,9 +1,16 @@
 {%- macro snowflake__generate_hash_key(filter_value=None, index=-1, exclude_list=[]) -%}
     {%- set results = get_seed_table_data(filter_value, index=index, exclude_list=exclude_list) -%}
+    {%- if var('hash_key_type', 'md5') == 'bigint' -%}
+    HASH(
+        {%- for column_name in results -%}
+            COALESCE({{ column_name }}, ''){%- if not loop.last -%},{{ '\n        ' }}{%- endif -%}
+        {%- endfor -%})
+    {%- else -%}
     MD5(CONCAT(
         {%- for column_name in results -%}
             COALESCE({{ column_name }}, ''){%- if not loop.last -%},{{ '\n        ' }}{%- endif -%}
         {%- endfor -%}))
+    {%- endif -%}
 {%- endmacro -%}
 
 {%- macro snowflake__generate_series() -%}
@@ -51,11 +58,69 @@
     FROM {{ var('my_database') }}.{{ var('my_schema') }}.snowball_revenue
 {%- endmacro -%}
 
+-- One scan of model_ref; UNPIVOT names the kpi after the upper-cased column, so it is lowered back
 {%- macro snowflake__unpivot_kpis(model_ref, columns) -%}
-    {%- set col_exprs = [] %}
-    {%- for col in columns %}
-        {%- set expr = "SELECT '" ~ col ~ "' AS kpi, CAST(" ~ col ~ " AS DECIMAL(18,2)) AS kpi_value FROM " ~ model_ref %}
-        {%- do col_exprs.append(expr) %}
-    {%- endfor %}
-    {{ col_exprs | join('\nUNION ALL\n') }}
+    SELECT
+        LOWER(unpvt.kpi)        AS kpi
+        , unpvt.kpi_value
+    FROM (
+        SELECT
+            {% for col in columns %}
+              CAST({{ col }} AS DECIMAL(18, 2)) AS {{ col }}{% if not loop.last %},{% endif %}
+            {% endfor %}
+        FROM {{ model_ref }}
+    ) AS src
+    UNPIVOT INCLUDE NULLS (
+        kpi_value FOR kpi IN (
+            {{ columns | join(', ') }}
+        )
+    ) AS unpvt
+{%- endmacro -%}
+
+-- One Snowflake Scripting block, so all stubs are created in a single round-trip.
+{%- macro snowflake__create_introspection_stubs(stubs) -%}
+    {% set create_stubs %}
+        EXECUTE IMMEDIATE $$
+        BEGIN
+        {%- for stub in stubs %}
+            CREATE SCHEMA IF NOT EXISTS {{ stub.relation.database }}.{{ stub.relation.schema }};
+            CREATE OR REPLACE TABLE {{ stub.relation }} (
+                {%- for column_name in stub.columns %}
+                {{ column_name }} VARCHAR{% if not loop.last %},{% endif %}
+                {%- endfor %}
+            );
+        {%- endfor %}
+        END;
+        $$
+    {% endset %}
+
+    {% do run_query(create_stubs) %}
+{%- endmacro -%}
+
+-- Deletes every stored row of the recomputed months, then inserts the window
+{%- macro snowflake__recompute_window_strategy(unique_key) -%}
+    {%- do return({'incremental_strategy': 'delete+insert', 'unique_key': 'month_roll'}) -%}
+{%- endmacro -%}
+
+-- One row per month from start_column to end_column for every row of relation, by a join to the tally of generate_series
+{%- macro snowflake__month_scaffold(relation, start_column, end_column) -%}
+    SELECT
+        b.*
+        , DATEADD(MONTH, n.Number - 1, b.{{ start_column }})     AS month_roll
+    FROM {{ relation }} AS b
+    INNER JOIN (SELECT * FROM {{ generate_series() }}) AS n
+        ON n.Number <= DATEDIFF(MONTH, b.{{ start_column }}, b.{{ end_column }}) + 1
+{%- endmacro -%}
+
+-- Clusters on the month, so month filters prune micro-partitions; transient tables keep no fail-safe copy of rebuilds
+{%- macro snowflake__table_layout_config(layout, month_column) -%}
+    {%- do return({'cluster_by': [month_column], 'transient': layout.transient}) -%}
+{%- endmacro -%}
+
+{%- macro snowflake__add_months(date_expr, months) -%}
+    DATEADD(MONTH, {{ months }}, {{ date_expr }})
+{%- endmacro -%}
+
+{%- macro snowflake__month_diff(start_date, end_date) -%}
+    DATEDIFF(MONTH, {{ start_date }}, {{ end_date }})
 {%- endmacro -%}
@@ -3,6 +3,16 @@
     {%- if results | length == 1 -%}
         {%- do results.append("''") -%}
     {%- endif -%}
+    {%- if var('hash_key_type', 'md5') == 'bigint' -%}
+    {#- A varbinary cast to BIGINT keeps its rightmost 8 bytes, i.e. 64 bits of the MD5 -#}
+    CAST(HASHBYTES('MD5',
+        CONCAT(
+            {%- for column_name in results -%}
+                COALESCE(CAST({{ column_name }} AS VARCHAR), ''){% if not loop.last %},{{ '\n        ' }}{% endif %}
+            {%- endfor -%}
+        )
+    ) AS BIGINT)
+    {%- else -%}
     LOWER(CONVERT(VARCHAR(32), HASHBYTES('MD5',
         CONCAT(
             {%- for column_name in results -%}
@@ -10,6 +20,7 @@
             {%- endfor -%}
         )
     ), 2))
+    {%- endif -%}
 {%- endmacro -%}
 
 {%- macro sqlserver__generate_series() -%}
@@ -76,3 +87,53 @@
         )
     ) AS unpvt
 {%- endmacro -%}
+
+-- One T-SQL batch, so all stubs are created in a single round-trip.
+{%- macro sqlserver__create_introspection_stubs(stubs) -%}
+    {% set create_stubs %}
+        {%- for stub in stubs %}
+        IF SCHEMA_ID('{{ stub.relation.schema }}') IS NULL EXEC('CREATE SCHEMA "{{ stub.relation.schema }}"');
+        DROP TABLE IF EXISTS {{ stub.relation }};
+        CREATE TABLE {{ stub.relation }} (
+            {%- for column_name in stub.columns %}
+            {{ column_name }} VARCHAR(1){% if not loop.last %},{% endif %}
+            {%- endfor %}
+        );
+        {%- endfor %}
+    {% endset %}
+
+    {% do run_query(create_stubs) %}
+{%- endmacro -%}
+
+-- Deletes every stored row of the recomputed months, then inserts the window
+{%- macro sqlserver__recompute_window_strategy(unique_key) -%}
+    {%- do return({'incremental_strategy': 'delete+insert', 'unique_key': 'month_roll'}) -%}
+{%- endmacro -%}
+
+-- One row per month from start_column to end_column for every row of relation, by a join to the tally of generate_series
+{%- macro sqlserver__month_scaffold(relation, start_column, end_column) -%}
+    SELECT
+        b.*
+        , DATEADD(MONTH, n.Number - 1, b.{{ start_column }})     AS month_roll
+    FROM {{ relation }} AS b
+    INNER JOIN (SELECT * FROM {{ generate_series() }}) AS n
+        ON n.Number <= DATEDIFF(MONTH, b.{{ start_column }}, b.{{ end_column }}) + 1
+{%- endmacro -%}
+
+-- Clustered columnstore index: column segments are skipped on their min / max month and customer_key
+{%- macro sqlserver__table_layout_config(layout, month_column) -%}
+    {%- do return({'as_columnstore': true}) -%}
+{%- endmacro -%}
+
+-- Fabric Warehouse already stores every table as columnar Delta parquet, with no index to configure
+{%- macro fabric__table_layout_config(layout, month_column) -%}
+    {%- do return({}) -%}
+{%- endmacro -%}
+
+{%- macro sqlserver__add_months(date_expr, months) -%}
+    DATEADD(MONTH, {{ months }}, {{ date_expr }})
+{%- endmacro -%}
+
+{%- macro sqlserver__month_diff(start_date, end_date) -%}
+    DATEDIFF(MONTH, {{ start_date }}, {{ end_date }})
+{%- endmacro -%}
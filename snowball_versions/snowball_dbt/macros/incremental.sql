@@ -0,0 +1,107 @@
+-- Materialization config of the models that can be built incrementally, passed to config() as keyword arguments.
+-- With snowball_incremental off they stay tables; on, dbt merges on unique_key with the adapter's native MERGE
+-- (Snowflake MERGE, Delta MERGE on Databricks, T-SQL MERGE on SQL Server and Fabric).
+-- used in analysis/monthly_revenue.sql
+{%- macro incremental_config(unique_key) -%}
+    {%- if var('snowball_incremental', false) -%}
+        {%- do return({'materialized': 'incremental', 'incremental_strategy': 'merge', 'unique_key': unique_key}) -%}
+    {%- endif -%}
+    {%- do return({'materialized': 'table'}) -%}
+{%- endmacro -%}
+
+-- Materialization config of the analysis and report models that rebuild a trailing window of months when
+-- snowball_incremental is on. The adapter decides how the window replaces the stored rows (recompute_window_strategy).
+{%- macro incremental_window_config(unique_key) -%}
+    {%- if var('snowball_incremental', false) -%}
+        {%- set window_config = {'materialized': 'incremental'} -%}
+        {%- do window_config.update(recompute_window_strategy(unique_key)) -%}
+        {%- do return(window_config) -%}
+    {%- endif -%}
+    {%- do return({'materialized': 'table'}) -%}
+{%- endmacro -%}
+
+-- True on an incremental run of a model configured above. snowball_incremental is checked first, as dbt's
+-- is_incremental() looks the model's relation up in the warehouse: compiles with it off need no connection.
+{%- macro incremental_run() -%}
+    {%- do return(var('snowball_incremental', false) and is_incremental()) -%}
+{%- endmacro -%}
+
+-- Stops an incremental run of monthly_revenue when a stored month with revenue has no fact revenue left, i.e. fact rows
+-- were deleted or zeroed since the last run. The merge cannot remove the stored rows, or the scaffold months after them.
+{%- macro assert_no_deleted_revenue() -%}
+    {%- set deleted_months -%}
+        SELECT s.monthly_revenue_key, s.month_roll
+        FROM {{ this }} AS s
+        LEFT JOIN (
+            SELECT DISTINCT revenue_key, month FROM {{ ref('fact_revenue') }} WHERE revenue <> 0.00
+        ) AS f
+            ON s.monthly_revenue_key = f.revenue_key
+            AND s.month_roll = f.month
+        WHERE
+            f.revenue_key IS NULL
+            AND (s.mrr <> 0 OR s.volume <> 0)
+        LIMIT 1
+    {%- endset -%}
+    {%- set deleted = run_query(deleted_months).rows -%}
+    {%- if deleted -%}
+        {{ exceptions.raise_compiler_error("fact_revenue no longer has the revenue stored in monthly_revenue for monthly_revenue_key "
+            ~ deleted[0][0] ~ " in " ~ deleted[0][1] ~ "; deleted revenue is not picked up incrementally, run with --full-refresh") }}
+    {%- endif -%}
+{%- endmacro -%}
+
+-- First month_roll an incremental run rebuilds, the earliest of: recompute_months before the latest fact month; the
+-- earliest month monthly_revenue merged in this dbt run, e.g. the extended scaffold of a pair that came back after a gap;
+-- and, for a customer (or customer and product) whose first or last MRR month was merged in this run, the month after
+-- its last MRR month that was not, or its first month when none was. Its join and churn months, and so the flags of
+-- rows no pair of it merged, can move from there. Models whose LAG or self-joins read earlier rows pass lookback_months
+-- to read that much further back; those rows are not written. A model calling this inside incremental_run() must also
+-- call ref() on fact_revenue, monthly_revenue, customer_contract and customer_product_contract outside it, since dbt
+-- does not see the refs when it parses the model.
+{%- macro recompute_from_month(lookback_months=0) -%}
+    {%- set monthly_revenue = ref('monthly_revenue') -%}
+    {%- set merged = "snowball_invocation_id = '" ~ invocation_id ~ "'" -%}
+    {%- set start_months = [
+        add_months('(SELECT MAX(month) FROM ' ~ ref('fact_revenue') ~ ')', -var('recompute_months', 3)),
+        '(SELECT MIN(month_roll) FROM ' ~ monthly_revenue ~ ' WHERE ' ~ merged ~ ')'
+    ] -%}
+    {%- set contracts = [
+        ('customer_contract', ['customer_level'], 'customer_join_month', 'customer_end_month'),
+        ('customer_product_contract', ['customer_level', 'product_level'], 'product_start_month', 'product_end_month')
+    ] -%}
+    {%- for contract_model, keywords, start_column, end_column in contracts -%}
+        {%- set contract_columns = [] -%}
+        {%- set contract_joins = {'m': [], 'j': []} -%}
+        {%- for keyword in keywords -%}
+            {%- do contract_columns.append(analysis_columns('monthly_revenue', keyword, 'c')) -%}
+            {%- for alias in ['m', 'j'] -%}
+                {%- do contract_joins[alias].append(analysis_join_conditions('monthly_revenue', keyword, alias, 'c')) -%}
+            {%- endfor -%}
+        {%- endfor -%}
+        {%- set contract_start -%}
+            (SELECT MIN(COALESCE(u.kept_churn_month, u.first_month)) FROM (
+                SELECT
+                    MIN(m.month_roll) AS first_month
+                    , {{ add_months('MAX(CASE WHEN m.mrr <> 0 AND NOT m.' ~ merged ~ ' THEN m.month_roll END)', 1) }} AS kept_churn_month
+                FROM {{ monthly_revenue }} AS m
+                INNER JOIN {{ ref(contract_model) }} AS c
+                    ON {{ contract_joins['m'] | join(' AND ') }}
+                WHERE EXISTS (
+                    SELECT 1 FROM {{ monthly_revenue }} AS j
+                    WHERE {{ contract_joins['j'] | join(' AND ') }}
+                    AND j.month_roll IN (c.{{ start_column }}, c.{{ end_column }})
+                    AND j.{{ merged }}
+                )
+                GROUP BY {{ contract_columns | join(', ') }}
+            ) AS u)
+        {%- endset -%}
+        {%- do start_months.append(contract_start) -%}
+    {%- endfor -%}
+    {%- set window_start -%}
+        (SELECT MIN(start_month) FROM ({% for start_month in start_months %}{{ ' UNION ALL ' if not loop.first }}SELECT {{ start_month }} AS start_month{% endfor %}) AS s)
+    {%- endset -%}
+    {%- if lookback_months -%}
+        {{ add_months(window_start, -lookback_months) }}
+    {%- else -%}
+        {{ window_start }}
+    {%- endif -%}
+{%- endmacro -%}
@@ -0,0 +1,68 @@
+-- Columns of a relation whose name contains the keyword, in relation order.
+-- Mirrors the keyword match used by get_dimension_from_table.
+{%- macro filter_columns_by_keyword(columns, keyword) -%}
+    {%- set filtered_columns = [] -%}
+    {%- for col in columns -%}
+        {%- if keyword | lower in col | lower -%}
+            {%- do filtered_columns.append(col) -%}
+        {%- endif -%}
+    {%- endfor -%}
+    {%- do return(filtered_columns) -%}
+{%- endmacro -%}
+
+-- analysis_columns() over a column list: the columns of a relation laid out as columns that the keyword matches
+{%- macro analysis_column_names(columns, keyword) -%}
+    {%- set key_columns = narrow_columns(keyword) -%}
+    {%- do return(key_columns if key_columns is not none else filter_columns_by_keyword(columns, keyword)) -%}
+{%- endmacro -%}
+
+-- Column layout of the relations the models introspect (get_dimension_from_table, coalesce_columns_with_alias,
+-- get_join_conditions), derived from column_mapping with the column macros and period loops that the SELECT lists
+-- of revenue.sql, monthly_revenue.sql, period_revenue.sql and customer_product_contract.sql use.
+{%- macro introspected_columns(model_name) -%}
+    {%- set revenue_columns = ['revenue_key', 'customer_key', 'product_key', 'other_key']
+        + get_seed_table_data(index = 1, exclude_list = ['volume'])
+        + ['mrr', 'volume'] -%}
+    {%- set monthly_columns = ['monthly_revenue_key', 'revenue_type']
+        + analysis_column_names(revenue_columns, 'customer')
+        + analysis_column_names(revenue_columns, 'product')
+        + analysis_column_names(revenue_columns, 'other')
+        + ['month_roll', 'mrr', 'volume', 'ytd_helper', 'arr']
+        + (['snowball_invocation_id'] if var('snowball_incremental', false) else []) -%}
+
+    {%- if model_name == 'revenue' -%}
+        {%- do return(revenue_columns) -%}
+    {%- elif model_name == 'monthly_revenue' -%}
+        {%- do return(monthly_columns) -%}
+    {%- elif model_name == 'period_revenue' -%}
+        {%- set period_columns = [] -%}
+        {%- for prefix, suffix in [('arr_', ''), ('arr_', '_delta'), ('sum_arr_', '_delta')] -%}
+            {%- for period in enabled_periods() -%}
+                {%- do period_columns.append(prefix ~ period ~ suffix) -%}
+            {%- endfor -%}
+        {%- endfor -%}
+        {%- do return(['period_revenue_key']
+            + analysis_column_names(monthly_columns, 'customer')
+            + analysis_column_names(monthly_columns, 'product')
+            + analysis_column_names(monthly_columns, 'other')
+            + ['month_roll', 'mrr', 'arr', 'volume'] + period_columns) -%}
+    {%- elif model_name == 'customer_product_contract' -%}
+        {%- do return(analysis_column_names(revenue_columns, 'customer_level')
+            + analysis_column_names(revenue_columns, 'product_level')
+            + ['product_start_month', 'product_end_month', 'product_churn_month']) -%}
+    {%- else -%}
+        {{ exceptions.raise_compiler_error("No introspection layout defined for model '" ~ model_name ~ "'") }}
+    {%- endif -%}
+{%- endmacro -%}
+
+-- Builds only the relations the models introspect, as empty schema-only stubs, so that dbt compile can
+-- resolve column lists without materializing every model on the warehouse first.
+{% macro bootstrap_introspection() %}
+  {{ log("Creating introspection stubs...", info=true) }}
+    {%- set stubs = [] -%}
+    {%- for model_name in ['revenue', 'monthly_revenue', 'period_revenue', 'customer_product_contract'] -%}
+        {%- do stubs.append({'relation': ref(model_name), 'columns': introspected_columns(model_name)}) -%}
+    {%- endfor -%}
+    {{ create_introspection_stubs(stubs) }}
+  {{ log("Introspection stubs created", info=true) }}
+{% endmacro %}
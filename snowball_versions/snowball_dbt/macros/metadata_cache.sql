@@ -0,0 +1,64 @@
+-- Per-invocation memo of warehouse metadata lookups. The dict lives on the graph context, which dbt shares
+-- across every node of one invocation, so each relation's columns and each seed filter are queried once.
+-- A manifest reused by a later invocation keeps the same graph, hence the invocation_id check.
+-- lookups counts every request made by the macros, queries only those that reached the warehouse. Threads that
+-- miss on the same key at the same moment may each query it once.
+{%- macro metadata_cache() -%}
+    {%- set cache = graph.get('snowball_metadata_cache') -%}
+    {%- if cache is none or cache['invocation_id'] != invocation_id -%}
+        {%- do graph.update({'snowball_metadata_cache': {'invocation_id': invocation_id,
+            'columns': {}, 'seed_rows': {}, 'lookups': 0, 'queries': 0}}) -%}
+    {%- endif -%}
+    {%- do return(graph['snowball_metadata_cache']) -%}
+{%- endmacro -%}
+
+-- Bumps the counters and writes the running totals to the debug log, so the last line holds the final counts
+{%- macro record_metadata_lookup(cache, description, queried) -%}
+    {%- do cache.update({'lookups': cache['lookups'] + 1, 'queries': cache['queries'] + (1 if queried else 0)}) -%}
+    {{ log("Metadata " ~ ("query" if queried else "cache hit") ~ ": " ~ description ~ " (" ~ cache['queries']
+        ~ " queries / " ~ cache['lookups'] ~ " lookups)") }}
+{%- endmacro -%}
+
+-- Column names of a relation, fetched with adapter.get_columns_in_relation on first use only
+{%- macro cached_columns_in_relation(relation) -%}
+    {%- set cache = metadata_cache() -%}
+    {%- set key = relation | string | lower -%}
+    {%- set queried = key not in cache['columns'] -%}
+    {%- if queried -%}
+        {%- set column_names = [] -%}
+        {%- for col in adapter.get_columns_in_relation(relation) -%}
+            {%- do column_names.append(col.name) -%}
+        {%- endfor -%}
+        {%- do cache['columns'].update({key: column_names}) -%}
+    {%- endif -%}
+    {%- do record_metadata_lookup(cache, "columns of " ~ key, queried) -%}
+    {%- do return(cache['columns'][key] | list) -%}
+{%- endmacro -%}
+
+-- Rows of the column_mapping seed for one dimension filter, queried on first use only
+{%- macro cached_seed_rows(filter_value=None) -%}
+    {%- set cache = metadata_cache() -%}
+    {%- set key = filter_value | lower if filter_value is not none else '*' -%}
+    {%- set queried = key not in cache['seed_rows'] -%}
+    {%- if queried -%}
+        {%- set site_array -%}
+            SELECT * FROM {{ ref('column_mapping') }}
+            {% if filter_value is not none -%}
+               WHERE dimension = '{{ filter_value | lower }}'
+            {%- endif -%}
+        {%- endset -%}
+        {%- do cache['seed_rows'].update({key: run_query(site_array).rows | list}) -%}
+    {%- endif -%}
+    {%- do record_metadata_lookup(cache, "column_mapping rows for " ~ key, queried) -%}
+    {%- do return(cache['seed_rows'][key]) -%}
+{%- endmacro -%}
+
+-- Writes the metadata query count with and without the cache to the run log once the models have run.
+-- dbt compile renders this hook before any model, so there it stays silent and the debug lines carry the totals.
+{% macro report_metadata_cache() %}
+    {%- set cache = metadata_cache() if execute else {} -%}
+    {%- if cache.get('lookups', 0) > 0 -%}
+        {{ log("Metadata queries: " ~ cache['queries'] ~ " issued, " ~ cache['lookups'] ~ " without cache ("
+            ~ (cache['lookups'] - cache['queries']) ~ " served from cache)", info=true) }}
+    {%- endif -%}
+{% endmacro %}
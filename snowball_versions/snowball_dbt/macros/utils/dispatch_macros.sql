@@ -61,3 +61,38 @@
   {% set macro = adapter.dispatch('unpivot_kpis') %}
   {{ return(macro(model_ref, columns)) }}
 {%- endmacro -%}
+
+-- introspection.sql
+{%- macro create_introspection_stubs(stubs) -%}
+  {% set macro = adapter.dispatch('create_introspection_stubs') %}
+  {{ return(macro(stubs)) }}
+{%- endmacro -%}
+
+-- incremental.sql
+{%- macro recompute_window_strategy(unique_key) -%}
+  {% set macro = adapter.dispatch('recompute_window_strategy') %}
+  {{ return(macro(unique_key)) }}
+{%- endmacro -%}
+
+-- used in 03_analysis/monthly_revenue.sql
+{%- macro month_scaffold(relation, start_column, end_column) -%}
+  {% set macro = adapter.dispatch('month_scaffold') %}
+  {{ return(macro(relation, start_column, end_column)) }}
+{%- endmacro -%}
+
+-- physical_layout.sql
+{%- macro table_layout_config(layout, month_column) -%}
+  {% set macro = adapter.dispatch('table_layout_config') %}
+  {{ return(macro(layout, month_column)) }}
+{%- endmacro -%}
+
+-- calendar.sql, the analysis models and incremental.sql
+{%- macro add_months(date_expr, months) -%}
+  {% set macro = adapter.dispatch('add_months') %}
+  {{ return(macro(date_expr, months)) }}
+{%- endmacro -%}
+
+{%- macro month_diff(start_date, end_date) -%}
+  {% set macro = adapter.dispatch('month_diff') %}
+  {{ return(macro(start_date, end_date)) }}
+{%- endmacro -%}
@@ -8,15 +8,15 @@
 
 SELECT
     
-    {{ get_dimension_from_table('revenue', 'customer_level') }} 
+    {{ analysis_columns('revenue', 'customer_level') }} 
     , MIN(month)                                                 AS customer_join_month
     , MAX(month)                                                 AS customer_end_month
-    , DATEADD(MONTH, 1, MAX(month))                              AS customer_churn_month
+    , {{ add_months('MAX(month)', 1) }}                              AS customer_churn_month
 
 FROM {{ ref('revenue') }}
 
 WHERE
     mrr <> 0.0
 GROUP BY 
-    {{ get_dimension_from_table('revenue', 'customer_level') }} 
+    {{ analysis_columns('revenue', 'customer_level') }} 
 
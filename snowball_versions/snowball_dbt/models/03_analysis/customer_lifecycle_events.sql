@@ -1,8 +1,15 @@
 {{ 
     config(
-        tags=['analysis']
+        tags=['analysis'],
+        enabled=not var('fused_lifecycle', false),
+        **incremental_window_config(['customer_lifecycle_events_key', 'month_roll'])
         ) 
 }}
+{#- recompute_from_month() refs fact_revenue, monthly_revenue and the contracts on incremental runs only, which dbt does not see at parse time -#}
+{%- do ref('fact_revenue') %}
+{%- do ref('monthly_revenue') %}
+{%- do ref('customer_contract') %}
+{%- do ref('customer_product_contract') %}
 
 /* This stored procedure calculates lifecycle flags for customers based on their join and churn months, producing monthly, quarterly, yearly, and year-to-date indicators for new, churned, and existing customers*/
     
@@ -11,20 +18,24 @@ WITH get_month_difference AS (
     SELECT
 
         m.monthly_revenue_key
-        , {{ get_dimension_from_table('monthly_revenue', 'customer_level', 'm') }} 
+        , {{ analysis_columns('monthly_revenue', 'customer_level', 'm') }} 
         , m.month_roll
         , m.ytd_helper
         , c.customer_join_month
         , c.customer_end_month
         , c.customer_churn_month
-        , DATEDIFF(month, c.customer_join_month, m.month_roll)       AS customer_join_month_difference
-        , DATEDIFF(month, c.customer_churn_month, m.month_roll)      AS customer_churn_month_difference
+        , {{ month_diff('c.customer_join_month', 'm.month_roll') }}       AS customer_join_month_difference
+        , {{ month_diff('c.customer_churn_month', 'm.month_roll') }}      AS customer_churn_month_difference
     
     FROM {{ ref('monthly_revenue') }} AS m
 
     INNER JOIN {{ ref('customer_contract') }} AS c
         ON
-            {{ get_join_conditions('monthly_revenue', 'customer_level', 'm', 'c') }} 
+            {{ analysis_join_conditions('monthly_revenue', 'customer_level', 'm', 'c') }} 
+    {% if incremental_run() %}
+    WHERE
+        m.month_roll >= {{ recompute_from_month() }}
+    {% endif %}
 
 )
 
@@ -35,7 +46,7 @@ WITH get_month_difference AS (
     SELECT
 
         monthly_revenue_key
-        , {{ get_dimension_from_table('monthly_revenue', 'customer_level') }} 
+        , {{ analysis_columns('monthly_revenue', 'customer_level') }} 
         , month_roll   
 
         -- MONTHLY FLAGS
@@ -44,6 +55,8 @@ WITH get_month_difference AS (
                 THEN 1 
             ELSE 0 
         END AS lm_customer_new_flag
+        {#- lm_customer_new_flag is computed whatever the periods var: the winback / reactivation helpers of every period read it #}
+        {% if period_enabled('lm') %}
         , CASE
             WHEN customer_churn_month = month_roll
                 THEN 1 
@@ -55,7 +68,9 @@ WITH get_month_difference AS (
                 THEN 1 
             ELSE 0 
         END AS lm_customer_existing_flag
+        {% endif %}
 
+        {% if period_enabled('l3m') %}
         -- QUARTERLY FLAGS
         , CASE  
             WHEN customer_join_month_difference < 3
@@ -74,7 +89,9 @@ WITH get_month_difference AS (
                 THEN 1 
             ELSE 0 
         END AS l3m_customer_existing_flag
+        {% endif %}
 
+        {% if period_enabled('ltm') %}
         -- YEARLY FLAGS
         , CASE  
             WHEN customer_join_month_difference < 12
@@ -93,7 +110,9 @@ WITH get_month_difference AS (
                 THEN 1 
             ELSE 0 
         END AS ltm_customer_existing_flag
+        {% endif %}
         
+        {% if period_enabled('ytd') %}
         -- YTD FLAGS
         , CASE  
             WHEN customer_join_month_difference < ytd_helper
@@ -112,6 +131,7 @@ WITH get_month_difference AS (
                 THEN 1 
             ELSE 0 
         END AS ytd_customer_existing_flag
+        {% endif %}
     
     FROM get_month_difference
     
@@ -120,23 +140,31 @@ WITH get_month_difference AS (
 SELECT
 
     monthly_revenue_key         AS customer_lifecycle_events_key
-    , {{ get_dimension_from_table('monthly_revenue', 'customer_level') }} 
+    , {{ analysis_columns('monthly_revenue', 'customer_level') }} 
     , month_roll
     , lm_customer_new_flag
+    {% if period_enabled('lm') %}
     , lm_customer_churn_flag
     , lm_customer_existing_flag
+    {% endif %}
 
+    {% if period_enabled('l3m') %}
     , l3m_customer_new_flag
     , l3m_customer_churn_flag
     , l3m_customer_existing_flag
+    {% endif %}
     
+    {% if period_enabled('ltm') %}
     , ltm_customer_new_flag
     , ltm_customer_churn_flag
     , ltm_customer_existing_flag
+    {% endif %}
     
+    {% if period_enabled('ytd') %}
     , ytd_customer_new_flag
     , ytd_customer_churn_flag
     , ytd_customer_existing_flag
+    {% endif %}
 
 FROM 
     customer_lifecycle_flags
\ No newline at end of file
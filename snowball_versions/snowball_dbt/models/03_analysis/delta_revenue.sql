@@ -1,8 +1,15 @@
 {{ 
     config(
-        tags=['analysis']
+        tags=['analysis'],
+        **physical_layout_config(incremental_window_config(['delta_revenue_key', 'month_roll']))
         ) 
 }}
+{#- recompute_from_month() refs fact_revenue, monthly_revenue and the contracts on incremental runs only, which dbt does not see at parse time -#}
+{%- do ref('fact_revenue') %}
+{%- do ref('monthly_revenue') %}
+{%- do ref('customer_contract') %}
+{%- do ref('customer_product_contract') %}
+{%- set fused = var('fused_lifecycle', false) %}
 
 /* This stored procedure calculates revenue deltas by applying flags for changes like acquisition, churn, cross-sell, upsell, and downsell over various time periods(monthly, quarterly, last 12 months, and year-to-date), using joins between revenue data and customer and product lifecycle tables.*/ 
 
@@ -10,19 +17,19 @@ WITH get_arr_business_flag AS (
 
     SELECT
 
-        p1.period_revenue_key
-        , {{ get_dimension_from_table('revenue', 'key', 'p1', exclude_list=['REVENUE_KEY']) }} 
-        , {{ get_dimension_from_table('revenue', 'level', 'p1') }} 
+        p1.{{ 'revenue_lifecycle_events_key' if fused else 'period_revenue_key' }}       AS period_revenue_key
+        , {{ analysis_columns('revenue', 'key', 'p1', exclude_list=['REVENUE_KEY']) }} 
+        {% if not is_narrow_mode() %}
+        , {{ analysis_columns('revenue', 'level', 'p1') }}
+        {% endif %}
         , p1.month_roll
         , p1.arr
-        , p1.arr_lm
-        , p1.arr_l3m
-        , p1.arr_ltm
-        , p1.arr_ytd
-        , p1.arr_lm_delta
-        , p1.arr_l3m_delta
-        , p1.arr_ltm_delta
-        , p1.arr_ytd_delta
+        {%- for period in enabled_periods() %}
+        , p1.arr_{{ period }}
+        {%- endfor %}
+        {%- for period in enabled_periods() %}
+        , p1.arr_{{ period }}_delta
+        {%- endfor %}
 
         -- PRICE VOLUME 
         -- uncomment below fields to find the price volume difference
@@ -32,58 +39,67 @@ WITH get_arr_business_flag AS (
         -- , p1.percentage_price_change_ltm
         -- , p1.percentage_price_change_ytd
 
-        , c.lm_customer_new_flag
-        , c.l3m_customer_new_flag
-        , c.ltm_customer_new_flag
-        , c.ytd_customer_new_flag
+        {%- for period in enabled_periods() %}
+        , {{ period }}_customer_new_flag
+        {%- endfor %}
 
-        , c.lm_customer_churn_flag
-        , c.l3m_customer_churn_flag
-        , c.ltm_customer_churn_flag
-        , c.ytd_customer_churn_flag
+        {%- for period in enabled_periods() %}
+        , {{ period }}_customer_churn_flag
+        {%- endfor %}
 
         -- , c.lm_customer_existing_flag
         -- , c.l3m_customer_existing_flag
         -- , c.ltm_customer_existing_flag
         -- , c.ytd_customer_existing_flag
 
-        , p2.lm_product_churn_flag
-        , p2.l3m_product_churn_flag
-        , p2.ltm_product_churn_flag
-        , p2.ytd_product_churn_flag
+        {%- for period in enabled_periods() %}
+        , {{ period }}_product_churn_flag
+        {%- endfor %}
 
         -- , p2.lm_product_existing_flag
         -- , p2.l3m_product_existing_flag
         -- , p2.ltm_product_existing_flag
         -- , p2.ytd_product_existing_flag
 
-        , b.winback_helper
-        , b.deactivation_helper
-        , b.reactivation_helper
-        , b.intermittent_churn_helper
-        , b.lm_cross_sell_flag
-        , b.lm_upsell_flag
-        , b.lm_downsell_flag
-
-        , b.l3m_winback_helper
-        , b.l3m_reactivation_helper
-        , b.l3m_cross_sell_flag
-        , b.l3m_upsell_flag
-        , b.l3m_downsell_flag
-
-        , b.ltm_winback_helper
-        , b.ltm_reactivation_helper
-        , b.ltm_cross_sell_flag
-        , b.ltm_upsell_flag
-        , b.ltm_downsell_flag
-
+        , winback_helper
+        , deactivation_helper
+        , reactivation_helper
+        , intermittent_churn_helper
+        {% if period_enabled('lm') %}
+        , lm_cross_sell_flag
+        , lm_upsell_flag
+        , lm_downsell_flag
+        {% endif %}
+
+        {% if period_enabled('l3m') %}
+        , l3m_winback_helper
+        , l3m_reactivation_helper
+        , l3m_cross_sell_flag
+        , l3m_upsell_flag
+        , l3m_downsell_flag
+        {% endif %}
+
+        {% if period_enabled('ltm') %}
+        , ltm_winback_helper
+        , ltm_reactivation_helper
+        , ltm_cross_sell_flag
+        , ltm_upsell_flag
+        , ltm_downsell_flag
+        {% endif %}
+
+        {% if period_enabled('ytd') %}
         , ytd_winback_helper
         , ytd_reactivation_helper
-        , b.ytd_cross_sell_flag
-        , b.ytd_upsell_flag
-        , b.ytd_downsell_flag
+        , ytd_cross_sell_flag
+        , ytd_upsell_flag
+        , ytd_downsell_flag
+        {% endif %}
 
     FROM 
+    {% if fused %}
+        -- fused_lifecycle: one model carries the period_revenue columns and every flag
+        {{ ref('revenue_lifecycle_events') }} AS p1
+    {% else %}
         {{ ref('period_revenue') }} AS p1
 
     INNER JOIN {{ ref('customer_lifecycle_events') }} AS c
@@ -95,6 +111,11 @@ WITH get_arr_business_flag AS (
     INNER JOIN {{ ref('customer_product_revenue_events') }} AS b
         ON p1.period_revenue_key = b.customer_product_revenue_events_key
         AND p1.month_roll = b.month_roll
+    {% endif %}
+    {% if incremental_run() %}
+    WHERE
+        p1.month_roll >= {{ recompute_from_month() }}
+    {% endif %}
 
 )
 
@@ -104,10 +125,13 @@ WITH get_arr_business_flag AS (
     SELECT
 
         period_revenue_key
-        , {{ get_dimension_from_table('revenue', 'key', exclude_list=['REVENUE_KEY']) }} 
-        , {{ get_dimension_from_table('revenue', 'level') }} 
+        , {{ analysis_columns('revenue', 'key', exclude_list=['REVENUE_KEY']) }} 
+        {% if not is_narrow_mode() %}
+        , {{ analysis_columns('revenue', 'level') }}
+        {% endif %}
         , month_roll
 
+        {% if period_enabled('lm') %}
         -- MONTHLY DELTAS
         , CASE  
             WHEN lm_customer_new_flag = 1 
@@ -170,7 +194,9 @@ WITH get_arr_business_flag AS (
             THEN arr_lm_delta
             ELSE 0
         END AS lm_delta_downsell
+        {% endif %}
 
+        {% if period_enabled('l3m') %}
         -- QUARTERLY DELTAS
         , CASE  
             WHEN l3m_customer_new_flag = 1 
@@ -232,7 +258,9 @@ WITH get_arr_business_flag AS (
             THEN arr_l3m_delta
             ELSE 0
         END AS l3m_delta_downsell
+        {% endif %}
 
+        {% if period_enabled('ltm') %}
         -- YEARLY DELTAS
         , CASE  
             WHEN ltm_customer_new_flag = 1 
@@ -294,7 +322,9 @@ WITH get_arr_business_flag AS (
             THEN arr_ltm_delta
             ELSE 0
         END AS ltm_delta_downsell  
+        {% endif %}
          
+        {% if period_enabled('ytd') %}
         -- YTD DELTAS
         , CASE  
             WHEN ytd_customer_new_flag = 1 
@@ -357,6 +387,7 @@ WITH get_arr_business_flag AS (
             THEN arr_ytd_delta
             ELSE 0
         END AS ytd_delta_downsell
+        {% endif %}
 
         -- PRICE VOLUME
     -- uncomment below CASE STATEMENTS to find the price volume difference
@@ -471,9 +502,12 @@ SELECT
 
     period_revenue_key          AS delta_revenue_key
     , month_roll
-    , {{ get_dimension_from_table('revenue', 'key', exclude_list=['REVENUE_KEY']) }} 
-    , {{ get_dimension_from_table('revenue', 'level') }} 
+    , {{ analysis_columns('revenue', 'key', exclude_list=['REVENUE_KEY']) }} 
+    {% if not is_narrow_mode() %}
+    , {{ analysis_columns('revenue', 'level') }}
+    {% endif %}
     
+    {% if period_enabled('lm') %}
     , lm_delta_customer_new
     , lm_delta_customer_churn
     , lm_deactivation
@@ -488,7 +522,9 @@ SELECT
     , lm_delta_downsell
     -- , lm_delta_price_downsell
     -- , lm_delta_volume_downsell
+    {% endif %}
 
+    {% if period_enabled('l3m') %}
     , l3m_delta_customer_new
     , l3m_delta_customer_churn
     , l3m_deactivation
@@ -503,7 +539,9 @@ SELECT
     , l3m_delta_downsell
     -- , l3m_delta_price_downsell
     -- , l3m_delta_volume_downsell
+    {% endif %}
 
+    {% if period_enabled('ltm') %}
     , ltm_delta_customer_new
     , ltm_delta_customer_churn
     , ltm_deactivation
@@ -518,7 +556,9 @@ SELECT
     , ltm_delta_downsell
     -- , ltm_delta_price_downsell
     -- , ltm_delta_volume_downsell
+    {% endif %}
 
+    {% if period_enabled('ytd') %}
     , ytd_delta_customer_new
     , ytd_delta_customer_churn
     , ytd_reactivation
@@ -533,5 +573,6 @@ SELECT
     , ytd_delta_downsell
     -- , ytd_delta_price_downsell
     -- , ytd_delta_volume_downsell
+    {% endif %}
 
 FROM filling_delta
@@ -1,8 +1,16 @@
 {{ 
     config(
-        tags=['analysis']
+        tags=['analysis'],
+        **physical_layout_config(incremental_window_config(['period_revenue_key', 'month_roll']))
         ) 
 }}
+{#- recompute_from_month() refs fact_revenue, monthly_revenue and the contracts on incremental runs only, which dbt does not see at parse time -#}
+{%- do ref('fact_revenue') %}
+{%- do ref('monthly_revenue') %}
+{%- do ref('customer_contract') %}
+{%- do ref('customer_product_contract') %}
+{%- set ytd_join = period_enabled('ytd') and ytd_lag_method() == 'self_join' %}
+{%- set ytd_window = period_enabled('ytd') and ytd_lag_method() == 'window' %}
 
 /* This stored procedure calculates ARR changes over different periods (monthly, quarterly, yearly, and year-to-date) and provides insights into how revenue evolves over time.*/
 
@@ -11,17 +19,27 @@ WITH get_ytd_start AS (
     SELECT
 
         monthly_revenue_key
-        , {{ get_dimension_from_table('monthly_revenue', 'customer', 'm') }} 
-        , {{ get_dimension_from_table('monthly_revenue', 'product', 'm') }} 
-        , {{ get_dimension_from_table('monthly_revenue', 'other', 'm') }} 
+        , {{ analysis_columns('monthly_revenue', 'customer', 'm') }} 
+        , {{ analysis_columns('monthly_revenue', 'product', 'm') }} 
+        , {{ analysis_columns('monthly_revenue', 'other', 'm') }} 
         , month_roll
         , arr
         , mrr
         , volume
         , ytd_helper
         , revenue_type
+        {%- if ytd_window %}
+        -- YTD start ARR is the ARR of the month before the first month of the fiscal year, on the pair the self join matches
+        , {{ add_months('month_roll', '1 - ytd_helper') }}                                   AS fiscal_year_start
+        , LAG(arr) OVER (PARTITION BY customer_key, product_key ORDER BY month_roll)    AS arr_prev_month
+        {%- endif %}
     FROM 
         {{ ref('monthly_revenue') }} m
+    {% if incremental_run() %}
+    -- The 12-month lags and the YTD join of the recomputed months read up to 12 months before them
+    WHERE
+        m.month_roll >= {{ recompute_from_month(lookback_months=12) }}
+    {% endif %}
 
 )
 
@@ -32,18 +50,24 @@ WITH get_ytd_start AS (
     SELECT
 
         a.monthly_revenue_key
-        , {{ get_dimension_from_table('monthly_revenue', 'customer', 'a') }} 
-        , {{ get_dimension_from_table('monthly_revenue', 'product', 'a') }} 
-        , {{ get_dimension_from_table('monthly_revenue', 'other', 'a') }} 
+        , {{ analysis_columns('monthly_revenue', 'customer', 'a') }} 
+        , {{ analysis_columns('monthly_revenue', 'product', 'a') }} 
+        , {{ analysis_columns('monthly_revenue', 'other', 'a') }} 
         , a.month_roll
         , a.arr
         , a.mrr
         , a.volume
         , a.revenue_type
-        , COALESCE(LAG(a.arr, {{var('monthly')}}) OVER (PARTITION BY a.monthly_revenue_key ORDER BY a.month_roll), 0)         AS arr_lm   -- Monthly Revenue Lag
-        , COALESCE(LAG(a.arr, {{var('quarterly')}}) OVER (PARTITION BY a.monthly_revenue_key ORDER BY a.month_roll), 0)       AS arr_l3m  -- Quarterly Revenue Lag
-        , COALESCE(LAG(a.arr, {{var('yearly')}}) OVER (PARTITION BY a.monthly_revenue_key ORDER BY a.month_roll), 0)          AS arr_ltm  -- Yearly Revenue Lag
-        , COALESCE(b.arr, 0)                                                                                                  AS arr_ytd
+        -- Monthly, quarterly and yearly revenue lags
+        {%- set lag_offsets = {'lm': var('monthly'), 'l3m': var('quarterly'), 'ltm': var('yearly')} %}
+        {%- for period in enabled_periods() if period != 'ytd' %}
+        , COALESCE(LAG(a.arr, {{ lag_offsets[period] }}) OVER (PARTITION BY a.monthly_revenue_key ORDER BY a.month_roll), 0)       AS arr_{{ period }}
+        {%- endfor %}
+        {%- if ytd_join %}
+        , COALESCE(b.arr, 0)                                                                                                    AS arr_ytd
+        {%- elif ytd_window %}
+        , COALESCE(FIRST_VALUE(a.arr_prev_month) OVER (PARTITION BY a.customer_key, a.product_key, a.fiscal_year_start ORDER BY a.month_roll), 0)    AS arr_ytd
+        {%- endif %}
         -- Uncommend the below lines to get the volume lags
         -- , LAG(volume, {{var('monthly')}}, 0)    OVER (PARTITION BY monthly_revenue_key ORDER BY month_roll)     AS volume_lm,  -- Monthly Volume Lag
         -- , LAG(volume, {{var('quarterly')}}, 0)  OVER (PARTITION BY monthly_revenue_key ORDER BY month_roll)     AS volume_l3m, -- Quarterly Volume Lag
@@ -51,11 +75,13 @@ WITH get_ytd_start AS (
         -- , LAG(volume, ytd_helper, 0)  OVER (PARTITION BY monthly_revenue_key ORDER BY month_roll)               AS volume_ytd  -- Ytd Volume Lag
     FROM get_ytd_start a
 
+    {% if ytd_join -%}
     LEFT JOIN 
         get_ytd_start b 
         ON a.customer_key = b.customer_key
         AND a.product_key = b.product_key
-        AND a.month_roll = DATEADD(MONTH, a.ytd_helper, b.month_roll)
+        AND a.month_roll = {{ add_months('b.month_roll', 'a.ytd_helper') }}
+    {%- endif %}
 )
 
 , get_delta_revenue AS (
@@ -63,27 +89,25 @@ WITH get_ytd_start AS (
     SELECT
 
         monthly_revenue_key
-        , {{ get_dimension_from_table('monthly_revenue', 'customer') }} 
-        , {{ get_dimension_from_table('monthly_revenue', 'product') }} 
-        , {{ get_dimension_from_table('monthly_revenue', 'other') }} 
+        , {{ analysis_columns('monthly_revenue', 'customer') }} 
+        , {{ analysis_columns('monthly_revenue', 'product') }} 
+        , {{ analysis_columns('monthly_revenue', 'other') }} 
         , month_roll
         , revenue_type
         , mrr
         , arr
         , volume
-        , arr_lm
-        , arr_l3m
-        , arr_ltm
-        , arr_ytd
+        {%- for period in enabled_periods() %}
+        , arr_{{ period }}
+        {%- endfor %}
         -- Uncommand the lines to get the  volume lags
         -- volume_lm,
         -- volume_l3m,
         -- volume_ltm,
         -- volume_ytd,
-        , arr - arr_lm           AS arr_lm_delta
-        , arr - arr_l3m          AS arr_l3m_delta
-        , arr - arr_ltm          AS arr_ltm_delta
-        , arr - arr_ytd          AS arr_ytd_delta
+        {%- for period in enabled_periods() %}
+        , arr - arr_{{ period }}           AS arr_{{ period }}_delta
+        {%- endfor %}
 
     FROM 
         get_revenue_lags
@@ -94,15 +118,14 @@ WITH get_ytd_start AS (
 
         SELECT
 
-           {{ get_dimension_from_table('monthly_revenue', 'customer_level') }}
-            , {{ get_dimension_from_table('monthly_revenue', 'product_level') }}
+           {{ analysis_columns('monthly_revenue', 'customer_level') }}
+            , {{ analysis_columns('monthly_revenue', 'product_level') }}
             , month_roll
             , revenue_type
             -- Master Product level Revenue
-            , SUM(arr_lm_delta)   AS sum_arr_lm_delta
-            , SUM(arr_l3m_delta)  AS sum_arr_l3m_delta
-            , SUM(arr_ltm_delta)  AS sum_arr_ltm_delta
-            , SUM(arr_ytd_delta)  AS sum_arr_ytd_delta
+            {%- for period in enabled_periods() %}
+            , SUM(arr_{{ period }}_delta)   AS sum_arr_{{ period }}_delta
+            {%- endfor %}
 
             -- Uncomment the below lines to get the price volume increases
         -- -- PRICE DELTAS
@@ -169,8 +192,8 @@ WITH get_ytd_start AS (
         FROM
             get_delta_revenue
         GROUP BY
-            {{ get_dimension_from_table('monthly_revenue', 'customer_level') }}
-            , {{ get_dimension_from_table('monthly_revenue', 'product_level') }}
+            {{ analysis_columns('monthly_revenue', 'customer_level') }}
+            , {{ analysis_columns('monthly_revenue', 'product_level') }}
             , month_roll
             , revenue_type
 
@@ -180,14 +203,13 @@ get_percentage_change AS (
 
     SELECT
 
-        {{ get_dimension_from_table('monthly_revenue', 'customer_level') }}
-        , {{ get_dimension_from_table('monthly_revenue', 'product_level') }}
+        {{ analysis_columns('monthly_revenue', 'customer_level') }}
+        , {{ analysis_columns('monthly_revenue', 'product_level') }}
         , month_roll
         , revenue_type
-        , sum_arr_lm_delta
-        , sum_arr_l3m_delta
-        , sum_arr_ltm_delta
-        , sum_arr_ytd_delta
+        {%- for period in enabled_periods() %}
+        , sum_arr_{{ period }}_delta
+        {%- endfor %}
 
         -- Uncomment the lines to get the price volume increases
     -- MONTHLY
@@ -258,25 +280,22 @@ get_percentage_change AS (
 SELECT
 
         r.monthly_revenue_key AS period_revenue_key
-        , {{ get_dimension_from_table('monthly_revenue', 'customer', 'r') }}
-        , {{ get_dimension_from_table('monthly_revenue', 'product', 'r') }}
-        , {{ get_dimension_from_table('monthly_revenue', 'other', 'r') }}
+        , {{ analysis_columns('monthly_revenue', 'customer', 'r') }}
+        , {{ analysis_columns('monthly_revenue', 'product', 'r') }}
+        , {{ analysis_columns('monthly_revenue', 'other', 'r') }}
         , r.month_roll
         , r.mrr
         , r.arr
         , r.volume
-        , r.arr_lm
-        , r.arr_l3m
-        , r.arr_ltm
-        , r.arr_ytd
-        , r.arr_lm_delta
-        , r.arr_l3m_delta
-        , r.arr_ltm_delta
-        , r.arr_ytd_delta
-        , p.sum_arr_lm_delta
-        , p.sum_arr_l3m_delta
-        , p.sum_arr_ltm_delta
-        , p.sum_arr_ytd_delta
+        {%- for period in enabled_periods() %}
+        , r.arr_{{ period }}
+        {%- endfor %}
+        {%- for period in enabled_periods() %}
+        , r.arr_{{ period }}_delta
+        {%- endfor %}
+        {%- for period in enabled_periods() %}
+        , p.sum_arr_{{ period }}_delta
+        {%- endfor %}
         -- Uncomment the lines to get the price volume increases
         -- , p.abs_price_lm_delta
         -- , p.percentage_price_change_lm
@@ -287,7 +306,11 @@ SELECT
 FROM get_delta_revenue r 
 LEFT JOIN 
     get_percentage_change p 
-    ON {{ get_join_conditions('monthly_revenue', 'customer_level', 'r', 'p') }}
-    AND {{ get_join_conditions('monthly_revenue', 'product_level', 'r', 'p') }}
+    ON {{ analysis_join_conditions('monthly_revenue', 'customer_level', 'r', 'p') }}
+    AND {{ analysis_join_conditions('monthly_revenue', 'product_level', 'r', 'p') }}
     AND r.month_roll = p.month_roll
     AND r.revenue_type = p.revenue_type
+{% if incremental_run() %}
+WHERE
+    r.month_roll >= {{ recompute_from_month() }}
+{% endif %}
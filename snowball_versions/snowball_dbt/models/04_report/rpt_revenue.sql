@@ -11,10 +11,11 @@ revenue AS (
     SELECT
 
         monthly_revenue_key  AS revenue_key
-        , customer_key
-        , product_key
+        , r.customer_key
+        , r.product_key
         -- , entity_key
-        , other_key
+        , r.other_key
+        {{- report_dimension_columns('r') }}
         , revenue_type
         , month_roll
         , arr AS ltm_revenue
@@ -22,7 +23,7 @@ revenue AS (
         , CASE
             WHEN month_roll <= customer_churn_month
                 THEN SUM(mrr) OVER (
-                    PARTITION BY r.customer_level_1
+                    PARTITION BY r.{{ analysis_grain_column('customer') }}
                     ORDER BY month_roll)
             ELSE 0
           END  AS cltv
@@ -42,7 +43,8 @@ revenue AS (
         {{ ref('monthly_revenue') }} AS r
     LEFT JOIN
         {{ ref('customer_contract') }} AS c
-        ON r.customer_level_1 = c.customer_level_1
+        ON r.{{ analysis_grain_column('customer') }} = c.{{ analysis_grain_column('customer') }}
+    {{- report_dimension_joins('r') }}
         
 )
  
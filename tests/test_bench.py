@@ -0,0 +1,78 @@
+import pytest
+
+from snowball import bench
+
+
+def _results(stages, models):
+    return {"scales": {"100x12": {"customers": 100, "months": 12, "rows": 1200, "stages": stages,
+                                  "models": {name: {"status": "success", "execution_time": seconds}
+                                             for name, seconds in models.items()}}}}
+
+
+@pytest.mark.parametrize("scale, expected", [
+    ("10000x60", (10000, 60)),
+    ("10kx60", (10000, 60)),
+    ("1.5Mx12", (1_500_000, 12)),
+    ("1X1", (1, 1)),
+])
+def test_parse_scale(scale, expected):
+    assert bench.parse_scale(scale) == expected
+
+
+@pytest.mark.parametrize("scale", ["10000", "10000x", "x60", "tenx60", "10x60x2", "0x60", "100x0"])
+def test_parse_scale_rejects_invalid_scales(scale):
+    with pytest.raises(ValueError, match="Invalid scale"):
+        bench.parse_scale(scale)
+
+
+def test_compare_results_flags_slowdowns_past_tolerance_and_min_seconds():
+    baseline = _results({"synth": 2.0, "copy": 0.2, "dbt": 10.0}, {"monthly_revenue": 4.0, "period_revenue": 1.0})
+    current = _results({"synth": 2.4, "copy": 0.6, "dbt": 15.0}, {"monthly_revenue": 8.0, "period_revenue": 1.1,
+                                                                   "rpt_waterfall": 30.0})
+
+    regressions = bench.compare_results(current, baseline)
+
+    # synth is within the 25% tolerance, copy is 3x slower but by less than min_seconds, period_revenue is within
+    # tolerance and rpt_waterfall has no baseline
+    assert [(r["kind"], r["name"], r["ratio"]) for r in regressions] == [("model", "monthly_revenue", 2.0),
+                                                                          ("stage", "dbt", 1.5)]
+    assert regressions[0] == {"scale": "100x12", "kind": "model", "name": "monthly_revenue", "baseline": 4.0,
+                              "current": 8.0, "ratio": 2.0}
+
+
+def test_compare_results_skips_scales_missing_from_the_baseline():
+    baseline = {"scales": {}}
+    assert bench.compare_results(_results({"dbt": 100.0}, {}), baseline) == []
+
+
+def test_compare_results_sorts_a_zero_second_baseline_first():
+    baseline = _results({"synth": 0.0, "dbt": 1.0}, {})
+    current = _results({"synth": 1.0, "dbt": 3.0}, {})
+
+    regressions = bench.compare_results(current, baseline)
+
+    assert [(r["name"], r["ratio"]) for r in regressions] == [("synth", None), ("dbt", 3.0)]
+
+
+def test_format_report():
+    results = _results({"synth": 0.5, "dbt": 12.25}, {"a": 1.0, "b": 3.0, "c": 2.0, "d": 0.5, "e": 0.25, "f": 0.1})
+
+    report = bench.format_report(results, [])
+
+    assert report.splitlines() == [
+        "100x12: 1,200 revenue rows",
+        "  stages  synth 0.50s, dbt 12.25s",
+        "  models  b 3.00s, c 2.00s, a 1.00s, d 0.50s, e 0.25s",
+        "No regressions against the baseline",
+    ]
+
+
+def test_format_report_lists_regressions():
+    regression = {"scale": "100x12", "kind": "model", "name": "monthly_revenue", "baseline": 4.0, "current": 8.0,
+                  "ratio": 2.0}
+
+    lines = bench.format_report(_results({}, {}), [regression]).splitlines()
+
+    assert lines[-1] == "⚠️ 100x12 model monthly_revenue: 4.00s -> 8.00s"
+    assert "No regressions against the baseline" not in lines
+    assert "regressions" not in bench.format_report(_results({}, {}))
@@ -0,0 +1,33 @@
+import os
+
+from snowball import engine, synth
+from snowball.config import load_column_mapping
+
+MAPPING_PATH = os.path.join(os.path.dirname(__file__), "..", "snowball", "snowball_versions", "snowball_dbt", "seeds",
+                            "column_mapping.csv")
+
+
+def _table_lines(out_dir):
+    """Header and sorted rows of each written table: partitions append their rows in another order"""
+    tables = {}
+    for file_name in sorted(os.listdir(out_dir)):
+        if file_name.endswith(".csv"):
+            with open(os.path.join(out_dir, file_name), "r", encoding="utf-8") as file:
+                header, *rows = file.read().splitlines()
+            tables[file_name] = (header, sorted(rows))
+    return tables
+
+
+def test_partitioned_run_matches_in_memory_run(tmp_path):
+    mapping_rows = load_column_mapping(MAPPING_PATH)
+    revenue_path = str(tmp_path / "revenue.csv")
+    synth.write_revenue_table(revenue_path, mapping_rows, customers=120, months=30, recurring_share=0.6,
+                              churn_rate=0.08, reactivation_rate=0.1, upsell_rate=0.1, downsell_rate=0.1, seed=7)
+
+    tables = engine.compute(engine.read_revenue(revenue_path, mapping_rows), mapping_rows)
+    in_memory = engine.write_tables(tables, str(tmp_path / "in_memory"), chunk_rows=500)
+    partitioned = engine.run_partitioned(revenue_path, mapping_rows, str(tmp_path / "partitioned"), partitions=4,
+                                         chunk_rows=500)
+
+    assert partitioned == in_memory
+    assert _table_lines(str(tmp_path / "partitioned")) == _table_lines(str(tmp_path / "in_memory"))
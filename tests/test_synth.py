@@ -0,0 +1,98 @@
+import csv
+import os
+
+import pytest
+
+from snowball import synth
+from snowball.config import load_column_mapping
+
+MAPPING_PATH = os.path.join(os.path.dirname(__file__), "..", "snowball", "snowball_versions", "snowball_dbt", "seeds",
+                            "column_mapping.csv")
+
+
+def _read_rows(path):
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        header, *rows = list(csv.reader(file))
+    return header, rows
+
+
+def test_column_roles():
+    mapping_rows = [
+        ["account", "customer_level_1", "customer"],
+        ["account", "customer_name", "customer"],
+        ["region", "customer_region", "customer"],
+        ["family", "product_level_1", "product"],
+        ["entity", "other_dim_1", "other"],
+        ["is_recurring", "revenue_type", "null"],
+        ["period", "month", "null"],
+        ["amount", "revenue", "null"],
+        ["units", "volume", "null"],
+        ["comment", "note", "null"],
+    ]
+
+    assert synth.column_roles(mapping_rows) == [
+        ("account", "customer_level_1", "customer"),
+        ("region", "customer_region", "customer"),
+        ("family", "product_level_1", "product"),
+        ("entity", "other_dim_1", "other"),
+        ("is_recurring", "revenue_type", "revenue_type"),
+        ("period", "month", "month"),
+        ("amount", "revenue", "revenue"),
+        ("units", "volume", "volume"),
+        ("comment", "note", None),
+    ]
+
+
+def test_column_roles_requires_customer_product_month_and_revenue():
+    mapping_rows = [["account", "customer_level_1", "customer"], ["period", "month", "null"]]
+
+    with pytest.raises(ValueError, match="no product, revenue column"):
+        synth.column_roles(mapping_rows)
+
+
+def test_write_revenue_table_uses_the_defaults(tmp_path):
+    mapping_rows = load_column_mapping(MAPPING_PATH)
+    path = str(tmp_path / "revenue.csv")
+
+    written = synth.write_revenue_table(path, mapping_rows, customers=40)
+
+    header, rows = _read_rows(path)
+    assert header == [source_column for source_column, _, _ in synth.column_roles(mapping_rows)]
+    assert written == len(rows) > 0
+    months = {row[header.index("month")] for row in rows}
+    # 36 months from 2021-01
+    assert "01-01-2021" in months and "01-12-2023" in months and len(months) <= synth.DEFAULTS["months"]
+    assert {row[header.index("customer_name")] for row in rows} <= {f"Customer {n}" for n in range(1, 41)}
+    assert {row[header.index("is_recurring")] for row in rows} == {"0", "1"}
+
+
+def test_write_revenue_table_is_reproducible_for_a_seed(tmp_path):
+    mapping_rows = load_column_mapping(MAPPING_PATH)
+    paths = [str(tmp_path / f"revenue_{n}.csv") for n in range(3)]
+    for path, seed in zip(paths, (5, 5, 6)):
+        synth.write_revenue_table(path, mapping_rows, customers=30, months=12, seed=seed, chunk_rows=7)
+
+    assert _read_rows(paths[0]) == _read_rows(paths[1])
+    assert _read_rows(paths[0]) != _read_rows(paths[2])
+
+
+def test_write_revenue_table_recurring_share(tmp_path):
+    mapping_rows = load_column_mapping(MAPPING_PATH)
+    path = str(tmp_path / "revenue.csv")
+
+    synth.write_revenue_table(path, mapping_rows, customers=30, months=12, recurring_share=1.0)
+
+    header, rows = _read_rows(path)
+    assert {row[header.index("is_recurring")] for row in rows} == {"1"}
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"customer": 10}, "Unknown synth parameter"),
+    ({"months": 0}, "months must be at least 1"),
+    ({"churn_rate": 1.5}, "churn_rate must be between 0 and 1"),
+    ({"upsell_rate": 0.6, "downsell_rate": 0.6}, "upsell_rate \\+ downsell_rate"),
+    ({"key_skew": -1}, "key_skew not negative"),
+])
+def test_write_revenue_table_rejects_invalid_parameters(tmp_path, overrides, message):
+    with pytest.raises(ValueError, match=message):
+        synth.write_revenue_table(str(tmp_path / "revenue.csv"), load_column_mapping(MAPPING_PATH), **overrides)